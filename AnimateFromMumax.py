@@ -1,8 +1,13 @@
 import bpy
 import os
 import numpy as np
-import discretisedfield as df
-import matplotlib
+from utils import getCameraMatrix, parameter
+from glyphs import createGlyphField, getAttributeMaterial
+from vectors import applyColourMap
+from colourmaps import getColourMap
+from volumes import getGridShape, loadSlices, loadProjection, sampleSeries, getPositions
+from sampling import getWeights, frustumMask, sampleGrid
+from profiling import Profiler
 
 ##########################################
 # Take MuMax Data and Animate in Blender #
@@ -10,101 +15,120 @@ import matplotlib
 
 # Inspiration came from https://peytondmurray.github.io/coding/blender-visualization/
 
-# Deal with the colour map
-cmap = matplotlib.cm.get_cmap('RdBu_r')
-# To normalise m_z to be between 0 and 1, which is where the colour map is defined
-norm = matplotlib.colors.Normalize(vmin=-1, vmax=1)
+# Deal with the colour map (tabulated once, so that the colours of all cones can be looked up at once)
+lut = getColourMap('RdBu_r')
 
-# Clear objects from previous runs
-for obj in bpy.data.objects:
-    bpy.data.objects.remove(obj)
+# Nothing is cleared from previous runs: the cones (identified by their indices in the grid) are updated in place by createGlyphField()
 
-# Clear materials from pervious runs
-for mat in bpy.data.materials:
-    bpy.data.materials.remove(mat)
+scaleFactor = parameter('scaleFactor', 3)      # Controls distance between arrows
+frameDistance = parameter('frameDistance', 5)  # Controls how far apart the frames are in time (higher = slower simulation)
 
-scaleFactor = 3    # Controls distance between arrows
-frameDistance = 5  # Controls how far apart the frames are in time (higher = slower simulation)
+directory = parameter('directory', '/Users/rossknapman/Desktop/BlenderTest/')
 
-directory = '/Users/rossknapman/Desktop/BlenderTest/'
-initialFile = 'm000000.ovf'
+# What is drawn from the files: 'film' (a 2D film, i.e. a single z-layer), 'slice' (the z-layers in zSlices, each drawn
+# as a film), 'projection' (the reduction of the magnetization along z, drawn as a film) or 'volume' (glyphs throughout
+# the whole volume, which is read in chunks of z-layers so that it never needs to fit in memory)
+mode = parameter('mode', 'film')
+zSlices = parameter('zSlices', [0])         # Indices of the z-layers drawn in 'slice' mode
+reduction = parameter('reduction', 'mean')  # 'mean', 'min' or 'max' along z in 'projection' mode
+chunkSize = parameter('chunkSize', 16)      # Number of z-layers read at a time in 'projection' and 'volume' modes
+workers = parameter('workers', 1)           # Number of processes reading the chunks
 
-m = df.Field.fromfile(directory + initialFile).array
-m = m.reshape(m.shape[0], m.shape[1], 3)  # Loads as 3D array of vectors due to redundant z index; change to 2D array
+# Distance between data points read from the files (the glyphs themselves are then chosen from these points); in
+# 'volume' mode this is also the distance between the z-layers read
+step = parameter('step', 1)
 
-# Distance between data points
-step = 5
-m = m[::step, ::step]
+# Largest number of cones drawn, placed more densely where the magnetization changes quickly (None to draw a cone at every point read)
+glyphBudget = parameter('glyphBudget', 20000)
 
+# Whether to only draw the cones within view of the scene's camera (which then also get denser closer to the camera)
+cullToCamera = parameter('cullToCamera', False)
 
-for i in range(m.shape[0]):
-    for j in range(m.shape[1]):
+# File in which the cones chosen in 'film' and 'volume' modes, and their magnetization at every frame, are cached, so
+# that re-running the script with the same files and options does not read the files again (None to not cache them)
+cachePath = parameter('cachePath', directory + 'cones.npz')
+
+# JSON file to which the time spent on each stage is written (as well as being printed), or None
+profilePath = parameter('profilePath', None)
+
+profiler = Profiler()
+
+with profiler.stage('load'):
+
+    files = sorted([f for f in os.listdir(directory) if f.startswith('m') and f.endswith('.ovf')])
+    frameNos = np.array([int(''.join([i for i in f if i.isdigit()])) for f in files])
+
+    paths = [directory + f for f in files]
+
+    # Load all of the files first, so that the orientations and colours of all cones at all frames are known before any cones are drawn
+    # Each of the films drawn is one z-layer of m, whose z-index in the files is in zIndices ('film' and 'volume' modes are
+    # instead loaded along with the sampling, so that only the points chosen are ever held for every frame)
+    if mode == 'slice':
+        m = np.stack([loadSlices(path, zSlices, step=(step, step, 1)) for path in paths])
+        zIndices = zSlices
+    elif mode == 'projection':
+        m = np.stack([loadProjection(path, (step, step, 1), reduction, chunkSize, workers)[:, :, np.newaxis] for path in paths])
+        zIndices = [0]
+
+# The same cones are used for all frames, so they are placed wherever the magnetization changes quickly in any frame
+with profiler.stage('sampling'):
+
+    cameraMatrix, cameraPosition = getCameraMatrix() if cullToCamera else (None, None)
+
+    if mode in ('film', 'volume'):
+
+        # A 2D film is a volume a single layer thick (whose step along z is irrelevant), so it is also read a chunk at a time
+        readStep = step if mode == 'volume' else (step, step, 1)
+
+        # Texture shifted to be centred at origin in x and y, with the bottom layer at z = 2
+        shape = getGridShape(paths[0], readStep)[:3]
+        origin = (-scaleFactor * (shape[0] - 1)/2, -scaleFactor * (shape[1] - 1)/2, 2)
+
+        ids, directions = sampleSeries(paths, glyphBudget, readStep, origin=origin, spacing=scaleFactor, cameraMatrix=cameraMatrix, cameraPosition=cameraPosition,
+                                       chunkSize=chunkSize, workers=workers, cachePath=cachePath)
+        positions = getPositions(shape, ids, origin, scaleFactor)
+
+    else:
 
         # Position based on array index; texture shifted to be centred at origin
-        x = scaleFactor * (i - (m.shape[0] - 1)/2)
-        y = scaleFactor * (j - (m.shape[1] - 1)/2)
-        
-        # Create a cone and place it at the required point
-        # In a similar manner, you could also create a cylinder here, and join them to create an arrow
-        # Note that the cone is pointing upwards, and the rotation is not updated until the second for loop with frameNo
-        # I set a z-value of 2 as I orinally placed a cylinder below it to create an arrow
-        bpy.ops.mesh.primitive_cone_add(vertices=100, location=(x, y, 2))
-        
-        # We rename the objects so that we can select them (this is especially useful if we deal with more complex objects, like a cylinder and cone joined together to make an arrow)
-        theCone = bpy.data.objects.get('Cone')  # Select the newly-created cone, which Blender just calls 'Cone' by default
-        theCone.name = f'Cone({i},{j})'         # Rename
-        theCone.rotation_mode = 'AXIS_ANGLE'    # Imporant when we update the orientations
-
-        # Create a new material to put on the cone, we just give it the same name as the cone (e.g. Cone(14,21))
-        newMat = bpy.data.materials.new(name=f'Cone({i},{j})')
-        newMat.use_nodes = True                # Allows programmatic updating of the shader
-        theCone.data.materials.append(newMat)  # Attach the material to the cone
-
-        # Set new cones to red (useful for debugging, to make sure the cones are actually being coloured)
-        bpy.data.materials[f'Cone({i},{j})'].node_tree.nodes[0].inputs['Base Color'].default_value = [1, 0, 0, 1]
-        
-        # Line the cones to the scene
-        bpy.context.scene.collection.objects.link(theCone)
-            
-
-files = sorted([''.join([i for i in f if i.isdigit()]) for f in os.listdir(directory) if f.startswith('m') and f.endswith('.ovf')])
-
-# Loop through the files
-for frameNo in range(int(files[0]), int(files[-1])):
-    
-    m = df.Field.fromfile(directory + 'm' + f'{frameNo:06d}' + '.ovf').array
-    m = m.reshape(m.shape[0], m.shape[1], 3)  # We only image a 2D film, so we remove the redundant z-axis
-            
-    m = m[::step, ::step]
-
-    for i in range(m.shape[0]):
-        for j in range(m.shape[1]):
-            
-            # Select the required object
-            object = bpy.data.objects[f'Cone({i},{j})']
-
-            mx = m[i, j, 0]
-            my = m[i, j, 1]
-            mz = m[i, j, 2]
-            
-            theta = np.arccos(mz / np.sqrt(mx**2 + my**2 + mz**2))
-            phi = np.arctan2(my, mx)
-
-            object = bpy.data.objects[f'Cone({i},{j})']
-            
-            theAxisAngle = phi + np.pi/2
-            axisX = np.cos(theAxisAngle)
-            axisY = np.sin(theAxisAngle)
-
-            object.rotation_axis_angle = [theta, axisX, axisY, 0]
-            
-            # Update the material colour based on the z-value of the magnetization
-            r, g, b, alpha = cmap(norm(mz))
-            bpy.data.materials[f'Cone({i},{j})'].node_tree.nodes[0].inputs['Base Color'].default_value = [r, g, b, alpha]
-
-            # Insert keyframes for the material colour and the orientation of the vector
-            bpy.data.materials[f'Cone({i},{j})'].node_tree.nodes[0].inputs['Base Color'].keyframe_insert(data_path='default_value', frame=frameDistance*frameNo)
-            object.keyframe_insert(data_path='rotation_axis_angle', frame=frameNo)
+        # I set a z-value of 2 as I orinally placed a cylinder below each cone to create an arrow
+        i, j, k = np.meshgrid(np.arange(m.shape[1]), np.arange(m.shape[2]), zIndices, indexing='ij')
+        positions = np.zeros((m.shape[1], m.shape[2], len(zIndices), 3))
+        positions[..., 0] = scaleFactor * (i - (m.shape[1] - 1)/2)
+        positions[..., 1] = scaleFactor * (j - (m.shape[2] - 1)/2)
+        positions[..., 2] = 2 + scaleFactor * k
+
+        # Each layer is sampled as a separate film, with an equal share of the budget
+        chosen = np.zeros(positions.shape[:-1], dtype=bool)
+
+        for layer in range(len(zIndices)):
+            weights = np.max([getWeights(frame[:, :, layer], positions=positions[:, :, layer], cameraPosition=cameraPosition) for frame in m], axis=0)
+            chosen[:, :, layer] = sampleGrid(weights, glyphBudget and glyphBudget // len(zIndices), mask=frustumMask(positions[:, :, layer], cameraMatrix) if cullToCamera else None)
+
+        # One vector per cone, in the same order as the points of the point cloud
+        i, j, layer = np.nonzero(chosen)
+        ids = np.ravel_multi_index((i, j, np.asarray(zIndices)[layer]), (m.shape[1], m.shape[2], max(zIndices) + 1))
+        positions = positions[chosen]
+        directions = m[:, chosen]
+
+# The colours of the cones are based on the z-value of the magnetization
+with profiler.stage('colours'):
+    colours = applyColourMap(directions[:, :, 2], lut, vmin=-1, vmax=1)
+
+with profiler.stage('material'):
+    material = getAttributeMaterial()
+
+# Draw all of the cones as instances on a single point cloud, with the direction and colour of each cone stored on its point
+# Rather than keyframing every cone (which is slow for more than a few thousand cones), the point cloud holds a copy of
+# the cones for each frame of the simulation, which is shown until the next one
+with profiler.stage('glyphs'):
+    cones = createGlyphField('Cones', positions, directions, colours, vertices=100, material=material, ids=ids, frames=frameDistance*frameNos)
 
 # Save the .blend file
-bpy.ops.wm.save_as_mainfile(filepath=bpy.data.filepath)
+with profiler.stage('save'):
+    bpy.ops.wm.save_as_mainfile(filepath=bpy.data.filepath)
+
+print(profiler.summary())
+
+if profilePath is not None:
+    profiler.dump(profilePath)
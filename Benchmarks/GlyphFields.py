@@ -0,0 +1,236 @@
+###############################################################
+# Benchmark of building glyph fields from 10^3 to 10^6 points #
+###############################################################
+
+# Times each stage of building a glyph field, on fixed synthetic inputs of increasing size:
+#
+#     skyrmions: a 5x5 lattice of textures.Skyrmion on a 2D grid (as in SkyrmionByLocation.py)
+#     hopfion:   the skyrmion tube from textures.hopfionTube() on a 3D grid (as in SkyrmionTube.py)
+#     ovf:       a stack of synthetic OVF files of a 2D film, read with volumes.py (as in AnimateFromMumax.py)
+#
+# The stages are computing (or reading) the field, choosing the glyphs with sampling.py (or volumes.sampleVolume() for
+# the OVF files), preparing the arrays of glyph positions, directions and colours, and, if bpy can be imported (e.g. when
+# run with Blender's Python or with the bpy module from PyPI), building the scene. Each time is the best of several
+# repeats. Run with e.g.
+#
+#     python Benchmarks/GlyphFields.py --sizes 1000 1000000 --cases skyrmions ovf
+#
+# Timings depend on the machine, so no baselines are kept in the repository. To check for slowdowns, first store the
+# times on your machine with --baselines times.json --update, and later pass --baselines times.json to compare against
+# them, which fails if any stage is more than the tolerance (and a few milliseconds) slower.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textures import Skyrmion, skyrmionField, hopfionTube
+from vectors import normalise, applyColourMap
+from colourmaps import getColourMap
+from sampling import getWeights, sampleGrid
+from ovf import writeOVF
+from volumes import getGridShape, sampleVolume, gatherPoints
+
+try:
+    import bpy
+    from glyphs import createGlyphField, getAttributeMaterial
+except ImportError:
+    bpy = None
+
+# Number of frames in the synthetic OVF stacks
+FRAMES = 4
+
+# Largest number of glyphs chosen by the sampling stage
+GLYPH_BUDGET = 20000
+
+
+def skyrmionLattice(size):
+
+    """ A 5x5 lattice of skyrmions on a square grid of about size points (independent of the size, apart from the resolution). """
+
+    n = int(round(np.sqrt(size)))
+    X = np.linspace(-100, 100, n)
+    x, y = np.meshgrid(X, X, indexing='ij')
+
+    skyrmions = [Skyrmion(cx + 20 * (row % 2), cy, eta=np.pi/2 * (row % 2)) for row, cy in enumerate(np.linspace(-80, 80, 5)) for cx in np.linspace(-80, 80, 5)]
+
+    return skyrmionField(skyrmions, x, y)
+
+
+def hopfionGrid(size, L=20, R=5, w=2):
+
+    """ The skyrmion tube (and its helicity) on a cubic grid of about size points. """
+
+    n = int(round(size ** (1/3)))
+    X = np.linspace(-1.6*L, 1.6*L, n)
+    Z = np.linspace(-0.8*L, 0.8*L, n)
+    x, y, z = np.meshgrid(X, X, Z, indexing='ij')
+
+    return hopfionTube(x, y, z, L, R, w)
+
+
+def ovfStack(size, directory):
+
+    """ Write FRAMES synthetic OVF files of a 2D film of about size points, in which the skyrmion lattice's helicity turns. """
+
+    n = int(round(np.sqrt(size)))
+    X = np.linspace(-100, 100, n)
+    x, y = np.meshgrid(X, X, indexing='ij')
+
+    paths = []
+
+    for frame in range(FRAMES):
+
+        skyrmions = [Skyrmion(cx, cy, eta=frame * np.pi / FRAMES) for cy in np.linspace(-80, 80, 5) for cx in np.linspace(-80, 80, 5)]
+        path = os.path.join(directory, f'm{frame:06d}.ovf')
+        writeOVF(path, skyrmionField(skyrmions, x, y))
+        paths.append(path)
+
+    return paths
+
+
+def gridPositions(shape):
+
+    """ Positions of the points of a grid of the given shape (2D or 3D), with unit spacing. """
+
+    return np.stack(np.meshgrid(*[np.arange(n, dtype=np.float64) for n in shape] + [np.zeros(1)] * (3 - len(shape)), indexing='ij'), axis=-1).reshape(shape + (3,))
+
+
+def runCase(case, size, paths, maxScenePoints):
+
+    """ Run each stage of a case once (paths being the synthetic OVF files for the ovf case), returning the time taken by each. """
+
+    times = {}
+
+    start = time.perf_counter()
+
+    if case == 'skyrmions':
+        m = skyrmionLattice(size)
+    elif case == 'hopfion':
+        m, helicity = hopfionGrid(size)
+    else:
+        # Every point of the film, one chunk of z-layers (here the only one) at a time
+        shape = getGridShape(paths[0])[:3]
+        m = gatherPoints(paths, np.arange(np.prod(shape))).reshape((len(paths),) + shape[:2] + (3,))
+
+    times['field'] = time.perf_counter() - start
+
+    frames = m if case == 'ovf' else m[np.newaxis]
+
+    start = time.perf_counter()
+    if case == 'ovf':
+        chosen = sampleVolume(paths, GLYPH_BUDGET)
+    else:
+        chosen = sampleGrid(np.max([getWeights(frame) for frame in frames], axis=0), GLYPH_BUDGET)
+    times['sampling'] = time.perf_counter() - start
+
+    # Glyphs at every point, so that the remaining stages scale with the size
+    start = time.perf_counter()
+    positions = gridPositions(frames.shape[1:-1]).reshape(-1, 3)
+    directions = normalise(frames.reshape(len(frames), -1, 3))
+    if case == 'hopfion':
+        colours = applyColourMap(helicity.reshape(1, -1), getColourMap('hsv'), vmin=-np.pi, vmax=np.pi, periodic=True)
+    else:
+        colours = applyColourMap(directions[..., 2], getColourMap('RdBu_r'), vmin=-1, vmax=1)
+    times['prepare'] = time.perf_counter() - start
+
+    # Every frame of the OVF stacks is drawn from its own copy of the points (as in AnimateFromMumax.py)
+    if bpy is not None and len(positions) <= maxScenePoints:
+
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+
+        start = time.perf_counter()
+
+        if case == 'ovf':
+            createGlyphField('Glyphs', positions, directions, colours, material=getAttributeMaterial(), frames=np.arange(len(frames)))
+        else:
+            createGlyphField('Glyphs', positions, directions[0], colours[0], material=getAttributeMaterial())
+
+        times['scene'] = time.perf_counter() - start
+
+    del chosen
+
+    return times
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark of building glyph fields at multiple scales')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**3, 10**4, 10**5, 10**6], help='Approximate numbers of points')
+    parser.add_argument('--cases', nargs='+', default=['skyrmions', 'hopfion', 'ovf'], choices=['skyrmions', 'hopfion', 'ovf'])
+    parser.add_argument('--repeat', type=int, default=5, help='Number of times each case is run (the best time is taken)')
+    parser.add_argument('--tolerance', type=float, default=1, help='Largest allowed slowdown relative to the baselines (1 being twice as slow)')
+    parser.add_argument('--max-scene-points', type=int, default=10**5, help='Largest size at which the scene is built')
+    parser.add_argument('--baselines', default=None, help='JSON file of baseline times measured on this machine, to compare with (none by default)')
+    parser.add_argument('--update', action='store_true', help='Store the times measured as the new baselines')
+    args = parser.parse_args()
+
+    if args.update and args.baselines is None:
+        parser.error('--update needs --baselines')
+
+    # The best of a few repeats is needed for the comparison not to fail at random
+    if args.baselines is not None and not args.update and args.repeat < 3:
+        parser.error('Comparing with the baselines needs --repeat of at least 3')
+
+    baselines = {}
+
+    if args.baselines is not None and os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    times = baselines.setdefault('times', {})
+    failed = False
+
+    print(f'bpy {"available" if bpy is not None else "not available; skipping the scene stage"}')
+    print(f'{"case":>10} {"size":>8} {"stage":>9} {"time (s)":>9} {"baseline":>9} {"ratio":>6}')
+
+    for case in args.cases:
+        for size in args.sizes:
+
+            # The synthetic OVF files are written once (untimed), and read in every repeat
+            directory = tempfile.mkdtemp()
+
+            try:
+                paths = ovfStack(size, directory) if case == 'ovf' else None
+
+                best = {}
+                for _ in range(args.repeat):
+                    for stage, elapsed in runCase(case, size, paths, args.max_scene_points).items():
+                        best[stage] = min(best.get(stage, np.inf), elapsed)
+            finally:
+                shutil.rmtree(directory)
+
+            for stage, elapsed in best.items():
+
+                key = f'{case}/{size}/{stage}'
+                baseline = times.get(key)
+
+                if baseline is None:
+                    comparison = f'{"-":>9} {"-":>6}'
+                else:
+                    # Very short stages are given a little leeway, as they are dominated by noise
+                    slow = elapsed > baseline * (1 + args.tolerance) + 0.01
+                    failed |= slow
+                    comparison = f'{baseline:>9.4f} {elapsed / baseline:>6.2f}' + (' SLOWER' if slow else '')
+
+                print(f'{case:>10} {size:>8} {stage:>9} {elapsed:>9.4f} {comparison}')
+
+                if args.update:
+                    times[key] = elapsed
+
+    if args.update:
+
+        baselines['machine'] = {'platform': platform.platform(), 'processor': platform.processor(), 'cpus': os.cpu_count(), 'python': platform.python_version(), 'numpy': np.__version__}
+
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+            f.write('\n')
+
+    sys.exit(1 if failed else 0)
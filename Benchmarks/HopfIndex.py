@@ -0,0 +1,102 @@
+##############################################################
+# Benchmark of the Hopf index calculation on analytic tubes #
+##############################################################
+
+# Builds a skyrmion tube with textures.hopfionTube() (the transform_to_origin/get_helicity construction from
+# SkyrmionTube.py) on a size^3 grid, then reports the Hopf index, runtime and peak memory (on top of the magnetization
+# itself, as measured by tracemalloc) of each method. Run with e.g.
+#
+#     python Benchmarks/HopfIndex.py --size 256 --methods slab fft
+#
+# The "reference" method is the original one-line calculation from SkyrmionTube.py (with its sign flipped, as that used
+# a y-first meshgrid), which needs several times the memory of the magnetization.
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textures import hopfionTube
+from hopf import hopfIndex
+
+
+def referenceHopfIndex(mArray):
+
+    """ The original "one-line" Hopf index from SkyrmionTube.py. """
+
+    mReduced = mArray[:-1, :-1, :-1]
+    mdx = np.diff(mArray, axis=0)[:, :-1, :-1]
+    mdy = np.diff(mArray, axis=1)[:-1, :, :-1]
+    mdz = np.diff(mArray, axis=2)[:-1, :-1, :]
+
+    return np.sum(np.einsum('ijkl,ijkl->ijk', mReduced, np.einsum('ijk,ijkl->ijkl', np.cumsum(np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdx, mdy)), axis=1), np.cross(mdz, mdy)) + np.einsum('ijk,ijkl->ijkl', np.cumsum(np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdy, mdz)), axis=1), np.cross(mdx, mdy))))/(4*np.pi)**2
+
+
+def getTube(size, hopf_index, L=20, R=5, w=2):
+
+    """ Analytic skyrmion tube on a size^3 grid, indexed as [x, y, z, component]. """
+
+    X = np.linspace(-1.6*L, 1.6*L, size)
+    Z = np.linspace(-0.8*L, 0.8*L, size)
+    x, y, z = np.meshgrid(X, X, Z, indexing='ij')
+
+    mArray, _ = hopfionTube(x, y, z, L, R, w, hopf_index=hopf_index)
+
+    return mArray
+
+
+def measure(function, *args, **kwargs):
+
+    """ Call function, returning its result, the time it took in seconds and the peak memory it allocated in bytes. """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    result = function(*args, **kwargs)
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark of the Hopf index calculation on analytic skyrmion tubes')
+    parser.add_argument('--size', type=int, default=256, help='Number of grid points along each axis')
+    parser.add_argument('--hopf-index', type=int, nargs='+', default=[1], help='Hopf indices of the tubes to check')
+    parser.add_argument('--methods', nargs='+', default=['slab', 'fft'], choices=['slab', 'fft', 'reference'])
+    parser.add_argument('--slab-size', type=int, default=8, help='Number of z-layers per slab for the slab method')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Maximum allowed deviation from the analytic Hopf index')
+    args = parser.parse_args()
+
+    failed = False
+
+    print(f'{"H":>3} {"method":>10} {"result":>10} {"error":>8} {"time (s)":>9} {"peak (MB)":>10}')
+
+    for H in args.hopf_index:
+
+        mArray = getTube(args.size, H)
+
+        for method in args.methods:
+
+            if method == 'reference':
+                result, elapsed, peak = measure(referenceHopfIndex, mArray)
+            else:
+                result, elapsed, peak = measure(hopfIndex, mArray, method=method, slabSize=args.slab_size)
+
+            error = result - H
+            failed |= abs(error) > args.tolerance
+
+            print(f'{H:>3} {method:>10} {result:>10.5f} {error:>8.5f} {elapsed:>9.3f} {peak / 2**20:>10.1f}')
+
+        del mArray
+
+    print(f'Field size: {args.size**3 * 3 * 8 / 2**20:.1f} MB')
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,37 @@
+##############################################
+# Export a glyph field to a glTF or PLY file #
+##############################################
+
+# Writes the points saved by pipeline.npzSink() (or any .npz file with 'positions', 'directions' and optionally
+# 'colours' arrays) as glyphs, without Blender. Run with e.g.
+#
+#     python ExportGlyphs.py tube.npz tube.glb --glyph ARROW --scale 0.5
+#
+# which writes a binary glTF file with the glyph instanced at each point; a .ply output is written out in full as triangles.
+
+import os
+import argparse
+import numpy as np
+
+from exporters import writeGLTF, writePLY
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Export a glyph field to a glTF (.glb) or PLY (.ply) file')
+    parser.add_argument('input', help='.npz file with positions, directions and optionally colours')
+    parser.add_argument('output', help='Output file, ending in .glb or .ply')
+    parser.add_argument('--glyph', default='CONE', choices=['CONE', 'ARROW'])
+    parser.add_argument('--scale', type=float, default=1, help='Uniform scale factor of the glyphs')
+    parser.add_argument('--vertices', type=int, default=32, help='Number of vertices around the circumference of the glyph')
+    args = parser.parse_args()
+
+    writers = {'.glb': writeGLTF, '.ply': writePLY}
+    extension = os.path.splitext(args.output)[1].lower()
+
+    if extension not in writers:
+        parser.error(f'Unknown output format {extension}')
+
+    with np.load(args.input, mmap_mode='r') as points:
+        colours = points['colours'] if 'colours' in points else None
+        writers[extension](args.output, points['positions'], points['directions'], colours, args.glyph, args.scale, args.vertices)
@@ -0,0 +1,60 @@
+#####################################################
+# Tabulate matplotlib colour maps for colourmaps.py #
+#####################################################
+
+# The scripts colour their glyphs with the lookup tables in colourmaps.json (see colourmaps.py), so that matplotlib is
+# not needed inside Blender. This regenerates that file, e.g. to add another colour map, and is the only place where
+# matplotlib is needed. Run with e.g.
+#
+#     python GenerateColourMaps.py RdBu_r hsv
+#
+# to add (or update) just the given colour maps.
+
+import os
+import sys
+import json
+import numpy as np
+import matplotlib
+
+# The colour maps tabulated by default: diverging maps for signed components, cyclic maps for angles such as the
+# helicity, and a few sequential maps
+COLOUR_MAPS = [
+    'RdBu_r', 'RdBu', 'bwr', 'seismic', 'coolwarm', 'PiYG', 'PuOr',
+    'hsv', 'twilight', 'twilight_shifted',
+    'viridis', 'plasma', 'inferno', 'magma', 'cividis', 'Greys',
+]
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'colourmaps.json')
+
+
+def tabulate(name):
+
+    """ The colour map as a string of hexadecimal RGBA bytes, one group of eight characters per entry. """
+
+    # matplotlib.cm.get_cmap was removed in matplotlib 3.9, in favour of the colour map registry
+    if hasattr(matplotlib, 'colormaps'):
+        cmap = matplotlib.colormaps[name]
+    else:
+        cmap = matplotlib.cm.get_cmap(name)
+
+    return np.asarray(cmap(np.arange(cmap.N), bytes=True), dtype=np.uint8).tobytes().hex()
+
+
+if __name__ == '__main__':
+
+    names = sys.argv[1:] or COLOUR_MAPS
+
+    tables = {}
+
+    if os.path.exists(PATH):
+        with open(PATH) as f:
+            tables = json.load(f)
+
+    for name in names:
+        tables[name] = tabulate(name)
+
+    with open(PATH, 'w') as f:
+        json.dump(tables, f, indent=0, sort_keys=True)
+        f.write('\n')
+
+    print(f'Wrote {len(names)} colour maps to {PATH}')
@@ -1,145 +1,139 @@
 import bpy
 import numpy as np
-import matplotlib.cm
 from utils import *
+from curves import createBezierCurve
+from glyphs import createGlyphField, getAttributeMaterial
+from vectors import applyColourMap
+from colourmaps import getColourMap
+from preimages import getPreimages, extractPreimage
+from textures import hopfionTube
+from cache import cached
 
-cmap = matplotlib.cm.get_cmap('RdBu_r')
-norm = matplotlib.colors.Normalize(vmin=-1, vmax=1)
+lut = getColourMap('RdBu_r')
 
 
-w = 2
-R = 5
-L = 20
-m = 1
-eta = np.pi/2
-
-
-
-def getXYZ(psi, alpha, chi):
-    
-    A = np.cos(psi) * np.sin(alpha) * np.cos(chi) + np.sin(psi) * np.sin(alpha) * np.sin(chi)
-    B = -np.sin(psi) * np.sin(alpha) * np.cos(chi) + np.cos(psi) * np.sin(alpha) * np.sin(chi)
-    
-    Phi = np.arctan2(np.cos(alpha), A)
-    Theta = np.arccos(B)
-    
-    phi = (Phi - eta) / m
-    
-    r = w * np.arcsinh(np.sinh(R/w) / np.tan(Theta/2))
-    
-    xPrime = r * np.cos(phi)
-    z = r * np.sin(phi)
-    
-    x = (L + xPrime) * np.cos(psi)
-    y = (L + xPrime) * np.sin(psi)
-    
-    return x, y, z
+# Parameters of the hopfion
+parameters = dict(
+    w = 2,
+    R = 5,
+    L = 20,
+    m = 1,
+    eta = np.pi/2,
+)
 
 
 def getMaterial(chi, alpha):
-    
+
     theMaterial = bpy.data.materials.new(name=f'{alpha},{chi}')
     theMaterial.use_nodes = True
 
     mx = np.sin(alpha) * np.cos(chi)
-    r, g, b, alphaValue = cmap(norm(mx))
+    theMaterial.node_tree.nodes[0].inputs['Base Color'].default_value = applyColourMap(mx, lut, vmin=-1, vmax=1)
 
-    theMaterial.node_tree.nodes[0].inputs['Base Color'].default_value = [r, g, b, alphaValue]
-    
     return theMaterial
 
 
-def drawCones(chi, alpha, theMaterial):
-    
+def drawCones(chi, alpha):
+
+    """ Draw cones along the preimages of all of the given directions, as a single instanced object.
+
+    Args:
+        chi: (K,) array of the global azimuthal angles of the directions
+        alpha: (K,) array of the global angles of the directions from the z-axis
+    """
+
     psiValues = np.linspace(0, 2*np.pi, 20)
-    
-    bpy.ops.curve.primitive_bezier_curve_add(enter_editmode=True)
-    bpy.ops.curve.subdivide(number_cuts=len(psiValues))
-
-    # Cache a reference to the curve.
-    curve = bpy.context.active_object
-
-    # Locate the array of bezier points.
-    bez_points = curve.data.splines[0].bezier_points
-    
-    for i in range(len(psiValues)):
-        
-        psi = psiValues[i]
-
-        x, y, z = getXYZ(psi, alpha, chi)
-        
-        bpy.ops.mesh.primitive_cone_add(location=(x, y, z))
-                        
-        theCone = bpy.data.objects.get('Cone')
-        theCone.name = f'Cone({psiValues[i]})'
-        theCone.data.materials.append(theMaterial)
-
-        bpy.ops.transform.rotate(value=alpha, orient_axis='Y')
-        bpy.ops.transform.rotate(value=chi, orient_axis='Z')
-    
-
-
-def drawTube(chi, alpha, theMaterial):
-    
-    """ The chi is the global azimuthal angles; the alpha is the global angles from the z-axis. """
-    
-    psiValues = np.linspace(0, 2*np.pi, 100)
-    
-    bpy.ops.curve.primitive_bezier_curve_add(enter_editmode=True)
-    
-    bpy.ops.curve.subdivide(number_cuts=len(psiValues))
-
-    # Cache a reference to the curve.
-    curve = bpy.context.active_object
-
-    # Locate the array of bezier points.
-    bez_points = curve.data.splines[0].bezier_points
-
-    for i in range(len(psiValues)):
-        
-#        print(i, len(psiValues), end='\r')
-        
-        psi = psiValues[i]
-
-        x, y, z = getXYZ(psi, alpha, chi)
-        
-        bez_points[i].co.x = x
-        bez_points[i].co.y = y
-        bez_points[i].co.z = z
-        
-        xL, yL, zL = getXYZ(psi-0.01, alpha, chi)
-        
-        bez_points[i].handle_left.x = xL
-        bez_points[i].handle_left.y = yL
-        bez_points[i].handle_left.z = zL
-        
-        # Solves bug, from https://developer.blender.org/T40978
-        bez_points[i].select_left_handle = False
-        bez_points[i].select_right_handle = True
-        
-        xR, yR, zR = getXYZ(psi+0.01, alpha, chi)
-        
-        bez_points[i].handle_right.x = xR
-        bez_points[i].handle_right.y = yR
-        bez_points[i].handle_right.z = zR
-                
-    bpy.context.object.data.bevel_object = bpy.data.objects["BezierCircle"]
-        
+
+    points, _, directions = cached(getPreimages)(chi, alpha, psiValues, **parameters)
+
+    # Every cone along a preimage points in the same direction, and is coloured according to its m_x
+    directions = np.repeat(directions, len(psiValues), axis=0)
+    colours = applyColourMap(directions[:, 0], lut, vmin=-1, vmax=1)
+
+    createGlyphField('PreimageCones', points.reshape(-1, 3), directions, colours, material=getAttributeMaterial())
+
+
+def drawTubes(chi, alpha, materials):
+
+    """ Draw the preimages of all of the given directions as tubes, each a spline of a single curve object.
+
+    Args:
+        chi: (K,) array of the global azimuthal angles of the directions
+        alpha: (K,) array of the global angles of the directions from the z-axis
+        materials: List of K materials, one for each preimage
+    """
+
+    # The preimage is a closed loop, so the point at psi = 2 pi is not repeated
+    psiValues = np.linspace(0, 2*np.pi, 100, endpoint=False)
+
+    # All points on all preimages, and the tangents along which their handles lie, at once
+    points, tangents, _ = cached(getPreimages)(chi, alpha, psiValues, **parameters)
+
+    createBezierCurve('Preimages', points, tangents, spacing=psiValues[1] - psiValues[0], cyclic=True,
+                      bevelObject=bpy.data.objects["BezierCircle"], material=materials)
+
+
+def drawTubesFromField(chi, alpha, materials, size=100):
+
+    """ As drawTubes(), but with the preimages extracted numerically from the magnetization sampled on a grid (as would be
+    the case for e.g. a simulation loaded from an OVF file), rather than from the analytic expressions.
+
+    Args:
+        chi: (K,) array of the global azimuthal angles of the directions
+        alpha: (K,) array of the global angles of the directions from the z-axis
+        materials: List of K materials, one for each preimage
+        size: Number of grid points along x and y (half as many are used along z)
+    """
+
+    L, R, w = parameters['L'], parameters['R'], parameters['w']
+
+    X = np.linspace(-1.6*L, 1.6*L, size)
+    Z = np.linspace(-0.8*L, 0.8*L, size // 2)
+    x, y, z = np.meshgrid(X, X, Z, indexing='ij')
+
+    # The analytic preimages (getXYZ()) are those of the ring whose helicity does not wind around it, so the same texture is sampled here
+    mArray, _ = cached(hopfionTube)(x, y, z, L, R, w, m=parameters['m'], eta=parameters['eta'], hopf_index=0)
+
+    points, tangents, cyclic, splineMaterials = [], [], [], []
+
+    for c, a, material in zip(chi, alpha, materials):
+
+        direction = [np.sin(a) * np.cos(c), np.sin(a) * np.sin(c), np.cos(a)]
+        polylines, closed = extractPreimage(mArray, direction, origin=(X[0], X[0], Z[0]), cellSize=(X[1] - X[0], X[1] - X[0], Z[1] - Z[0]))
+
+        for polyline, isClosed in zip(polylines, closed):
+
+            # Central differences along the polyline (with respect to the index of the points) give the tangents
+            if isClosed:
+                tangent = (np.roll(polyline, -1, axis=0) - np.roll(polyline, 1, axis=0)) / 2
+            else:
+                tangent = np.gradient(polyline, axis=0)
+
+            points.append(polyline)
+            tangents.append(tangent)
+            cyclic.append(isClosed)
+            splineMaterials.append(material)
+
+    createBezierCurve('Preimages', points, tangents, spacing=1, cyclic=cyclic,
+                      bevelObject=bpy.data.objects["BezierCircle"], material=splineMaterials)
+
 
 if __name__ == "__main__":
-    
-    clear()
-    
-    chi = np.pi/2
-    alpha = np.pi
-    
-    theMaterial = getMaterial(chi, alpha)
-    drawCones(chi, alpha, theMaterial)
-    drawTube(chi, alpha, theMaterial)
-    
-    chi = 0
-    alpha = np.pi / 4
-    
-    theMaterial = getMaterial(chi, alpha)
-    drawCones(chi, alpha, theMaterial)
-    drawTube(chi, alpha, theMaterial)
\ No newline at end of file
+
+    # The Bezier circle is kept, as it gives the cross-section of the tubes
+    clear(keep=('Camera', 'Light', 'BezierCircle'))
+
+    # Directions whose preimages are drawn
+    chi = np.array([np.pi/2, 0])
+    alpha = np.array([np.pi, np.pi / 4])
+
+    materials = [getMaterial(c, a) for c, a in zip(chi, alpha)]
+    drawCones(chi, alpha)
+
+    # Whether the tubes are found from the magnetization sampled on a grid, rather than from the analytic expressions
+    fromField = False
+
+    if fromField:
+        drawTubesFromField(chi, alpha, materials)
+    else:
+        drawTubes(chi, alpha, materials)
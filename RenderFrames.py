@@ -0,0 +1,264 @@
+###########################################################
+# Render the frames of an animation across many processes #
+###########################################################
+
+# Rendering an animation (e.g. from AnimateFromMumax.py) with blender -a goes through the frames one after the other in a
+# single process. Here the frame range is split into chunks, each rendered by its own headless Blender process
+# (blender -b scene.blend -s first -e last -a), with a fixed number of processes running at once and a fixed number of
+# render threads each, so that a many-core machine can be filled with e.g. 8 processes of 8 threads. Progress is shown
+# by watching the output files appear. Frames which are missing once all of the processes have finished (e.g. because a
+# process crashed) are rendered again, and the finished image sequence can then be encoded to a video with ffmpeg.
+# Run with e.g.
+#
+#     python RenderFrames.py scene.blend --workers 8 --threads 8 --video animation.mp4
+#
+# Movie output formats are replaced by PNG, as each process writes its own files.
+
+import os
+import sys
+import json
+import math
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+from farm import blenderCommand, runCommands
+
+# Run within Blender to find the frame range, frame rate and output path of each frame, after applying any overrides
+QUERY = '''
+import sys, json, bpy
+scene = bpy.context.scene
+output, start, end, step = sys.argv[sys.argv.index('--') + 1:]
+if output:
+    scene.render.filepath = output
+start = int(start) if start else scene.frame_start
+end = int(end) if end else scene.frame_end
+step = int(step) if step else scene.frame_step
+movie = scene.render.is_movie_format
+if movie:
+    scene.render.image_settings.file_format = 'PNG'
+print('RENDER_INFO ' + json.dumps({
+    'fps': scene.render.fps / scene.render.fps_base,
+    'movie': movie,
+    'frames': list(range(start, end + 1, step)),
+    'paths': [scene.render.frame_path(frame=frame) for frame in range(start, end + 1, step)],
+}))
+'''
+
+
+def getRenderInfo(blendFile, output=None, start=None, end=None, step=None, blender=None):
+
+    """ Ask Blender for the frames to be rendered and where each of them is written.
+
+    Args:
+        blendFile: The .blend file
+        output: Output path (as for blender -o, e.g. '//frames/####'), or None for that set in the file
+        start, end, step: Frame range and step, or None for those set in the file
+        blender: Path to the Blender executable (found automatically by default)
+
+    Returns:
+        Dictionary of 'fps', 'movie' (whether the file is set to a movie format), 'frames' and 'paths' (of each frame)
+    """
+
+    arguments = ['--python-expr', QUERY]
+    scriptArguments = ['' if value is None else value for value in (output, start, end, step)]
+
+    result = subprocess.run(blenderCommand(blendFile, arguments, scriptArguments, blender=blender), capture_output=True, text=True)
+
+    for line in result.stdout.splitlines():
+        if line.startswith('RENDER_INFO '):
+            return json.loads(line[len('RENDER_INFO '):])
+
+    raise RuntimeError(f'Could not read the render settings of {blendFile}:\n{result.stdout}{result.stderr}')
+
+
+def getFrameChunks(frames, step, chunkSize):
+
+    """ Split a sorted list of frames into runs of consecutive frames (i.e. step apart), of at most chunkSize frames each.
+
+    Returns:
+        List of (first, last) frames of each chunk
+    """
+
+    chunks = []
+
+    for frame in frames:
+        if chunks and frame == chunks[-1][1] + step and (frame - chunks[-1][0]) // step < chunkSize:
+            chunks[-1][1] = frame
+        else:
+            chunks.append([frame, frame])
+
+    return [tuple(chunk) for chunk in chunks]
+
+
+def renderFrames(blendFile, workers, threads, chunkSize=None, output=None, start=None, end=None, step=None, retries=2, resume=False, logDirectory=None, blender=None, interval=5):
+
+    """ Render the frames of an animation on a pool of headless Blender processes, rendering any missing frames again.
+
+    Args:
+        blendFile: The .blend file
+        workers: Number of Blender processes run at once
+        threads: Number of render threads per Blender process
+        chunkSize: Number of frames rendered by each process (by default, enough for about four processes per worker, to balance the load)
+        output, start, end, step: Overrides of the output path and frame range (see getRenderInfo())
+        retries: Number of times missing frames are rendered again
+        resume: Whether frames which already exist are kept rather than rendered again
+        logDirectory: Directory to which the output of each process is written (a temporary directory by default)
+        blender: Path to the Blender executable (found automatically by default)
+        interval: Time in seconds between checks of the progress
+
+    Returns:
+        The render information from getRenderInfo(), and the list of frames which could not be rendered
+    """
+
+    info = getRenderInfo(blendFile, output, start, end, step, blender)
+    paths = dict(zip(info['frames'], info['paths']))
+    step = info['frames'][1] - info['frames'][0] if len(info['frames']) > 1 else 1
+
+    logDirectory = logDirectory or tempfile.mkdtemp(prefix='render')
+    os.makedirs(logDirectory, exist_ok=True)
+
+    # Only files written since the render started count as rendered (unless resuming), so that old renders are not mistaken for new ones
+    startTime = 0 if resume else _now(logDirectory)
+
+    def isRendered(frame):
+        return os.path.exists(paths[frame]) and os.path.getmtime(paths[frame]) >= startTime
+
+    for attempt in range(retries + 1):
+
+        missing = [frame for frame in info['frames'] if not isRendered(frame)]
+
+        if not missing:
+            break
+
+        if attempt > 0:
+            print(f'Rendering {len(missing)} missing frames again (retry {attempt} of {retries})')
+
+        size = chunkSize or max(1, math.ceil(len(missing) / (4 * workers)))
+        chunks = getFrameChunks(missing, step, size)
+
+        arguments = ['-F', 'PNG'] if info['movie'] else []
+
+        if output is not None:
+            arguments = ['-o', output] + arguments
+
+        commands = [blenderCommand(blendFile, arguments + ['-s', first, '-e', last, '-j', step, '-a'], blender=blender, threads=threads) for first, last in chunks]
+        logs = [os.path.join(logDirectory, f'frames{first}-{last}_attempt{attempt}.log') for first, last in chunks]
+
+        print(f'Rendering {len(missing)} frames in {len(chunks)} chunks on {workers} workers of {threads} threads (logs in {logDirectory})')
+
+        # Progress is printed from another thread while the processes run
+        finished = threading.Event()
+        monitor = threading.Thread(target=_watchProgress, args=(missing, isRendered, finished, interval))
+        monitor.start()
+
+        try:
+            returnCodes = runCommands(commands, workers, logs)
+        finally:
+            finished.set()
+            monitor.join()
+
+        for (first, last), returnCode, log in zip(chunks, returnCodes, logs):
+            if returnCode != 0:
+                print(f'Frames {first} to {last} failed; see {log}')
+
+    failed = [frame for frame in info['frames'] if not isRendered(frame)]
+
+    return info, failed
+
+
+def encodeVideo(info, videoPath, ffmpeg=None):
+
+    """ Encode the rendered frames (in order) to a video with ffmpeg, returning its return code. """
+
+    ffmpeg = ffmpeg or shutil.which('ffmpeg')
+
+    if ffmpeg is None:
+        raise FileNotFoundError('Could not find ffmpeg, which is needed to encode the video')
+
+    # ffmpeg's concat demuxer takes the frames from a list, so they need not follow a numbering pattern
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        for path in info['paths']:
+            f.write(f"file '{os.path.abspath(path)}'\nduration {1 / info['fps']}\n")
+        listPath = f.name
+
+    try:
+        command = [ffmpeg, '-y', '-f', 'concat', '-safe', '0', '-i', listPath, '-r', str(info['fps']), '-pix_fmt', 'yuv420p', videoPath]
+        return subprocess.run(command).returncode
+    finally:
+        os.remove(listPath)
+
+
+def _watchProgress(frames, isRendered, finished, interval):
+
+    """ Print how many of the frames have been rendered whenever it changes, until finished is set. """
+
+    done = -1
+
+    while True:
+
+        stop = finished.wait(interval)
+        count = sum(isRendered(frame) for frame in frames)
+
+        if count != done:
+            done = count
+            print(f'[{done:>{len(str(len(frames)))}}/{len(frames)}] frames rendered', flush=True)
+
+        if stop:
+            return
+
+
+def _now(directory):
+
+    """ The current time according to the file system (which may differ from the clock of this machine, e.g. on a network drive). """
+
+    with tempfile.NamedTemporaryFile(dir=directory) as f:
+        return os.path.getmtime(f.name)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Render the frames of an animation on a pool of headless Blender processes')
+    parser.add_argument('blend', help='The .blend file to render')
+    parser.add_argument('--workers', type=int, default=None, help='Number of Blender processes run at once (by default, the number of cores divided by the threads)')
+    parser.add_argument('--threads', type=int, default=None, help='Number of render threads per Blender process (by default, the number of cores divided by the workers)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='Number of frames rendered by each process')
+    parser.add_argument('--output', default=None, help="Output path, as for blender -o (e.g. '//frames/####'; that set in the file by default)")
+    parser.add_argument('--start', type=int, default=None, help='First frame (that set in the file by default)')
+    parser.add_argument('--end', type=int, default=None, help='Last frame (that set in the file by default)')
+    parser.add_argument('--step', type=int, default=None, help='Step between frames (that set in the file by default)')
+    parser.add_argument('--retries', type=int, default=2, help='Number of times missing frames are rendered again')
+    parser.add_argument('--resume', action='store_true', help='Keep frames which have already been rendered')
+    parser.add_argument('--logs', default=None, help='Directory to which the output of each process is written')
+    parser.add_argument('--video', default=None, help='Encode the frames to this video file with ffmpeg once they are all rendered')
+    parser.add_argument('--blender', default=None, help='Path to the Blender executable (found automatically by default)')
+    args = parser.parse_args()
+
+    cores = os.cpu_count()
+
+    # By default, a few processes share out the cores between them
+    if args.workers is None and args.threads is None:
+        args.workers = max(1, cores // 4)
+
+    workers = args.workers or max(1, cores // args.threads)
+    threads = args.threads or max(1, cores // workers)
+
+    # Relative output paths are taken relative to this directory, rather than to the directory in which Blender runs
+    # (keeping any trailing separator, which tells Blender that the output path is a directory)
+    output = args.output
+
+    if output is not None and not output.startswith('//'):
+        output = os.path.abspath(output) + (os.sep if output.endswith(('/', os.sep)) else '')
+
+    info, failed = renderFrames(args.blend, workers, threads, args.chunk_size, output, args.start, args.end, args.step, args.retries, args.resume, args.logs, args.blender)
+
+    if failed:
+        print(f'{len(failed)} frames could not be rendered: {", ".join(str(frame) for frame in failed)}')
+        sys.exit(1)
+
+    print(f'Rendered {len(info["frames"])} frames, from {info["paths"][0]} to {info["paths"][-1]}')
+
+    if args.video is not None:
+        sys.exit(encodeVideo(info, args.video))
@@ -5,179 +5,84 @@
 
 import bpy
 import numpy as np
-import matplotlib.cm
+from utils import parameter
+from glyphs import createGlyphField, getAttributeMaterial
+from vectors import applyColourMap
+from colourmaps import getColourMap
+from textures import hopfionTube, getTubeMask
+from sampling import getWeights, sampleGrid
+from hopf import hopfIndex
+from ovf import writeOVF
+from cache import cached
+from profiling import Profiler
 
 
-def transform_to_origin(x, y, L):
+L = parameter('L', 20)             # Skyrmion tube major radius (of "doughnut hole")
+R = parameter('R', 5)              # Skyrmion tube minor radius
+w = parameter('w', 2)              # Skyrmion domain wall width
+m = parameter('m', 1)              # Vorticity
+eta = parameter('eta', np.pi / 2)  # Helicity at psi = 0
+hopf_index = parameter('hopf_index', 1)
 
-    """
-    For a given skyrmion slice of the doughnut, we would like to transform to the origin, which makes it simpler to create the skyrmion texture.
 
-    We first translate the coordinates to the origin, then rotate them into the x-z plane.
+# Set the color map, tabulated so that all of the cones can be coloured at once
+lut = getColourMap('hsv')
 
-    As z is invariant under this transformation, we don't need to take it as a parameter.
+# Nothing is cleared from previous runs: the cones (identified by their indices in the grid) are updated in place by createGlyphField()
 
-    Args:
-        x: Global x-position
-        y: Global y-position
-        z: Global z-position
-        L: Skyrmion tube ("doughnut") radius
+sideLength = parameter('sideLength', 50)                       # x- and y-extent of the system
+height = parameter('height', 10)                               # z-extent of the system
+distanceBetweenPoints = parameter('distanceBetweenPoints', 2)  # Distance between grid points (higher means fewer cones but faster run)
+glyphBudget = parameter('glyphBudget', 20000)                  # Largest number of cones drawn, placed more densely where the magnetization changes quickly (None for all grid points)
+profilePath = parameter('profilePath', None)                   # JSON file to which the time spent on each stage is written (as well as being printed), or None
+exportPath = parameter('exportPath', None)                     # OVF file to which the magnetization is written (e.g. as an initial state for MuMax), or None
+unitLength = parameter('unitLength', 1e-9)                     # Length in metres of one unit of the grid, for the exported file
 
-    Returns:
-        x, y in the transformed system
+profiler = Profiler()
 
-    """
-
-    # The angle around the "doughnut" when viewed from above, i.e. to the global x-axis
-    psi = np.arctan2(y, x)
-
-    # We translate the skyrmion from the ring to the origin (xPrime, yPrime), then rotate it so that the texture lies in the x-z plane (xDoublePrime)
-    xPrime = x - L * np.cos(psi)
-    yPrime = y - L * np.sin(psi)
-    xDoublePrime = xPrime * np.cos(psi) + yPrime * np.sin(psi)
+X = np.linspace(-sideLength, sideLength, int(sideLength / distanceBetweenPoints), dtype=np.float64)
+Y = np.linspace(-sideLength, sideLength, int(sideLength / distanceBetweenPoints), dtype=np.float64)
+Z = np.linspace(-height, height, int(height / distanceBetweenPoints), dtype=np.float64)
 
-    return xDoublePrime, yPrime
+# The magnetization everywhere (which is also needed for the Hopf index at the end)
+with profiler.stage('texture'):
+    x, y, z = np.meshgrid(X, Y, Z, indexing='ij')
+    mArray, helicity = cached(hopfionTube)(x, y, z, L, R, w, m, eta, hopf_index)  # (Only recomputed if the parameters have changed since a previous run)
 
+# Positions of the cones: only points within the tube, with a quadrant cut out for visibility of the skyrmion texture, and
+# of those at most glyphBudget, chosen more densely where the magnetization changes quickly
+with profiler.stage('sampling'):
+    chosen = sampleGrid(getWeights(mArray, (X[1] - X[0], Y[1] - Y[0], Z[1] - Z[0])), glyphBudget, mask=getTubeMask(X, Y, Z, L, R, cutQuadrant=True))
+    positions = np.stack([x[chosen], y[chosen], z[chosen]], axis=-1)
 
-def get_helicity(x, y, eta, hopf_index):
-    
-    """
-    Get the helicity of the spins at a given point in space.
-    
-    Args:
-        x, y: Position in global coordinates
-        eta: Helicity at phi = 0
-        hopf_index: Self-explanatory
-        
-    Returns:
-        The helicity
-        
-    """
-    
-    psi = np.arctan2(y, x)
-    
-    return eta + hopf_index * psi
+    # Cones pointing along the magnetization
+    directions = mArray[chosen]
+    helicity = helicity[chosen]
 
+# Get the RGBA values from the tabulated colour map, with the helicity wrapped around to be between -pi and pi
+with profiler.stage('colours'):
+    colours = applyColourMap(helicity, lut, vmin=-np.pi, vmax=np.pi, periodic=True)
 
-L = 20           # Skyrmion tube major radius (of "doughnut hole")
-R = 5            # Skyrmion tube minor radius
-w = 2            # Skyrmion domain wall width
-m = 1            # Vorticity
-eta = np.pi / 2  # Helicity at psi = 0
-hopf_index = 1
+with profiler.stage('material'):
+    material = getAttributeMaterial()
 
+# Draw all of the cones as instances on a single point cloud, sharing one material
+with profiler.stage('glyphs'):
+    createGlyphField('Cones', positions, directions, colours, vertices=100, material=material, ids=np.flatnonzero(chosen))
 
-# Set the color map and normalisation
-cmap = matplotlib.cm.get_cmap('hsv')
-norm = matplotlib.colors.Normalize(vmin=-np.pi, vmax=np.pi)
 
-# Clear objects from previous runs
-for obj in bpy.data.objects:
-   bpy.data.objects.remove(obj)
+# Write the whole texture (x, y and z are already the first three axes of mArray, as the meshgrid is 'ij'-indexed)
+if exportPath is not None:
+    with profiler.stage('export'):
+        cellSize = unitLength * np.array([X[1] - X[0], Y[1] - Y[0], Z[1] - Z[0]])
+        writeOVF(exportPath, mArray, cellSize=cellSize, origin=unitLength * np.array([X[0], Y[0], Z[0]]) - cellSize/2)
 
-# Clear materials from pervious runs
-for mat in bpy.data.materials:
-   bpy.data.materials.remove(mat)
-   
 
-sideLength = 50            # x- and y-extent of the system
-height = 10                # z-extent of the system
-distanceBetweenPoints = 2  # Distance between cones (higher means fewer cones but faster run)
+# Calculate Hopf index as a sanity check, with the magnetization everywhere (the index is wrong if a segment is cut out)
+with profiler.stage('hopf index'):
+    print(hopfIndex(mArray))
 
-X = np.linspace(-sideLength, sideLength, int(sideLength / distanceBetweenPoints), dtype=np.float64)
-Y = np.linspace(-sideLength, sideLength, int(sideLength / distanceBetweenPoints), dtype=np.float64)
-Z = np.linspace(-height, height, int(height / distanceBetweenPoints), dtype=np.float64)
+print(profiler.summary())
 
-x, y, z = np.meshgrid(X, Y, Z)
-
-# Transform the coordinate system of the skyrmion on the ring to the origin
-xTransformed, yTransformed = transform_to_origin(x, y, L)
-
-# Radius from the centre of the skyrmion texture now at the origin
-rho = np.sqrt(xTransformed**2 + z**2)
-
-# Polar angle in the skyrmion texture
-phi = np.arctan2(z, xTransformed)
-
-# The angle around the "doughnut" when viewed from above, i.e. to the global x-axis
-psi = np.arctan2(y, x)
-
-# The helicity of the spins in the skyrmion (will just be eta around the ring if hopf_index = 0)
-helicity = get_helicity(x, y, eta, hopf_index)
-
-# Spin angle in x-z plane
-Phi = m * phi + helicity
-
-# Spin angle to y-axis
-Theta = 2 * np.arctan2(np.sinh(R/w), np.sinh(rho/w))
-
-# The magnetization components in the transformed system
-mxRotated = np.cos(Phi) * np.sin(Theta)
-myRotated = np.cos(Theta)
-mz = np.sin(Phi) * np.sin(Theta)  # (mz is unaffected by the transformation)
-
-# Transform back from the origin to its original position on the "doughnut"
-mx = mxRotated * np.cos(psi) - myRotated * np.sin(psi)
-my = mxRotated * np.sin(psi) + myRotated * np.cos(psi)
-
-# Like Phi and Theta, but now in global coordinates
-chi = np.arctan2(my, mx)
-alpha = np.arccos(mz)
-
-# For evaluating the Hopf index at the end as a sanity check
-mArray = np.zeros((len(X), len(Y), len(Z), 3), dtype=np.float64)
-mArray[:, :, :, 0] = mx
-mArray[:, :, :, 1] = my
-mArray[:, :, :, 2] = mz
-
-
-for i in range(len(X)):
-    print(i, len(X), end='\r')
-    for j in range(len(Y)):
-        for k in range(len(Z)):
-            
-            if rho[i, j, k] < 2*R:  # Get tube, rather than magnetization everywhere
-                
-                if not (x[i, j, k] > 1 and y[i, j, k] > 1):  # Cut out a quadrant for visibility of the skyrmion texture
-                
-                    # Create a cone at position x, y, z, which initially points along +z
-                    bpy.ops.mesh.primitive_cone_add(vertices=100, location=(x[i, j, k], y[i, j, k], z[i, j, k]))
-
-                    # Name the cone so that we can easily select it
-                    theCone = bpy.data.objects.get('Cone')
-                    theCone.name = f'Cone({i},{j},{k})'
-                    theCone.rotation_mode = 'AXIS_ANGLE'
-                    
-                    # Create a material with the same name as the cone, and attach it to the cone
-                    newMat = bpy.data.materials.new(name=f'Cone({i},{j},{k})')
-                    newMat.use_nodes = True
-                    theCone.data.materials.append(newMat)                    
-
-                    # Perform the rotation of the cone
-                    bpy.ops.transform.rotate(value=alpha[i, j, k], orient_axis='Y')
-                    bpy.ops.transform.rotate(value=chi[i, j, k], orient_axis='Z')
-
-                    # Make helicity be between -pi and pi for colouring
-                    while helicity[i, j, k] > np.pi:
-                        helicity[i, j, k] -= 2 * np.pi
-                        
-                    while helicity[i, j, k] < -np.pi:
-                        helicity[i, j, k] += 2 * np.pi
-                    
-                    # Get the RGBA value from the matplotlib colour map
-                    r, g, b, alphaValue = cmap(norm(helicity[i, j, k]))
-                    
-                    # Set the colour of the cone
-                    bpy.data.materials[f'Cone({i},{j},{k})'].node_tree.nodes[0].inputs['Base Color'].default_value = [r, g, b, alphaValue]
-                    bpy.data.materials[f'Cone({i},{j},{k})'].node_tree.nodes[0].inputs['Alpha'].default_value = alphaValue
-
-
-# Calculate Hopf index as a sanity check (does not work if a segment has been cut out)
-mReduced = mArray[:-1, :-1, :-1]
-mdx = np.diff(mArray, axis=0)[:, :-1, :-1]
-mdy = np.diff(mArray, axis=1)[:-1, :, :-1]
-mdz = np.diff(mArray, axis=2)[:-1, :-1, :]
-
-oneLineHopfIdx = -np.sum(np.einsum('ijkl,ijkl->ijk', mReduced, np.einsum('ijk,ijkl->ijkl', np.cumsum(np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdx, mdy)), axis=1), np.cross(mdz, mdy)) + np.einsum('ijk,ijkl->ijkl', np.cumsum(np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdy, mdz)), axis=1), np.cross(mdx, mdy))))/(4*np.pi)**2
-
-print(oneLineHopfIdx)
+if profilePath is not None:
+    profiler.dump(profilePath)
@@ -1,62 +1,35 @@
 import bpy
 import numpy as np
+from glyphs import createGlyphField, getColourMapMaterial, morphGlyphField
+from spheres import sphereField, planeField, stereographicProjection
+from cache import cached
+from colourmaps import getColourMap
 
 skCol = bpy.data.collections.new("Skyrmion")
 bpy.context.scene.collection.children.link(skCol)
 sphereCol = bpy.data.collections.new("Sphere")
 bpy.context.scene.collection.children.link(sphereCol)
 
-def drawSphere(R, h, m=1, eta=np.pi/2, N=750):
+def drawSphere(R, h, m=1, eta=np.pi/2, N=84, method='deserno'):
+
+    """ Vector field on a sphere with roughly equidistant points, on which the pre-projection skyrmion is drawn.
 
-    """ Vector field on a sphere with roughly equidistanct points, on which the pre-projection skyrmion is drawn. Algorithm from https://www.cmu.edu/biolphys/deserno/pdf/sphere_equi.pdf.
-    
     Args:
         R: Radius of the sphere
         h: Height of sphere above the plane (i.e. tangent to the plane for h=0)
         m: Vorticity/skyrmion winding number
         eta: Skyrmion helicity
-        N: Higher means more points drawn
+        N: Number of points drawn (approximately, for the 'deserno' method)
+        method: How the points are spread over the sphere, either 'deserno' (on rings) or 'fibonacci' (see spheres.py)
     """
 
-    a = 4 * np.pi * R * R / (N)
-    d = np.sqrt(a)
-    M_theta = int(np.round(np.pi / d))
-    d_theta = np.pi / M_theta
-    d_phi = a / d_theta
-
     for object in bpy.context.scene.collection.children['Sphere'].objects:
         bpy.data.objects.remove(object)
 
-    for i in range(M_theta):
-
-        theta = np.pi * (i + 0.5) / M_theta
-        M_phi = int(np.round(2 * np.pi * np.sin(theta) / d_phi))
-
-        for j in range(M_phi):
-
-            phi = 2 * np.pi * j / M_phi
-            Phi = m * phi + eta
-            Theta = theta
-
-            bpy.ops.mesh.primitive_cone_add(location=(R*np.cos(phi)*np.sin(theta), R*np.sin(phi)*np.sin(theta), R + h + R*np.cos(theta)))
-
-            bpy.ops.transform.rotate(value=theta, orient_axis='Y')
-            bpy.ops.transform.rotate(value=Phi, orient_axis='Z')
-
-            cone = bpy.context.active_object
-            bpy.data.collections['Sphere'].objects.link(cone)
-
-            try:
-                bpy.data.scenes['Scene'].collection.objects.unlink(cone)
-            except RuntimeError:
-                pass
-
-            bpy.ops.transform.resize(value=(0.1*R, 0.1*R, 0.1*R))
-            bpy.ops.object.shade_smooth()
+    positions, directions = cached(sphereField)(R, h, m, eta, N, method)
 
-            normalisedTheta = (np.cos(theta) + 1) / 2
-            theMaterial = createMaterial("theta" + str(Theta) + "phi" + str(Phi), normalisedTheta)
-            bpy.context.active_object.data.materials.append(theMaterial)
+    # All of the cones share a single material, coloured according to the z-component of their direction
+    createGlyphField('SphereCones', positions, directions, values=directions[:, 2], scale=0.1*R, material=getBlueWhiteRedMaterial(), collection=bpy.data.collections['Sphere'])
 
 
 def middleSphere(R, h):
@@ -86,9 +59,8 @@ def middleSphere(R, h):
 
     # Add middle colour value (effectively creating our own colour map)
     rampNode.color_ramp.elements.new(position=0.5)
-    rampNode.color_ramp.elements[0].color = (0, 0, 1, 1)
-    rampNode.color_ramp.elements[1].color = (1, 1, 1, 1)
-    rampNode.color_ramp.elements[2].color = (1, 0, 0, 1)
+    for element, colour in zip(rampNode.color_ramp.elements, getColourMap('bwr', N=3)):
+        element.color = colour
 
     # Add gradient node and colours
     gradientNode = nodes.new("ShaderNodeTexGradient")
@@ -121,88 +93,57 @@ def skyrmionFromSphere(R, h, x, y, m=1, eta=np.pi/2):
     for object in bpy.context.scene.collection.children['Skyrmion'].objects:
         bpy.data.objects.remove(object)
 
-    for i in range(len(x)):
+    X, Y = np.meshgrid(x, y, indexing='ij')
 
-        for j in range(len(y)):
+    # To make the skyrmion texture circular rather than square
+    inside = np.sqrt(X**2 + Y**2) < np.max(x)
 
-            # X, Y in the plane
-            X =  x[i]
-            Y = y[j]
+    positions = np.stack([X[inside], Y[inside], np.zeros(np.count_nonzero(inside))], axis=-1)
+    directions = cached(planeField)(R, h, X[inside], Y[inside], m, eta)
 
-            if np.sqrt(X**2 + Y**2) < np.max(x):  # To make the skyrmion texture circular rather than square
+    createGlyphField('SkyrmionCones', positions, directions, values=directions[:, 2], scale=0.25*R, material=getBlueWhiteRedMaterial(), collection=bpy.data.collections['Skyrmion'])
 
-                # Spherical polars in the plane
-                phi = np.arctan2(Y, X)
-                r = np.sqrt(X**2 + Y**2)
 
-                # Angle between corresponding point on sphere and vertical
-                alpha = np.arctan(r/(h+2*R))
+def animateProjection(R, h, m=1, eta=np.pi/2, N=20000, method='fibonacci', rMax=10, startFrame=1, endFrame=200):
 
-                theta = np.pi - 2*alpha
+    """ Animate the cones on the sphere moving onto the plane, each along the line from the top of the sphere through it.
 
-                Phi = m * phi + eta
-                Theta = theta
+    The projection is worked out once, and stored as a single shape key of the cones' point cloud. The cones only move,
+    as for any height h of the sphere, the magnetization at a projected point is the same as at the point on the sphere
+    (a line from the top of the sphere at an angle alpha to the vertical meets the sphere at the polar angle pi - 2*alpha,
+    which is the polar angle of the magnetization in both sphereField() and planeField()).
 
-                bpy.ops.mesh.primitive_cone_add(location=(X, Y, 0))
-
-                bpy.ops.transform.rotate(value=theta, orient_axis='Y')
-                bpy.ops.transform.rotate(value=Phi, orient_axis='Z')
-
-                cone = bpy.context.active_object
-                bpy.data.collections['Skyrmion'].objects.link(cone)
-
-                try:
-                    bpy.data.scenes['Scene'].collection.objects.unlink(cone)
-                except RuntimeError:
-                    pass
-
-                bpy.ops.transform.resize(value=(0.25*R, 0.25*R, 0.25*R))
-                bpy.ops.object.shade_smooth()
-
-                normalisedTheta = (np.cos(theta) + 1) / 2
-                theMaterial = createMaterial("theta" + str(Theta) + "phi" + str(Phi), normalisedTheta)
-                bpy.context.active_object.data.materials.append(theMaterial)
-
-
-def createMaterial(theName, theValue):
-
-    """ Create a material given the value (i.e. defining our own colour map).
     Args:
-        theName: The desiered name of the material
-        theValue: The value which determines the colour used 
+        R: Radius of the sphere
+        h: Height of sphere above the plane (i.e. tangent to the plane for h=0)
+        m: Vorticity/skyrmion winding number
+        eta: Skyrmion helicity
+        N: Number of cones (approximately, for the 'deserno' method), before those projected beyond rMax are removed
+        method: How the points are spread over the sphere, either 'fibonacci' or 'deserno' (see spheres.py)
+        rMax: Cones projected further than this from the origin (i.e. those near the top of the sphere) are not drawn
+        startFrame: Frame at which the cones leave the sphere
+        endFrame: Frame at which the cones reach the plane
     """
 
-    mat = bpy.data.materials.new(name=theName)
-    mat.use_nodes = True
+    for object in bpy.context.scene.collection.children['Sphere'].objects:
+        bpy.data.objects.remove(object)
 
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
+    positions, directions = cached(sphereField)(R, h, m, eta, N, method)
+    projected = stereographicProjection(positions, R, h)
 
-    # Shader already has Principled BSDF and MaterialOutput nodes
-    psNode = nodes.get('Principled BSDF')
-    psNode.inputs['Metallic'].default_value = 0
+    onPlane = np.linalg.norm(projected, axis=-1) < rMax
 
-    # Add ramp node and colours
-    rampNode = nodes.new("ShaderNodeValToRGB")
-    rampNode.location.x -= 400  # Easier to see in shader editor when they're not stacked on top of each other
+    cones = createGlyphField('MorphCones', positions[onPlane], directions[onPlane], values=directions[onPlane, 2], scale=0.1*R, material=getBlueWhiteRedMaterial(), collection=bpy.data.collections['Sphere'])
+    morphGlyphField(cones, projected[onPlane], startFrame, endFrame)
 
-    # Add middle colour value
-    rampNode.color_ramp.elements.new(position=0.5)
-    rampNode.color_ramp.elements[0].color = (0, 0, 1, 1)
-    rampNode.color_ramp.elements[1].color = (1, 1, 1, 1)
-    rampNode.color_ramp.elements[2].color = (1, 0, 0, 1)
 
-    valueNode = nodes.new("ShaderNodeValue")
-    valueNode.location.x -= 600
+def getBlueWhiteRedMaterial():
 
-    # Set value node to our required value depending on e.g. angle
-    valueNode.outputs["Value"].default_value = theValue
+    """ Get the material shared by all of the cones, which colours them according to cos(theta), where theta is the angle of the cone to the z-axis (with matplotlib's blue-white-red 'bwr' colour map). """
 
-    # Link the nodes together
-    links.new(valueNode.outputs["Value"], rampNode.inputs["Fac"])
-    links.new(rampNode.outputs["Color"], psNode.inputs["Base Color"])
+    colours = getColourMap('bwr', N=3)
 
-    return mat
+    return getColourMapMaterial('BlueWhiteRed', colours, vmin=-1, vmax=1)
 
 
 # Delete the initial cube
@@ -219,11 +160,18 @@ h = 5
 L = 10
 numPoints = 25
 
-drawSphere(R, h)
-middleSphere(R, h)
+# Whether to animate the cones moving from the sphere onto the plane, rather than drawing both separately
+animate = False
+
+if animate:
+    animateProjection(R, h, rMax=L)
+
+else:
+    drawSphere(R, h)
+    middleSphere(R, h)
 
-x = np.linspace(-L, L, numPoints)
-y = np.linspace(-L, L, numPoints)
-skyrmionFromSphere(1, 0.5, x, y)
+    x = np.linspace(-L, L, numPoints)
+    y = np.linspace(-L, L, numPoints)
+    skyrmionFromSphere(1, 0.5, x, y)
 
 #bpy.ops.wm.save_as_mainfile(filepath=bpy.data.filepath + "built")
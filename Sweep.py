@@ -0,0 +1,142 @@
+#########################################################
+# Build (and render) a script over a grid of parameters #
+#########################################################
+
+# Runs one of the scripts (e.g. SkyrmionTube.py) for every combination of the given parameter values, without the GUI.
+# The jobs are shared out between a pool of Blender processes (one per core by default), each of which starts once and
+# then runs its jobs one after the other with SweepWorker.py, reopening the base .blend file (with the camera, lights
+# etc. already set up) for each job, so Blender's startup time is only paid once per worker. The scripts read their
+# parameters with utils.parameter(). Run with e.g.
+#
+#     python Sweep.py SkyrmionTube.py --base scene.blend --output sweep --param eta=0,1.5708 --param hopf_index=1,2,3 --render
+#
+# which saves (and renders) sweep/SkyrmionTube_eta=0_hopf_index=1.blend etc.
+
+import os
+import sys
+import ast
+import json
+import argparse
+import itertools
+
+from farm import blenderCommand, runCommands
+
+
+def parseParameter(argument):
+
+    """ Split a name=value1,value2,... argument into the name and the list of values (read as Python literals where possible).
+
+    Only the commas outside of brackets and quotes separate the values, so that values can themselves be lists, tuples
+    etc., e.g. zSlices=[0,1],[2,3] gives the two values [0, 1] and [2, 3].
+    """
+
+    name, _, values = argument.partition('=')
+
+    def parseValue(value):
+        try:
+            return ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+
+    return name, [parseValue(value) for value in _splitValues(values)]
+
+
+def _splitValues(values):
+
+    """ Split a string at the commas which are not within brackets or quotes. """
+
+    parts = ['']
+    depth = 0
+    quote = None
+
+    for char in values:
+
+        if quote is not None:
+            quote = None if char == quote else quote
+        elif char in '\'"':
+            quote = char
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append('')
+            continue
+
+        parts[-1] += char
+
+    return parts
+
+
+def getJobs(script, parameters):
+
+    """ One job for every combination of the parameter values.
+
+    Args:
+        script: Path to the script being run
+        parameters: List of (name, values) pairs
+
+    Returns:
+        List of dictionaries, each with the name of the job (from the script and its parameter values) and its parameters
+    """
+
+    stem = os.path.splitext(os.path.basename(script))[0]
+    names = [name for name, _ in parameters]
+
+    jobs = []
+
+    for values in itertools.product(*[values for _, values in parameters]):
+        jobName = '_'.join([stem] + [f'{name}={value}' for name, value in zip(names, values)])
+        jobs.append({'name': jobName, 'parameters': dict(zip(names, values))})
+
+    return jobs
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Run a script in headless Blender over a grid of parameter values')
+    parser.add_argument('script', help='The script to run, e.g. SkyrmionTube.py')
+    parser.add_argument('--base', required=True, help='The .blend file opened before each job')
+    parser.add_argument('--output', default='sweep', help='Directory in which the .blend files, renders and logs are saved')
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE1,VALUE2,...', help='Values of a parameter, which may be lists etc. (may be repeated)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of Blender processes run at once')
+    parser.add_argument('--threads', type=int, default=1, help='Number of render threads per Blender process')
+    parser.add_argument('--render', action='store_true', help='Render a still of each job, as well as saving its .blend file')
+    parser.add_argument('--blender', default=None, help='Path to the Blender executable (found automatically by default)')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+
+    jobs = getJobs(args.script, [parseParameter(argument) for argument in args.param])
+    workers = max(1, min(args.workers, len(jobs)))
+
+    commands = []
+    logs = []
+
+    for worker in range(workers):
+
+        # Each worker is given every workers-th job
+        jobFile = os.path.abspath(os.path.join(args.output, f'worker{worker}.json'))
+
+        with open(jobFile, 'w') as f:
+            json.dump({
+                'script': os.path.abspath(args.script),
+                'base': os.path.abspath(args.base),
+                'output': os.path.abspath(args.output),
+                'render': args.render,
+                'jobs': jobs[worker::workers],
+            }, f, indent=4)
+
+        workerScript = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SweepWorker.py')
+        commands.append(blenderCommand(args.base, ['--python', workerScript], [jobFile], blender=args.blender, threads=args.threads))
+        logs.append(os.path.join(args.output, f'worker{worker}.log'))
+
+    print(f'Running {len(jobs)} jobs on {workers} workers')
+
+    returnCodes = runCommands(commands, workers, logs)
+
+    for worker, returnCode in enumerate(returnCodes):
+        if returnCode != 0:
+            print(f'Worker {worker} failed; see {logs[worker]}')
+
+    sys.exit(1 if any(returnCodes) else 0)
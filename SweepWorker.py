@@ -0,0 +1,54 @@
+#################################################
+# Run a list of jobs within one Blender process #
+#################################################
+
+# Started by Sweep.py as blender -b base.blend --python SweepWorker.py -- jobs.json, this runs each of the jobs in the
+# file in turn: it reopens the base .blend file, saves it under the job's name (so that anything the script saves goes
+# there rather than over the base file), sets the parameters read by utils.parameter(), runs the script, and then saves
+# (and optionally renders) the result. A job which fails is reported, and the remaining jobs still run.
+
+import os
+import sys
+import json
+import runpy
+import traceback
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import utils
+
+with open(sys.argv[sys.argv.index('--') + 1]) as f:
+    sweep = json.load(f)
+
+failed = []
+
+for job in sweep['jobs']:
+
+    print(f'Running {job["name"]}')
+
+    output = os.path.join(sweep['output'], job['name'])
+
+    bpy.ops.wm.open_mainfile(filepath=sweep['base'])
+    bpy.ops.wm.save_as_mainfile(filepath=output + '.blend')
+
+    utils.overrides.clear()
+    utils.overrides.update(job['parameters'])
+
+    try:
+        runpy.run_path(sweep['script'], run_name='__main__')
+
+        if sweep['render']:
+            bpy.context.scene.render.filepath = output
+            bpy.ops.render.render(write_still=True)
+
+        bpy.ops.wm.save_mainfile()
+
+    except Exception:
+        traceback.print_exc()
+        failed.append(job['name'])
+
+if failed:
+    print('Failed jobs: ' + ', '.join(failed))
+
+sys.exit(1 if failed else 0)
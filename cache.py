@@ -0,0 +1,187 @@
+###################################################
+# Cache of computed fields, keyed by their inputs #
+###################################################
+
+# The analytic textures are recomputed every time a script is run, even when nothing has changed. Wrapping the function
+# which computes them with cached() stores its results on disk as .npy files, in a directory named after a hash of the
+# function (the source of its whole module, so that changes to the helpers it calls also count) and its arguments. When
+# it is next called with the same arguments, the arrays are memory-mapped from those files (read-only and without
+# copying) rather than computed; the first call returns them in the same way, so that the result behaves the same
+# whether or not it was cached. Once the cache grows beyond its maximum size, the least recently used results are
+# deleted. This only needs NumPy (not bpy).
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import tempfile
+import functools
+import numpy as np
+
+# Where results are stored, and the largest total size (in bytes) of the stored results
+CACHE_DIRECTORY = os.environ.get('BLENDERSCRIPTS_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'BlenderScripts'))
+MAX_SIZE = 2 * 2**30
+
+# Age in seconds after which a half-written result (e.g. left by a process which was killed while writing it) is deleted
+STALE_AGE = 60 * 60
+
+
+def cached(function, directory=None, maxSize=None):
+
+    """ Wrap a function returning an array (or a tuple of arrays) so that its results are cached on disk.
+
+    Args:
+        function: The function, whose arguments may be numbers, strings, arrays, or lists, tuples, dictionaries and
+            simple objects (e.g. textures.Skyrmion) made of these
+        directory: Directory in which results are stored (CACHE_DIRECTORY by default)
+        maxSize: Largest total size in bytes of the stored results (MAX_SIZE by default)
+
+    Returns:
+        The wrapped function, which returns read-only memory-mapped arrays (whether or not the result was already cached)
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+
+        cacheDirectory = directory or CACHE_DIRECTORY
+        entry = os.path.join(cacheDirectory, getKey(function, args, kwargs))
+
+        if os.path.exists(os.path.join(entry, 'meta.json')):
+
+            # Marks the result as recently used
+            os.utime(os.path.join(entry, 'meta.json'))
+
+            return _load(entry)
+
+        result = function(*args, **kwargs)
+        arrays = list(result) if isinstance(result, tuple) else [result]
+
+        if not all(isinstance(array, np.ndarray) for array in arrays):
+            raise TypeError(f'Only arrays (or tuples of arrays) can be cached, not the result of {function.__name__}')
+
+        # The result is written to a temporary directory, which is then renamed, so that a result is never read half-written
+        os.makedirs(cacheDirectory, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=cacheDirectory, prefix='.')
+
+        for idx, array in enumerate(arrays):
+            np.save(os.path.join(temporary, f'{idx}.npy'), array)
+
+        with open(os.path.join(temporary, 'meta.json'), 'w') as f:
+            json.dump({'function': function.__qualname__, 'count': len(arrays), 'tuple': isinstance(result, tuple)}, f)
+
+        try:
+            os.rename(temporary, entry)
+        except OSError:
+            shutil.rmtree(temporary)  # The same result was stored in the meantime (e.g. by another worker)
+
+        # Mapped before evicting, which may delete a result larger than the whole cache straight away
+        result = _load(entry)
+        evict(cacheDirectory, maxSize or MAX_SIZE)
+
+        return result
+
+    return wrapper
+
+
+def _load(entry):
+
+    """ Memory-map the arrays of a stored result, as an array or a tuple of arrays as returned by the function. """
+
+    with open(os.path.join(entry, 'meta.json')) as f:
+        meta = json.load(f)
+
+    arrays = [np.load(os.path.join(entry, f'{idx}.npy'), mmap_mode='r') for idx in range(meta['count'])]
+
+    return tuple(arrays) if meta['tuple'] else arrays[0]
+
+
+def getKey(function, args, kwargs):
+
+    """ Hash of the source of the function's module, the function's name and its arguments. """
+
+    digest = hashlib.sha256()
+
+    try:
+        digest.update(inspect.getsource(inspect.getmodule(function)).encode())
+    except (OSError, TypeError):
+        pass
+
+    digest.update(function.__qualname__.encode())
+    _hashValue(digest, args)
+    _hashValue(digest, kwargs)
+
+    return digest.hexdigest()
+
+
+def _hashValue(digest, value):
+
+    """ Add a value (of any of the types of argument accepted by cached()) to a hash. """
+
+    if isinstance(value, np.ndarray):
+        digest.update(f'array{value.dtype.str}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).data)
+
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            _hashValue(digest, item)
+
+    elif isinstance(value, dict):
+        digest.update(f'dict{len(value)}'.encode())
+        for key in sorted(value):
+            _hashValue(digest, key)
+            _hashValue(digest, value[key])
+
+    elif isinstance(value, (bool, int, float, complex, str, bytes, type(None), np.generic)):
+        digest.update(f'{type(value).__name__}{value!r}'.encode())
+
+    elif hasattr(value, '__dict__'):
+        digest.update(type(value).__qualname__.encode())
+        _hashValue(digest, vars(value))
+
+    else:
+        raise TypeError(f'Cannot hash argument of type {type(value).__name__}')
+
+
+def evict(directory=None, maxSize=None):
+
+    """ Delete the least recently used results until the total size of those remaining is at most maxSize, along with
+    any half-written results older than STALE_AGE.
+
+    Args:
+        directory: Directory in which results are stored (CACHE_DIRECTORY by default)
+        maxSize: Largest total size in bytes of the stored results (MAX_SIZE by default)
+    """
+
+    directory = directory or CACHE_DIRECTORY
+    maxSize = MAX_SIZE if maxSize is None else maxSize
+
+    entries = []
+
+    for name in os.listdir(directory):
+
+        # Results are written to temporary directories starting with '.' (see cached()), which are left behind if the process writing them dies
+        if name.startswith('.'):
+            if time.time() - os.path.getmtime(os.path.join(directory, name)) > STALE_AGE:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+            continue
+
+        meta = os.path.join(directory, name, 'meta.json')
+
+        if not os.path.exists(meta):
+            continue
+
+        size = sum(entry.stat().st_size for entry in os.scandir(os.path.join(directory, name)))
+        entries.append((os.path.getmtime(meta), size, name))
+
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, name in sorted(entries):
+
+        if total <= maxSize:
+            break
+
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        total -= size
@@ -0,0 +1,63 @@
+##################################
+# Colour maps without matplotlib #
+##################################
+
+# The colour maps are stored in colourmaps.json as lookup tables of 8-bit RGBA values (as matplotlib itself uses when
+# drawing images), generated from matplotlib by GenerateColourMaps.py. Importing matplotlib inside Blender takes several
+# hundred milliseconds, and only the tables are needed to colour the glyphs (with vectors.applyColourMap()), so the
+# scripts use these instead. This only needs NumPy (not bpy).
+
+import os
+import json
+import functools
+import numpy as np
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'colourmaps.json')
+
+
+@functools.lru_cache(maxsize=None)
+def _loadTables():
+
+    """ The hexadecimal strings of all of the colour maps, read from colourmaps.json once. """
+
+    with open(PATH) as f:
+        return json.load(f)
+
+
+def getColourMap(name, N=None, dtype=np.float64):
+
+    """ Get the lookup table of a colour map, to be used with vectors.applyColourMap().
+
+    Args:
+        name: Name of the colour map as in matplotlib, e.g. 'RdBu_r' (see GenerateColourMaps.COLOUR_MAPS for those available)
+        N: Number of entries, or None for the full table (256 entries for most colour maps). Tables with fewer entries
+            are interpolated from the full table (e.g. to give the stops of a colour ramp node)
+        dtype: np.uint8 for values from 0 to 255, or a floating point type for values from 0 to 1
+
+    Returns:
+        (N, 4) array of RGBA values
+    """
+
+    tables = _loadTables()
+
+    if name not in tables:
+        raise KeyError(f'Unknown colour map {name}; add it with GenerateColourMaps.py {name}')
+
+    lut = np.frombuffer(bytes.fromhex(tables[name]), dtype=np.uint8).reshape(-1, 4)
+
+    if N is not None and N != len(lut):
+        position = np.linspace(0, len(lut) - 1, N)
+        lut = np.stack([np.interp(position, np.arange(len(lut)), lut[:, channel]) for channel in range(4)], axis=-1)
+        lut = np.round(lut) if np.dtype(dtype) == np.uint8 else lut
+
+    if np.dtype(dtype) == np.uint8:
+        return lut.astype(np.uint8)
+
+    return (lut / 255).astype(dtype)
+
+
+def getColourMapNames():
+
+    """ The names of all of the colour maps available. """
+
+    return sorted(_loadTables())
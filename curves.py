@@ -0,0 +1,79 @@
+############################################
+# Draw Bezier curves from arrays of points #
+############################################
+
+# Rather than adding a curve with bpy.ops.curve.primitive_bezier_curve_add, subdividing it and then setting the
+# coordinates of the points and handles one component at a time, the curve is created directly in bpy.data with
+# exactly the required number of points, which are all written at once with foreach_set.
+
+import bpy
+import numpy as np
+
+
+def createBezierCurve(name, points, tangents, spacing, cyclic=False, bevelObject=None, material=None, collection=None):
+
+    """ Create a curve object passing through the given points, made up of one or more Bezier splines.
+
+    The curves are parametrised by some parameter t (e.g. x for a sine curve), sampled evenly with the given spacing. The handles
+    of each point are placed along the tangent dr/dt, a third of the way to the neighbouring points, which is the cubic
+    Bezier curve that best approximates the parametrised curve between the points.
+
+    Args:
+        name: Name of the created object (and its curve)
+        points: (P, 3) array of the points on a single spline, or (S, P, 3) array (or list of S arrays of any lengths) of the points on S splines
+        tangents: Derivatives dr/dt of the curves at each of the points, of the same shape as points
+        spacing: The spacing of the parameter t between neighbouring points
+        cyclic: Whether the splines are closed loops, or a list of whether each spline is
+        bevelObject: Object whose shape is swept along the curve (e.g. a Bezier circle, to draw a tube)
+        material: Material applied to the curve, or a list with one material per spline
+        collection: Collection to which the object is linked (the scene collection by default)
+
+    Returns:
+        The created object
+    """
+
+    if np.ndim(points[0]) == 1:
+        points = [points]
+        tangents = [tangents]
+
+    points = [np.asarray(splinePoints, dtype=np.float32) for splinePoints in points]
+    tangents = [np.asarray(splineTangents, dtype=np.float32) for splineTangents in tangents]
+
+    if np.ndim(cyclic) == 0:
+        cyclic = [cyclic] * len(points)
+
+    curve = bpy.data.curves.new(name, type='CURVE')
+    curve.dimensions = '3D'
+
+    if isinstance(material, bpy.types.Material):
+        material = [material]
+
+    for mat in material or []:
+        curve.materials.append(mat)
+
+    for splineIdx in range(len(points)):
+
+        spline = curve.splines.new('BEZIER')
+
+        # A new spline already has one point; the points added after it have free handles, so keep the handles we give them
+        spline.bezier_points.add(len(points[splineIdx]) - 1)
+        spline.bezier_points.foreach_set('co', points[splineIdx].ravel())
+        spline.bezier_points.foreach_set('handle_left', (points[splineIdx] - tangents[splineIdx] * spacing / 3).ravel())
+        spline.bezier_points.foreach_set('handle_right', (points[splineIdx] + tangents[splineIdx] * spacing / 3).ravel())
+        spline.use_cyclic_u = bool(cyclic[splineIdx])
+
+        if material is not None and len(material) > 1:
+            spline.material_index = splineIdx
+
+    if bevelObject is not None:
+        curve.bevel_mode = 'OBJECT'
+        curve.bevel_object = bevelObject
+
+    obj = bpy.data.objects.new(name, curve)
+
+    if collection is None:
+        collection = bpy.context.scene.collection
+
+    collection.objects.link(obj)
+
+    return obj
@@ -0,0 +1,275 @@
+###############################################
+# Export glyph fields without building scenes #
+###############################################
+
+# For figures on the web or quick previews, only the final geometry is needed, not a .blend file. These write the same
+# glyphs as glyphs.createGlyphField() straight from the arrays of positions, directions and colours: either a binary
+# glTF (.glb) file, in which the glyph mesh is stored once and instanced at every point with the EXT_mesh_gpu_instancing
+# extension (supported by e.g. three.js and Blender's glTF importer), or a binary PLY file, in which every glyph is
+# written out as triangles with per-vertex colours (for programs without instancing). The points are converted and
+# written a chunk at a time, so a million glyphs take a few seconds. These only need NumPy (not bpy).
+
+import json
+import struct
+import numpy as np
+from vectors import getQuaternions
+
+# Number of glyphs converted at a time
+CHUNK_SIZE = 2**16
+
+
+def getGlyphMesh(glyph='CONE', vertices=32):
+
+    """ The glyph drawn by glyphs.getGlyphNodeGroup(), as triangles, pointing along +z.
+
+    Args:
+        glyph: Either 'CONE' (radius 1 and depth 2, centred on the point) or 'ARROW' (the cone on top of a cylinder)
+        vertices: Number of vertices around the circumference of the glyph
+
+    Returns:
+        (V, 3) array of vertex positions, (V, 3) array of vertex normals, and (F, 3) array of the vertex indices of each triangle
+    """
+
+    if glyph == 'CONE':
+        parts = [_getCone(vertices, 0)]
+    elif glyph == 'ARROW':
+        parts = [_getCone(vertices, 2), _getCylinder(vertices)]
+    else:
+        raise ValueError(f'Unknown glyph {glyph}')
+
+    offsets = np.cumsum([0] + [len(positions) for positions, _, _ in parts])
+
+    positions = np.concatenate([positions for positions, _, _ in parts])
+    normals = np.concatenate([normals for _, normals, _ in parts])
+    triangles = np.concatenate([triangles + offset for (_, _, triangles), offset in zip(parts, offsets)])
+
+    return positions, normals, triangles
+
+
+def writeGLTF(path, positions, directions, colours=None, glyph='CONE', scale=1, vertices=32):
+
+    """ Write a glyph field to a binary glTF (.glb) file, with the glyph instanced at each point.
+
+    The scene is rotated from Blender's z-up axes to glTF's y-up axes, so it appears the same way up in either.
+
+    Args:
+        path: Path to the file
+        positions: (N, 3) array of glyph positions
+        directions: (N, 3) array of the directions in which the glyphs point (need not be normalised)
+        colours: (N, 4) array of RGBA colours (of which RGB is stored, as the _COLOR_0 instance attribute), or None
+        glyph: Either 'CONE' or 'ARROW'
+        scale: Uniform scale factor of the glyphs
+        vertices: Number of vertices around the circumference of the glyph
+    """
+
+    count = len(positions)
+
+    # glTF does not allow empty buffer views, so there must be at least one instance
+    if count == 0:
+        raise ValueError('Cannot write a glyph field without any glyphs to glTF')
+
+    glyphPositions, glyphNormals, triangles = getGlyphMesh(glyph, vertices)
+    glyphPositions = scale * glyphPositions
+
+    # Each block of the binary buffer: the glyph mesh is written as it is, and the instance attributes a chunk at a time
+    blocks = [
+        (glyphPositions.astype('<f4'), 'VEC3', 5126, len(glyphPositions)),
+        (glyphNormals.astype('<f4'), 'VEC3', 5126, len(glyphNormals)),
+        (triangles.astype('<u4').ravel(), 'SCALAR', 5125, triangles.size),
+        (lambda start, stop: positions[start:stop], 'VEC3', 5126, count),
+        (lambda start, stop: getQuaternions(directions[start:stop])[:, [1, 2, 3, 0]], 'VEC4', 5126, count),  # glTF quaternions are [x, y, z, w]
+    ]
+
+    if colours is not None:
+        blocks.append((lambda start, stop: np.asarray(colours[start:stop])[:, :3], 'VEC3', 5126, count))
+
+    components = {'SCALAR': 1, 'VEC3': 3, 'VEC4': 4}
+    bufferViews = []
+    accessors = []
+    offset = 0
+
+    for _, accessorType, componentType, elements in blocks:
+        length = 4 * components[accessorType] * elements
+        bufferViews.append({'buffer': 0, 'byteOffset': offset, 'byteLength': length})
+        accessors.append({'bufferView': len(accessors), 'componentType': componentType, 'count': elements, 'type': accessorType})
+        offset += length
+
+    accessors[0]['min'] = glyphPositions.min(axis=0).tolist()
+    accessors[0]['max'] = glyphPositions.max(axis=0).tolist()
+
+    instanceAttributes = {'TRANSLATION': 3, 'ROTATION': 4}
+
+    if colours is not None:
+        instanceAttributes['_COLOR_0'] = 5
+
+    document = {
+        'asset': {'version': '2.0', 'generator': 'BlenderScripts exporters.py'},
+        'extensionsUsed': ['EXT_mesh_gpu_instancing'],
+        'extensionsRequired': ['EXT_mesh_gpu_instancing'],
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [
+            {'name': 'Glyphs', 'rotation': [-np.sqrt(0.5), 0, 0, np.sqrt(0.5)], 'children': [1]},  # -90 degrees about x, taking z-up to y-up
+            {'mesh': 0, 'extensions': {'EXT_mesh_gpu_instancing': {'attributes': instanceAttributes}}},
+        ],
+        'meshes': [{'name': glyph.capitalize(), 'primitives': [{'attributes': {'POSITION': 0, 'NORMAL': 1}, 'indices': 2, 'material': 0}]}],
+        'materials': [{'name': 'Glyph', 'pbrMetallicRoughness': {'baseColorFactor': [1, 1, 1, 1], 'metallicFactor': 0, 'roughnessFactor': 0.5}}],
+        'buffers': [{'byteLength': offset}],
+        'bufferViews': bufferViews,
+        'accessors': accessors,
+    }
+
+    # The JSON chunk is padded with spaces to a multiple of 4 bytes (all of the binary blocks already are)
+    documentBytes = json.dumps(document, separators=(',', ':')).encode()
+    documentBytes += b' ' * (-len(documentBytes) % 4)
+
+    with open(path, 'wb') as f:
+
+        f.write(struct.pack('<4sII', b'glTF', 2, 12 + 8 + len(documentBytes) + 8 + offset))
+        f.write(struct.pack('<I4s', len(documentBytes), b'JSON'))
+        f.write(documentBytes)
+        f.write(struct.pack('<I4s', offset, b'BIN\x00'))
+
+        for data, _, _, _ in blocks:
+            if callable(data):
+                for start in range(0, count, CHUNK_SIZE):
+                    f.write(np.asarray(data(start, min(start + CHUNK_SIZE, count)), dtype='<f4').tobytes())
+            else:
+                f.write(data.tobytes())
+
+
+def writePLY(path, positions, directions, colours=None, glyph='CONE', scale=1, vertices=32):
+
+    """ Write a glyph field to a binary PLY file, with every glyph written out as triangles.
+
+    Args:
+        path: Path to the file
+        positions: (N, 3) array of glyph positions
+        directions: (N, 3) array of the directions in which the glyphs point (need not be normalised)
+        colours: (N, 4) array of RGBA colours (stored as 8-bit vertex colours), or None
+        glyph: Either 'CONE' or 'ARROW'
+        scale: Uniform scale factor of the glyphs
+        vertices: Number of vertices around the circumference of the glyph
+    """
+
+    glyphPositions, glyphNormals, triangles = getGlyphMesh(glyph, vertices)
+    glyphPositions = scale * glyphPositions
+
+    count = len(positions)
+    fields = [(name, '<f4') for name in ['x', 'y', 'z', 'nx', 'ny', 'nz']]
+
+    if colours is not None:
+        fields += [(name, 'u1') for name in ['red', 'green', 'blue', 'alpha']]
+
+    vertexType = np.dtype(fields)
+    faceType = np.dtype([('count', 'u1'), ('indices', '<i4', (3,))])
+
+    header = ['ply', 'format binary_little_endian 1.0', f'element vertex {count * len(glyphPositions)}']
+    header += [f'property {"float" if dtype == "<f4" else "uchar"} {name}' for name, dtype in fields]
+    header += [f'element face {count * len(triangles)}', 'property list uchar int vertex_indices', 'end_header']
+
+    with open(path, 'wb') as f:
+
+        f.write(''.join(line + '\n' for line in header).encode())
+
+        # All of the vertices, then all of the faces
+        for start in range(0, count, CHUNK_SIZE):
+
+            stop = min(start + CHUNK_SIZE, count)
+            rotations = _getRotationMatrices(getQuaternions(directions[start:stop]))
+
+            vertexData = np.empty((stop - start, len(glyphPositions)), dtype=vertexType)
+            rotatedPositions = np.asarray(positions[start:stop])[:, np.newaxis] + glyphPositions @ rotations.transpose(0, 2, 1)
+            rotatedNormals = glyphNormals @ rotations.transpose(0, 2, 1)
+
+            for idx, axis in enumerate('xyz'):
+                vertexData[axis] = rotatedPositions[..., idx]
+                vertexData['n' + axis] = rotatedNormals[..., idx]
+
+            if colours is not None:
+                colourBytes = np.round(255 * np.clip(np.asarray(colours[start:stop]), 0, 1))
+                for idx, channel in enumerate(['red', 'green', 'blue', 'alpha']):
+                    vertexData[channel] = colourBytes[:, np.newaxis, idx]
+
+            f.write(vertexData)
+
+        for start in range(0, count, CHUNK_SIZE):
+
+            stop = min(start + CHUNK_SIZE, count)
+
+            faceData = np.empty((stop - start, len(triangles)), dtype=faceType)
+            faceData['count'] = 3
+            faceData['indices'] = triangles + len(glyphPositions) * np.arange(start, stop)[:, np.newaxis, np.newaxis]
+
+            f.write(faceData)
+
+
+def _getRotationMatrices(quaternions):
+
+    """ The (N, 3, 3) rotation matrices of an (N, 4) array of unit quaternions [w, x, y, z]. """
+
+    w, x, y, z = np.moveaxis(quaternions, -1, 0)
+
+    return np.stack([
+        np.stack([1 - 2*(y*y + z*z), 2*(x*y - w*z), 2*(x*z + w*y)], axis=-1),
+        np.stack([2*(x*y + w*z), 1 - 2*(x*x + z*z), 2*(y*z - w*x)], axis=-1),
+        np.stack([2*(x*z - w*y), 2*(y*z + w*x), 1 - 2*(x*x + y*y)], axis=-1),
+    ], axis=-2)
+
+
+def _getCone(vertices, height):
+
+    """ A cone of radius 1 and depth 2 pointing along +z, centred on (0, 0, height), with its base closed. """
+
+    angle = 2 * np.pi * np.arange(vertices) / vertices
+    following = (np.arange(vertices) + 1) % vertices
+
+    # Vertices around the base, one at the tip for each side (so that each side has its own normal there), around the base again for the base's own normals, and at the middle of the base
+    ring = np.stack([np.cos(angle), np.sin(angle), np.full(vertices, height - 1.0)], axis=-1)
+    tip = np.tile([0, 0, height + 1.0], (vertices, 1))
+    middle = [[0, 0, height - 1.0]]
+
+    # The sides slope by 1 (radius) in 2 (depth)
+    sideNormals = np.stack([2 * np.cos(angle), 2 * np.sin(angle), np.ones(vertices)], axis=-1) / np.sqrt(5)
+    tipAngle = angle + np.pi / vertices
+    tipNormals = np.stack([2 * np.cos(tipAngle), 2 * np.sin(tipAngle), np.ones(vertices)], axis=-1) / np.sqrt(5)
+    baseNormals = np.tile([0, 0, -1.0], (vertices + 1, 1))
+
+    positions = np.concatenate([ring, tip, ring, middle])
+    normals = np.concatenate([sideNormals, tipNormals, baseNormals])
+
+    index = np.arange(vertices)
+    triangles = np.concatenate([
+        np.stack([index, following, vertices + index], axis=-1),
+        np.stack([np.full(vertices, 3 * vertices), 2 * vertices + following, 2 * vertices + index], axis=-1),
+    ])
+
+    return positions, normals, triangles
+
+
+def _getCylinder(vertices):
+
+    """ A cylinder of radius 0.5 and depth 2 along z, centred on the origin, with both ends closed. """
+
+    angle = 2 * np.pi * np.arange(vertices) / vertices
+    following = (np.arange(vertices) + 1) % vertices
+
+    circle = 0.5 * np.stack([np.cos(angle), np.sin(angle), np.zeros(vertices)], axis=-1)
+    bottom = circle - [0, 0, 1]
+    top = circle + [0, 0, 1]
+
+    # Vertices around the bottom and top of the sides, then around the bottom and top ends, then at the middles of the ends
+    positions = np.concatenate([bottom, top, bottom, top, [[0, 0, -1], [0, 0, 1]]])
+
+    radial = 2 * circle
+    normals = np.concatenate([radial, radial, np.tile([0, 0, -1.0], (vertices, 1)), np.tile([0, 0, 1.0], (vertices, 1)), [[0, 0, -1], [0, 0, 1]]])
+
+    index = np.arange(vertices)
+    triangles = np.concatenate([
+        np.stack([index, following, vertices + following], axis=-1),
+        np.stack([index, vertices + following, vertices + index], axis=-1),
+        np.stack([np.full(vertices, 4 * vertices), 2 * vertices + following, 2 * vertices + index], axis=-1),
+        np.stack([np.full(vertices, 4 * vertices + 1), 3 * vertices + index, 3 * vertices + following], axis=-1),
+    ])
+
+    return positions, normals, triangles
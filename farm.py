@@ -0,0 +1,100 @@
+###############################################
+# Run many headless Blender processes at once #
+###############################################
+
+# Blender can run scripts without its GUI (blender -b), so batches of scenes can be built and rendered from the command
+# line. The functions here find the Blender executable and run a list of such commands across a pool of processes, a
+# fixed number at a time (e.g. one per core). They do not need bpy, as they run outside of Blender.
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Where Blender is usually installed, if it is not on the path
+BLENDER_LOCATIONS = [
+    '/Applications/Blender.app/Contents/MacOS/Blender',
+    'C:\\Program Files\\Blender Foundation\\Blender\\blender.exe',
+]
+
+
+def findBlender():
+
+    """ Find the Blender executable: the BLENDER environment variable if it is set, or else blender on the path, or else
+    the default install location.
+
+    Returns:
+        Path to the Blender executable
+    """
+
+    if os.environ.get('BLENDER'):
+        return os.environ['BLENDER']
+
+    onPath = shutil.which('blender')
+
+    if onPath is not None:
+        return onPath
+
+    for location in BLENDER_LOCATIONS:
+        if os.path.exists(location):
+            return location
+
+    raise FileNotFoundError('Could not find Blender; put it on the path or set the BLENDER environment variable')
+
+
+def blenderCommand(blendFile, arguments=(), scriptArguments=(), blender=None, threads=None):
+
+    """ Build the command running Blender in the background.
+
+    Args:
+        blendFile: The .blend file opened on startup
+        arguments: Further arguments to Blender, e.g. ('--python', 'script.py') or ('-s', 1, '-e', 10, '-a')
+        scriptArguments: Arguments passed on to the Python script (after "--")
+        blender: Path to the Blender executable (found with findBlender() by default)
+        threads: Number of threads each Blender process uses for rendering (all of the cores if None)
+
+    Returns:
+        List of the arguments of the command
+    """
+
+    command = [blender or findBlender(), '-b', str(blendFile)]
+
+    # The number of threads must come before the arguments which render, as Blender acts on its arguments in order
+    if threads is not None:
+        command += ['-t', str(threads)]
+
+    command += [str(argument) for argument in arguments]
+
+    if scriptArguments:
+        command += ['--'] + [str(argument) for argument in scriptArguments]
+
+    return command
+
+
+def runCommands(commands, workers=None, logs=None):
+
+    """ Run commands, at most workers of them at a time, waiting for all of them to finish.
+
+    Args:
+        commands: List of commands (each a list of arguments, e.g. from blenderCommand())
+        workers: Largest number of commands run at once (the number of cores by default)
+        logs: List of paths to which the output of each command is written, or None to let it through to this process's output
+
+    Returns:
+        List of the return codes of the commands
+    """
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    def run(idx):
+
+        if logs is None:
+            return subprocess.run(commands[idx]).returncode
+
+        with open(logs[idx], 'w') as log:
+            return subprocess.run(commands[idx], stdout=log, stderr=subprocess.STDOUT).returncode
+
+    # Each thread only waits for its Blender process, so threads (rather than processes) suffice to run them in parallel
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, range(len(commands))))
@@ -0,0 +1,555 @@
+#######################################################
+# Draw vector fields as instanced glyphs (cones etc.) #
+#######################################################
+
+# Rather than calling bpy.ops.mesh.primitive_cone_add once per point (which creates one object and one mesh
+# per glyph, and is dominated by operator overhead), we create a single mesh consisting only of vertices (a point cloud),
+# store the direction and colour of each point as mesh attributes, and use a Geometry Nodes "Instance on Points"
+# modifier to draw one shared glyph at every point. All of the per-point data is written with foreach_set, so the
+# time taken to build the scene scales with the length of the NumPy arrays rather than with the number of operator calls.
+
+import bpy
+import numpy as np
+
+# Largest number of points whose attributes keyframeAttribute() animates. Each point needs an F-curve per component, and
+# Blender looks through all of the F-curves of an action before creating another, so the time taken grows with the square
+# of the number of points; larger fields are animated with createGlyphField(frames=...) instead
+MAX_KEYFRAMED_POINTS = 2000
+
+
+def createGlyphField(name, positions, directions, colours=None, values=None, glyph='CONE', scale=1, vertices=32, material=None, collection=None, ids=None, frames=None):
+
+    """ Create a single object which draws a glyph at each of the given points, pointing along the given directions.
+
+    If an object of the same name already exists (e.g. from a previous run of the script), it is updated rather than
+    replaced: its points are only rebuilt if their IDs have changed, and of the positions and attributes, only those which
+    differ from what is already stored are written. Re-running a script after changing e.g. a colour map is then quick.
+
+    If frames are given, the glyphs are animated by drawing each frame from its own copy of the points, which the node
+    tree only shows from that frame until the next (so the glyphs jump from one frame to the next, rather than turning
+    smoothly between them). Unlike keyframing the attributes, this takes a time proportional to the number of points.
+
+    Args:
+        name: Name of the created object (and its mesh)
+        positions: (N, 3) array of glyph positions
+        directions: (N, 3) array of the directions in which the glyphs point (need not be normalised)
+        colours: (N, 4) array of RGBA colours, stored in the 'Col' attribute (read by getAttributeMaterial())
+        values: (N,) array of scalars, stored in the 'value' attribute (read by getColourMapMaterial())
+        glyph: Shape drawn at each point, either 'CONE' or 'ARROW' (cone on top of a cylinder)
+        scale: Uniform scale factor of the glyphs
+        vertices: Number of vertices around the circumference of the glyph
+        material: Material applied to all of the glyphs
+        collection: Collection to which the object is linked (the scene collection by default)
+        ids: (N,) array of integers which identify the points between runs (e.g. their indices in the full grid), stored
+            in the 'id' attribute; by default, the points are identified by their order
+        frames: (F,) array of increasing frame numbers at which the glyphs are given, in which case directions, colours
+            and values have an extra first axis for the frame, e.g. an (F, N, 3) array of directions
+
+    Returns:
+        The created (or updated) object
+    """
+
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    directions = np.asarray(directions, dtype=np.float32).reshape(-1, 3)
+    ids = np.arange(len(positions)) if ids is None else np.asarray(ids)
+    frameStart = frameEnd = None
+
+    if frames is not None:
+
+        # One copy of the points per frame, each drawn from its frame until the next (the first from the start, and the last to the end)
+        frames = np.asarray(frames, dtype=np.float32)
+        count = len(positions)
+
+        positions = np.tile(positions, (len(frames), 1))
+        ids = np.tile(ids, len(frames))
+        colours = None if colours is None else np.asarray(colours).reshape(len(positions), -1)
+        values = None if values is None else np.asarray(values).ravel()
+
+        frameStart = np.repeat(np.concatenate([[-np.inf], frames[1:]]), count)
+        frameEnd = np.repeat(np.concatenate([frames[1:], [np.inf]]), count)
+
+    if collection is None:
+        collection = bpy.context.scene.collection
+
+    obj = bpy.data.objects.get(name)
+
+    if obj is None or obj.type != 'MESH':
+        obj = bpy.data.objects.new(name, bpy.data.meshes.new(name))
+
+    if obj.name not in collection.objects:
+        collection.objects.link(obj)
+
+    mesh = obj.data
+
+    # The points are only rebuilt if they are not the same points as before, in which case any animation of them is also out of date
+    if len(mesh.vertices) != len(ids) or not setAttribute(mesh, 'id', ids, onlyCompare=True):
+        mesh.clear_geometry()
+        mesh.vertices.add(len(positions))
+        mesh.animation_data_clear()
+
+    existing = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', existing)
+
+    if not np.array_equal(existing, positions.ravel()):
+        mesh.vertices.foreach_set('co', positions.ravel())
+
+    setAttribute(mesh, 'id', ids)
+    setAttribute(mesh, 'direction', directions)
+
+    for attributeName, attributeValues in [('Col', colours), ('value', values), ('frameStart', frameStart), ('frameEnd', frameEnd)]:
+        if attributeValues is not None:
+            setAttribute(mesh, attributeName, attributeValues)
+        elif attributeName in mesh.attributes:
+            mesh.attributes.remove(mesh.attributes[attributeName])
+
+    mesh.update()
+
+    # The node group is only rebuilt if the glyph has changed
+    settings = repr((glyph, scale, vertices, None if material is None else material.name, frames is not None))
+
+    modifier = obj.modifiers.get('Glyphs') or obj.modifiers.new(name='Glyphs', type='NODES')
+
+    if modifier.node_group is None or modifier.node_group.get('settings') != settings:
+
+        oldNodeGroup = modifier.node_group
+        modifier.node_group = None
+
+        if oldNodeGroup is not None and oldNodeGroup.users == 0:
+            bpy.data.node_groups.remove(oldNodeGroup)
+
+        modifier.node_group = getGlyphNodeGroup(name + 'Glyphs', glyph, scale, vertices, material, animated=frames is not None)
+        modifier.node_group['settings'] = settings
+
+    return obj
+
+
+def setAttribute(mesh, attributeName, values, onlyCompare=False):
+
+    """ Write a per-point attribute to a mesh in one go, creating the attribute if it does not yet exist.
+
+    Nothing is written if the attribute already holds the given values.
+
+    Args:
+        mesh: The mesh (bpy.types.Mesh) to which the attribute belongs
+        attributeName: Name of the attribute
+        values: (N,) array for scalar (or integer) attributes, (N, 3) array for vectors or (N, 4) array for RGBA colours
+        onlyCompare: If True, nothing is written, and only the comparison with the values already stored is made
+
+    Returns:
+        Whether the attribute already held the given values
+    """
+
+    values = np.asarray(values)
+
+    if np.issubdtype(values.dtype, np.integer):
+        values = values.astype(np.int32)
+        dataType, key = 'INT', 'value'
+    else:
+        values = values.astype(np.float32)
+
+        if values.ndim == 1:
+            dataType, key = 'FLOAT', 'value'
+        elif values.shape[1] == 3:
+            dataType, key = 'FLOAT_VECTOR', 'vector'
+        else:
+            dataType, key = 'FLOAT_COLOR', 'color'
+
+    attribute = mesh.attributes.get(attributeName)
+
+    if attribute is not None and attribute.data_type == dataType and attribute.domain == 'POINT' and len(attribute.data) * int(np.prod(values.shape[1:])) == values.size:
+
+        existing = np.empty(values.size, dtype=values.dtype)
+        attribute.data.foreach_get(key, existing)
+
+        if np.array_equal(existing, values.ravel()):
+            return True
+
+    if onlyCompare:
+        return False
+
+    if attribute is not None and (attribute.data_type != dataType or attribute.domain != 'POINT'):
+        mesh.attributes.remove(attribute)
+        attribute = None
+
+    if attribute is None:
+        attribute = mesh.attributes.new(name=attributeName, type=dataType, domain='POINT')
+
+    attribute.data.foreach_set(key, values.ravel())
+
+    return False
+
+
+def keyframeAttribute(mesh, attributeName, frames, values):
+
+    """ Animate a per-point attribute of a mesh, given its values at every keyframe.
+
+    Rather than calling keyframe_insert for each point at each frame, one F-curve is created per point and component,
+    and all of its keyframes are written at once with foreach_set. As creating the F-curves still takes a time growing with
+    the square of their number, at most MAX_KEYFRAMED_POINTS points can be animated this way; use createGlyphField(frames=...)
+    to animate larger fields.
+
+    Args:
+        mesh: The mesh (bpy.types.Mesh) to which the attribute belongs
+        attributeName: Name of the attribute, which must already exist (e.g. from setAttribute())
+        frames: (F,) array of frame numbers
+        values: (F, N) array of scalars, (F, N, 3) array of vectors or (F, N, 4) array of RGBA colours
+    """
+
+    frames = np.asarray(frames, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+
+    if values.shape[1] > MAX_KEYFRAMED_POINTS:
+        raise ValueError(f'Cannot keyframe {values.shape[1]} points, as at most {MAX_KEYFRAMED_POINTS} can be keyframed (use createGlyphField(frames=...) instead)')
+
+    if values.ndim == 2:
+        values = values[:, :, np.newaxis]
+        key = 'value'
+    elif values.shape[2] == 3:
+        key = 'vector'
+    else:
+        key = 'color'
+
+    for idx in range(values.shape[1]):
+        for component in range(values.shape[2]):
+            fcurve = _getFCurve(mesh, f'attributes["{attributeName}"].data[{idx}].{key}', component)
+            _addKeyframes(fcurve, frames, values[:, idx, component])
+
+
+def morphGlyphField(obj, targetPositions, startFrame, endFrame, targetDirections=None, steps=10, name='Morph'):
+
+    """ Animate the glyphs of an object from createGlyphField() moving in straight lines to new positions, easing in and out.
+
+    The target positions are stored in a single shape key, so only its value needs to be keyframed, however many glyphs
+    there are. If target directions are given, the 'direction' attribute is also keyframed (in bulk, with
+    keyframeAttribute()) at steps + 1 frames along the way, turning the glyphs in step with their movement (which limits
+    the number of glyphs to MAX_KEYFRAMED_POINTS).
+
+    Args:
+        obj: Object returned by createGlyphField()
+        targetPositions: (N, 3) array of the positions of the glyphs at the end of the morph
+        startFrame: Frame at which the glyphs start to move from their original positions
+        endFrame: Frame at which the glyphs reach their target positions
+        targetDirections: (N, 3) array of the directions of the glyphs at the end of the morph, or None if they do not turn
+        steps: Number of intervals into which the morph is split for keyframing
+        name: Name of the shape key
+
+    Returns:
+        The shape key
+    """
+
+    mesh = obj.data
+
+    if mesh.shape_keys is None:
+        obj.shape_key_add(name='Basis', from_mix=False)
+
+    # The shape key left by a previous run of the script is reused, as adding another would give it a different name (e.g. Morph.001)
+    shapeKey = mesh.shape_keys.key_blocks.get(name) or obj.shape_key_add(name=name, from_mix=False)
+    shapeKey.data.foreach_set('co', np.asarray(targetPositions, dtype=np.float32).ravel())
+
+    # Fraction of the way along the morph at each of the keyframes, easing in and out (smoothstep)
+    frames = np.linspace(startFrame, endFrame, steps + 1)
+    t = np.linspace(0, 1, steps + 1)
+    fraction = 3 * t**2 - 2 * t**3
+
+    _addKeyframes(_getFCurve(mesh.shape_keys, f'key_blocks["{shapeKey.name}"].value'), frames, fraction)
+
+    if targetDirections is not None:
+
+        directions = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+        mesh.attributes['direction'].data.foreach_get('vector', directions.ravel())
+
+        # The directions are interpolated linearly and renormalised, so glyphs turn through the smaller angle
+        interpolated = (1 - fraction[:, np.newaxis, np.newaxis]) * directions + fraction[:, np.newaxis, np.newaxis] * np.asarray(targetDirections)
+        interpolated /= np.maximum(np.linalg.norm(interpolated, axis=-1, keepdims=True), 1e-12)
+
+        keyframeAttribute(mesh, 'direction', frames, interpolated)
+
+    return shapeKey
+
+
+def _getFCurve(datablock, dataPath, index=0):
+
+    """ Get the F-curve animating the property at dataPath of a datablock (e.g. a mesh), creating it and its action if needed. """
+
+    if datablock.animation_data is None:
+        datablock.animation_data_create()
+
+    if datablock.animation_data.action is None:
+        datablock.animation_data.action = bpy.data.actions.new(name=datablock.name + 'Action')
+
+    action = datablock.animation_data.action
+
+    # Actions were split into slots in Blender 4.4, after which F-curves should be created through the action
+    if hasattr(action, 'fcurve_ensure_for_datablock'):
+        return action.fcurve_ensure_for_datablock(datablock, dataPath, index=index)
+
+    # Creating an F-curve which already exists (e.g. from a previous run of the script) is an error
+    fcurve = action.fcurves.find(dataPath, index=index)
+
+    if fcurve is None:
+        fcurve = action.fcurves.new(dataPath, index=index)
+
+    return fcurve
+
+
+def _addKeyframes(fcurve, frames, values):
+
+    """ Add keyframes with the given values at the given frames to an F-curve, all at once. """
+
+    # (frame, value) pairs for each keyframe, as expected by keyframe_points.foreach_set('co', ...)
+    co = np.empty((len(frames), 2), dtype=np.float32)
+    co[:, 0] = frames
+    co[:, 1] = values
+
+    # Any keyframes left from a previous run of the script are replaced
+    if len(fcurve.keyframe_points) > 0:
+        if hasattr(fcurve.keyframe_points, 'clear'):
+            fcurve.keyframe_points.clear()
+        else:
+            for point in reversed(list(fcurve.keyframe_points)):
+                fcurve.keyframe_points.remove(point, fast=True)
+
+    fcurve.keyframe_points.add(len(frames))
+    fcurve.keyframe_points.foreach_set('co', co.ravel())
+    fcurve.update()  # Sorts the keyframes and recalculates their handles
+
+
+def getAttributeMaterial(name='GlyphColour', attributeName='Col'):
+
+    """ Get a material which colours each glyph using the RGBA attribute stored on the point it is instanced on.
+
+    The material is only created once and is then shared between all of the glyphs (c.f. Archive/2DFromParaView.py).
+
+    Args:
+        name: Name of the material
+        attributeName: The name of the colour attribute on the points
+
+    Returns:
+        The material
+    """
+
+    mat = bpy.data.materials.get(name)
+
+    if mat is not None:
+        return mat
+
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Shader already has Principled BSDF and MaterialOutput nodes
+    psNode = nodes.get('Principled BSDF')
+
+    # The attributes of the points are passed on to the instances, so are read from the instancer
+    attributeNode = nodes.new('ShaderNodeAttribute')
+    attributeNode.location.x -= 500
+    attributeNode.attribute_type = 'INSTANCER'
+    attributeNode.attribute_name = attributeName
+    links.new(attributeNode.outputs['Color'], psNode.inputs['Base Color'])
+
+    return mat
+
+
+def getColourMapMaterial(name, colours, vmin=-1, vmax=1, attributeName='value'):
+
+    """ Get a material which colours each glyph by passing a scalar attribute stored on its point through a colour ramp.
+
+    The material is only created once per colour map and is then shared between all of the glyphs which use it.
+
+    Args:
+        name: Name of the material (e.g. the name of the colour map)
+        colours: (n, 4) array of RGBA values evenly spaced between vmin and vmax, defining the colour map (n <= 32)
+        vmin: Attribute value mapped to the first colour
+        vmax: Attribute value mapped to the last colour
+        attributeName: The name of the scalar attribute on the points
+
+    Returns:
+        The material
+    """
+
+    mat = bpy.data.materials.get(name)
+
+    if mat is not None:
+        return mat
+
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Shader already has Principled BSDF and MaterialOutput nodes
+    psNode = nodes.get('Principled BSDF')
+    psNode.inputs['Metallic'].default_value = 0
+
+    attributeNode = nodes.new('ShaderNodeAttribute')
+    attributeNode.location.x -= 800
+    attributeNode.attribute_type = 'INSTANCER'
+    attributeNode.attribute_name = attributeName
+
+    # Rescale the attribute to be between 0 and 1, which is where the colour ramp is defined
+    mapRangeNode = nodes.new('ShaderNodeMapRange')
+    mapRangeNode.location.x -= 600
+    mapRangeNode.inputs['From Min'].default_value = vmin
+    mapRangeNode.inputs['From Max'].default_value = vmax
+
+    # Add ramp node and colours (the ramp starts off with two elements, at positions 0 and 1)
+    rampNode = nodes.new('ShaderNodeValToRGB')
+    rampNode.location.x -= 400
+    elements = rampNode.color_ramp.elements
+
+    for position in np.linspace(0, 1, len(colours))[1:-1]:
+        elements.new(position=position)
+
+    for element, colour in zip(elements, colours):
+        element.color = colour
+
+    # Link the nodes together
+    links.new(attributeNode.outputs['Fac'], mapRangeNode.inputs['Value'])
+    links.new(mapRangeNode.outputs['Result'], rampNode.inputs['Fac'])
+    links.new(rampNode.outputs['Color'], psNode.inputs['Base Color'])
+
+    return mat
+
+
+def getGlyphNodeGroup(name, glyph='CONE', scale=1, vertices=32, material=None, animated=False):
+
+    """ Create the Geometry Nodes tree which instances the glyph on each point, rotated to align with the 'direction' attribute.
+
+    Args:
+        name: Name of the node group
+        glyph: Either 'CONE' or 'ARROW'
+        scale: Uniform scale factor of the glyphs
+        vertices: Number of vertices around the circumference of the glyph
+        material: Material applied to the glyph
+        animated: Whether each point is only drawn from the frame in its 'frameStart' attribute until the frame in its
+            'frameEnd' attribute (see createGlyphField())
+
+    Returns:
+        The node group
+    """
+
+    nodeGroup = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+
+    # The interface for adding sockets to node groups changed in Blender 4.0
+    if hasattr(nodeGroup, 'interface'):
+        nodeGroup.interface.new_socket(name='Geometry', in_out='INPUT', socket_type='NodeSocketGeometry')
+        nodeGroup.interface.new_socket(name='Geometry', in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    else:
+        nodeGroup.inputs.new('NodeSocketGeometry', 'Geometry')
+        nodeGroup.outputs.new('NodeSocketGeometry', 'Geometry')
+
+    nodes = nodeGroup.nodes
+    links = nodeGroup.links
+
+    inputNode = nodes.new('NodeGroupInput')
+    inputNode.location.x -= 800
+    outputNode = nodes.new('NodeGroupOutput')
+    outputNode.location.x += 400
+
+    # The glyph is made from the Geometry Nodes mesh primitives so that no template object is needed
+    # As with bpy.ops.mesh.primitive_cone_add, the cone has radius 1 and depth 2, and is centred on the point
+    coneNode = nodes.new('GeometryNodeMeshCone')
+    coneNode.location = (-800, -300)
+    coneNode.inputs['Vertices'].default_value = vertices
+    coneNode.inputs['Radius Top'].default_value = 0
+    coneNode.inputs['Radius Bottom'].default_value = 1
+    coneNode.inputs['Depth'].default_value = 2
+    glyphSocket = coneNode.outputs['Mesh']
+
+    if glyph == 'ARROW':
+
+        # Cone sitting on top of a cylinder, as in SkyrmionByLocation.py
+        moveNode = nodes.new('GeometryNodeTransform')
+        moveNode.location = (-600, -300)
+        moveNode.inputs['Translation'].default_value = (0, 0, 2)
+        links.new(glyphSocket, moveNode.inputs['Geometry'])
+
+        cylinderNode = nodes.new('GeometryNodeMeshCylinder')
+        cylinderNode.location = (-800, -600)
+        cylinderNode.inputs['Vertices'].default_value = vertices
+        cylinderNode.inputs['Radius'].default_value = 0.5
+        cylinderNode.inputs['Depth'].default_value = 2
+
+        joinNode = nodes.new('GeometryNodeJoinGeometry')
+        joinNode.location = (-400, -300)
+        links.new(moveNode.outputs['Geometry'], joinNode.inputs['Geometry'])
+        links.new(cylinderNode.outputs['Mesh'], joinNode.inputs['Geometry'])
+        glyphSocket = joinNode.outputs['Geometry']
+
+    elif glyph != 'CONE':
+        raise ValueError(f'Unknown glyph {glyph}')
+
+    smoothNode = nodes.new('GeometryNodeSetShadeSmooth')
+    smoothNode.location = (-200, -300)
+    links.new(glyphSocket, smoothNode.inputs['Geometry'])
+    glyphSocket = smoothNode.outputs['Geometry']
+
+    if material is not None:
+        materialNode = nodes.new('GeometryNodeSetMaterial')
+        materialNode.location = (0, -300)
+        materialNode.inputs['Material'].default_value = material
+        links.new(glyphSocket, materialNode.inputs['Geometry'])
+        glyphSocket = materialNode.outputs['Geometry']
+
+    directionNode = nodes.new('GeometryNodeInputNamedAttribute')
+    directionNode.location = (-600, 0)
+    directionNode.data_type = 'FLOAT_VECTOR'
+    directionNode.inputs['Name'].default_value = 'direction'
+
+    # "Align Euler to Vector" was superseded by "Align Rotation to Vector" in Blender 4.2
+    if hasattr(bpy.types, 'FunctionNodeAlignRotationToVector'):
+        alignNode = nodes.new('FunctionNodeAlignRotationToVector')
+    else:
+        alignNode = nodes.new('FunctionNodeAlignEulerToVector')
+    alignNode.location = (-400, 0)
+    alignNode.axis = 'Z'  # The glyphs point along +z before they are rotated
+    links.new(_enabledOutput(directionNode, 'Attribute'), alignNode.inputs['Vector'])
+
+    instanceNode = nodes.new('GeometryNodeInstanceOnPoints')
+    instanceNode.location = (200, 0)
+    instanceNode.inputs['Scale'].default_value = (scale, scale, scale)
+    links.new(inputNode.outputs['Geometry'], instanceNode.inputs['Points'])
+    links.new(glyphSocket, instanceNode.inputs['Instance'])
+    links.new(alignNode.outputs[0], instanceNode.inputs['Rotation'])
+
+    if animated:
+
+        timeNode = nodes.new('GeometryNodeInputSceneTime')
+        timeNode.location = (-600, 500)
+
+        # frameStart <= frame < frameEnd
+        andNode = nodes.new('FunctionNodeBooleanMath')
+        andNode.location = (0, 300)
+        andNode.operation = 'AND'
+
+        for idx, (attributeName, operation) in enumerate([('frameStart', 'LESS_EQUAL'), ('frameEnd', 'GREATER_THAN')]):
+
+            frameNode = nodes.new('GeometryNodeInputNamedAttribute')
+            frameNode.location = (-600, 300 - 150*idx)
+            frameNode.data_type = 'FLOAT'
+            frameNode.inputs['Name'].default_value = attributeName
+
+            # The first two inputs of the comparison node are the floats A and B
+            compareNode = nodes.new('FunctionNodeCompare')
+            compareNode.location = (-300, 300 - 150*idx)
+            compareNode.data_type = 'FLOAT'
+            compareNode.operation = operation
+            links.new(_enabledOutput(frameNode, 'Attribute'), compareNode.inputs[0])
+            links.new(timeNode.outputs['Frame'], compareNode.inputs[1])
+            links.new(compareNode.outputs['Result'], andNode.inputs[idx])
+
+        links.new(andNode.outputs[0], instanceNode.inputs['Selection'])
+
+    links.new(instanceNode.outputs['Instances'], outputNode.inputs['Geometry'])
+
+    return nodeGroup
+
+
+def _enabledOutput(node, socketName):
+
+    """ Older versions of Blender have one output socket per data type with the same name, only one of which is enabled. """
+
+    return next(socket for socket in node.outputs if socket.name == socketName and socket.enabled)
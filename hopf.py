@@ -0,0 +1,174 @@
+#############################################################
+# Topological charges (skyrmion number and Hopf index) of m #
+#############################################################
+
+# The Hopf index is H = 1/(4 pi)^2 * sum(F . A), where F is the emergent magnetic field, with components
+# F_x = m . (d_y m x d_z m) etc., and A is a vector potential with curl(A) = F. Derivatives are taken as forward
+# differences on the grid (the grid spacing cancels out), as in the "one-line" calculation which used to be at the end of
+# SkyrmionTube.py. The sign is chosen such that the tubes from textures.hopfionTube() have H = hopf_index for arrays
+# indexed as [x, y, z] (the one-line calculation had the opposite sign, as its meshgrid put the y-axis first).
+#
+# Note that the whole magnetization must be passed in: cutting a segment out (as is done for drawing the cones) changes
+# the texture, so gives the wrong answer.
+
+import numpy as np
+
+
+def topologicalCharge(m):
+
+    """ Skyrmion number Q = 1/(4 pi) * sum(m . (d_x m x d_y m)) of each xy-layer of the magnetization.
+
+    Args:
+        m: Magnetization indexed as [x, y, z, component] (or [x, y, component] for a single layer)
+
+    Returns:
+        The skyrmion number of each layer (or a single number for a single layer)
+    """
+
+    m = np.asarray(m, dtype=np.float64)
+
+    mReduced = m[:-1, :-1]
+    mdx = m[1:, :-1] - mReduced
+    mdy = m[:-1, 1:] - mReduced
+
+    return np.sum(np.einsum('ij...l,ij...l->ij...', mReduced, np.cross(mdx, mdy)), axis=(0, 1)) / (4 * np.pi)
+
+
+def hopfIndex(m, method='slab', slabSize=8):
+
+    """ Hopf index of a magnetization texture.
+
+    Args:
+        m: Magnetization indexed as [x, y, z, component], i.e. with the axes in the order x, y, z (e.g. from np.meshgrid with indexing='ij')
+        method: 'slab' for the same discretisation as the "one-line" calculation (with A_y = 0), processed in slabs of z so that
+            the memory needed on top of m is only that of a few slabs, or 'fft', which finds A in the Coulomb gauge (div(A) = 0)
+            with Fourier transforms (a cross-check in a different gauge, but it holds several full-size arrays and assumes periodic boundaries)
+        slabSize: Number of z-layers processed at a time by the 'slab' method
+
+    Returns:
+        The Hopf index
+    """
+
+    # The emergent field needs derivatives along all three axes, so e.g. a film one layer thick has no Hopf index
+    if min(np.shape(m)[:3]) < 2:
+        raise ValueError(f'The Hopf index needs at least two points along each of x, y and z, not shape {np.shape(m)[:3]}')
+
+    if method == 'slab':
+        return _hopfIndexSlabs(m, slabSize)
+    elif method == 'fft':
+        return _hopfIndexFFT(m)
+    else:
+        raise ValueError(f'Unknown method {method}')
+
+
+def _hopfIndexSlabs(m, slabSize):
+
+    """ Hopf index in the gauge A_y = 0, so that A_x = -cumsum_y(F_z) and A_z = cumsum_y(F_x) only need integrating along y,
+    and each slab of z can be handled independently. """
+
+    nx, ny, nz, _ = m.shape
+    slabSize = min(slabSize, nz - 1)
+
+    # Preallocated buffers, reused for every slab (the last slab may use only part of them)
+    shape = (nx - 1, ny - 1, slabSize)
+    mReduced = np.empty(shape + (3,))
+    mdx = np.empty(shape + (3,))
+    mdy = np.empty(shape + (3,))
+    mdz = np.empty(shape + (3,))
+    Fx = np.empty(shape)
+    Fz = np.empty(shape)
+    integral = np.empty(shape)
+    tmp = np.empty(shape)
+
+    total = 0
+
+    for k0 in range(0, nz - 1, slabSize):
+
+        k1 = min(k0 + slabSize, nz - 1)
+        s = k1 - k0
+
+        mR, dx, dy, dz = mReduced[:, :, :s], mdx[:, :, :s], mdy[:, :, :s], mdz[:, :, :s]
+        fx, fz, a, t = Fx[:, :, :s], Fz[:, :, :s], integral[:, :, :s], tmp[:, :, :s]
+
+        mR[...] = m[:-1, :-1, k0:k1]
+        np.subtract(m[1:, :-1, k0:k1], mR, out=dx)
+        np.subtract(m[:-1, 1:, k0:k1], mR, out=dy)
+        np.subtract(m[:-1, :-1, k0+1:k1+1], mR, out=dz)
+
+        _tripleProduct(mR, dy, dz, fx, t)
+        _tripleProduct(mR, dx, dy, fz, t)
+
+        # F . A = F_z cumsum_y(F_x) - F_x cumsum_y(F_z)
+        np.cumsum(fx, axis=1, out=a)
+        np.multiply(fz, a, out=a)
+        total += np.sum(a)
+
+        np.cumsum(fz, axis=1, out=a)
+        np.multiply(fx, a, out=a)
+        total -= np.sum(a)
+
+    return total / (4 * np.pi)**2
+
+
+def _tripleProduct(m, a, b, out, tmp):
+
+    """ m . (a x b), written into out, without allocating any full-size temporaries. """
+
+    np.multiply(a[..., 1], b[..., 2], out=out)
+    np.multiply(a[..., 2], b[..., 1], out=tmp)
+    out -= tmp
+    out *= m[..., 0]
+
+    np.multiply(a[..., 2], b[..., 0], out=tmp)
+    tmp *= m[..., 1]
+    out += tmp
+    np.multiply(a[..., 0], b[..., 2], out=tmp)
+    tmp *= m[..., 1]
+    out -= tmp
+
+    np.multiply(a[..., 0], b[..., 1], out=tmp)
+    tmp *= m[..., 2]
+    out += tmp
+    np.multiply(a[..., 1], b[..., 0], out=tmp)
+    tmp *= m[..., 2]
+    out -= tmp
+
+
+def _hopfIndexFFT(m):
+
+    """ Hopf index with A = curl(F) / k^2 in Fourier space (the Coulomb gauge). """
+
+    mReduced = m[:-1, :-1, :-1]
+    mdx = m[1:, :-1, :-1] - mReduced
+    mdy = m[:-1, 1:, :-1] - mReduced
+    mdz = m[:-1, :-1, 1:] - mReduced
+
+    F = np.stack([
+        np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdy, mdz)),
+        np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdz, mdx)),
+        np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdx, mdy)),
+    ])
+
+    del mReduced, mdx, mdy, mdz
+
+    shape = F.shape[1:]
+    kx = 2 * np.pi * np.fft.fftfreq(shape[0])[:, np.newaxis, np.newaxis]
+    ky = 2 * np.pi * np.fft.fftfreq(shape[1])[np.newaxis, :, np.newaxis]
+    kz = 2 * np.pi * np.fft.rfftfreq(shape[2])[np.newaxis, np.newaxis, :]
+
+    kSquared = kx**2 + ky**2 + kz**2
+    kSquared[0, 0, 0] = 1  # The k = 0 component of F . A vanishes anyway, as F has no k = 0 component for a localised texture
+
+    FHat = np.fft.rfftn(F, axes=(1, 2, 3))
+
+    # A = i k x F / k^2
+    AHat = np.stack([
+        ky * FHat[2] - kz * FHat[1],
+        kz * FHat[0] - kx * FHat[2],
+        kx * FHat[1] - ky * FHat[0],
+    ])
+    AHat *= 1j / kSquared
+
+    A = np.fft.irfftn(AHat, s=shape, axes=(1, 2, 3))
+
+    return np.sum(F * A) / (4 * np.pi)**2
@@ -0,0 +1,288 @@
+#####################################
+# Fast loading of OVF files (MuMax) #
+#####################################
+
+# Rather than going through discretisedfield (which parses the whole file into a Field object before we throw most of it
+# away by subsampling), the header is parsed directly and binary data blocks are memory-mapped, so that only the
+# subsampled region of interest is ever copied into memory. Files in a time series are read ahead on a thread pool,
+# and the decoded frames can be cached as a single .npy stack so that later runs skip parsing entirely. Arrays (e.g. the
+# analytic textures, to be used as initial states in MuMax) are written to OVF 2.0 files in the same layout, a block of
+# z-layers at a time.
+
+import os
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Value at the start of each binary data block, used to check the byte order and precision
+CHECK_VALUES = {4: 1234567.0, 8: 123456789012345.0}
+
+
+def readHeader(path):
+
+    """ Read the header of an OVF (1.0 or 2.0) file, without reading the data.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Dictionary of the header entries (with lower-case keys, and numerical values converted to numbers), along with
+        'version', 'dataFormat' ('text', 4 or 8), 'dataOffset' (position of the data in the file) and 'shape'
+        (the shape of the array returned by loadOVF(), i.e. (xnodes, ynodes, znodes, valuedim))
+    """
+
+    header = {}
+
+    with open(path, 'rb') as f:
+
+        while True:
+
+            line = f.readline()
+
+            if not line:
+                raise ValueError(f'{path} has no data block')
+
+            line = line.decode('latin-1').strip()
+
+            if line.startswith('# OOMMF'):
+                header['version'] = 1 if 'rectangular' in line or '1.0' in line else 2
+                continue
+
+            if not line.startswith('#'):
+                continue
+
+            key, _, value = line.lstrip('#').partition(':')
+            key = key.strip().lower()
+            value = value.strip()
+
+            if key == 'begin' and value.lower().startswith('data'):
+                dataFormat = value.split()[-1].lower()
+                header['dataFormat'] = 'text' if dataFormat == 'text' else int(dataFormat)
+                header['dataOffset'] = f.tell()
+                break
+
+            if key in ('begin', 'end', ''):
+                continue
+
+            try:
+                value = float(value) if any(c in value for c in '.eE') else int(value)
+            except ValueError:
+                pass
+
+            header[key] = value
+
+    header.setdefault('version', 2)
+    header.setdefault('valuedim', 3)  # OVF 1.0 files do not specify valuedim, and are always vector fields
+    header['shape'] = (header['xnodes'], header['ynodes'], header['znodes'], header['valuedim'])
+
+    return header
+
+
+def loadOVF(path, step=1, region=None):
+
+    """ Load the data from an OVF file, taking only every step-th point within the given region.
+
+    Binary data is memory-mapped, and the region and step are applied before anything is copied, so loading a subsampled
+    region of a large file only reads the parts of the file which are needed.
+
+    Args:
+        path: Path to the file
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+        region: Tuple of slices along the x-, y- and z-axes (e.g. (slice(100, 300), slice(None), slice(None))), applied before the step
+
+    Returns:
+        Array of shape (nx, ny, nz, valuedim), indexed in the same way as discretisedfield.Field.array
+    """
+
+    header = readHeader(path)
+    nx, ny, nz, dim = header['shape']
+
+    if header['dataFormat'] == 'text':
+
+        with open(path, 'rb') as f:
+            f.seek(header['dataOffset'])
+            text = f.read().decode('latin-1')
+
+        text = text[:text.index('# End: Data')]
+        data = np.array(text.split(), dtype=np.float64).reshape(nz, ny, nx, dim)
+
+    else:
+
+        # OVF 1.0 binary data is big-endian, OVF 2.0 is little-endian
+        byteOrder = '>' if header['version'] == 1 else '<'
+        dtype = np.dtype(f'{byteOrder}f{header["dataFormat"]}')
+
+        data = np.memmap(path, dtype=dtype, mode='r', offset=header['dataOffset'], shape=(1 + nx*ny*nz*dim,))
+
+        if data[0] != CHECK_VALUES[header['dataFormat']]:
+            raise ValueError(f'{path} has an invalid check value {data[0]}')
+
+        data = data[1:].reshape(nz, ny, nx, dim)
+
+    # The data is stored with x varying fastest, so reverse the axes to index as [x, y, z] (this is just a view)
+    data = data.transpose(2, 1, 0, 3)
+
+    if region is not None:
+        data = data[tuple(region)]
+
+    if np.ndim(step) == 0:
+        step = (step, step, step)
+
+    data = data[::step[0], ::step[1], ::step[2]]
+
+    return np.array(data, dtype=np.float64)
+
+
+def iterSeries(paths, step=1, region=None, workers=4):
+
+    """ Load a series of OVF files one after another, reading the upcoming files ahead on a pool of threads.
+
+    Args:
+        paths: Paths to the files, in order
+        step: Passed on to loadOVF()
+        region: Passed on to loadOVF()
+        workers: Number of threads with which files are read ahead
+
+    Yields:
+        The array loaded from each file in turn
+    """
+
+    paths = list(paths)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        # Keep a few more files queued than there are workers, so that the workers never go idle
+        futures = [executor.submit(loadOVF, path, step, region) for path in paths[:2*workers]]
+
+        for idx in range(len(paths)):
+
+            if idx + 2*workers < len(paths):
+                futures.append(executor.submit(loadOVF, paths[idx + 2*workers], step, region))
+
+            yield futures[idx].result()
+            futures[idx] = None  # Free the frame once it has been used
+
+
+def loadSeries(paths, step=1, region=None, workers=4, cachePath=None):
+
+    """ Load a series of OVF files into a single array, optionally caching the result.
+
+    If cachePath is given, the stacked frames are written straight to a .npy file there (with the list of files and
+    loading options alongside in cachePath + '.json'), and are loaded directly from the cache on later calls with the
+    same files and options, without parsing any of the OVF files. The frames are then always returned as a read-only
+    memory-mapped array, whether or not they were already cached.
+
+    Args:
+        paths: Paths to the files, in order
+        step: Passed on to loadOVF()
+        region: Passed on to loadOVF()
+        workers: Number of threads with which files are read ahead
+        cachePath: Path of the .npy file in which the frames are cached
+
+    Returns:
+        Array of shape (frames, nx, ny, nz, valuedim)
+    """
+
+    paths = list(paths)
+
+    if not paths:
+        raise ValueError('There are no files in the series')
+
+    if cachePath is not None:
+
+        # The cache is only valid for the same files (unmodified since the cache was written) and options
+        key = {
+            'files': [[os.path.abspath(path), os.path.getsize(path), os.path.getmtime(path)] for path in paths],
+            'step': np.ravel(step).tolist(),
+            'region': repr(region),
+        }
+
+        try:
+            with open(cachePath + '.json') as f:
+                if json.load(f) == key:
+                    return np.load(cachePath, mmap_mode='r')
+        except (OSError, ValueError):
+            pass
+
+        # Any previous cache is invalid from here on, in case writing the new one is interrupted
+        if os.path.exists(cachePath + '.json'):
+            os.remove(cachePath + '.json')
+
+    frames = None
+
+    for idx, frame in enumerate(iterSeries(paths, step, region, workers)):
+
+        if frames is None:
+            shape = (len(paths),) + frame.shape
+            frames = np.empty(shape) if cachePath is None else np.lib.format.open_memmap(cachePath, mode='w+', dtype=np.float64, shape=shape)
+
+        frames[idx] = frame
+
+    if cachePath is not None:
+
+        frames.flush()
+        del frames
+
+        with open(cachePath + '.json', 'w') as f:
+            json.dump(key, f)
+
+        return np.load(cachePath, mmap_mode='r')
+
+    return frames
+
+
+def writeOVF(path, mArray, cellSize=(1, 1, 1), origin=(0, 0, 0), dataFormat=4, title='m', chunkSize=16):
+
+    """ Write an array to an OVF 2.0 file with binary data, which can be read by MuMax (e.g. with m.LoadFile()) or loadOVF().
+
+    The data is converted and written a block of z-layers at a time, so a large (e.g. memory-mapped) array is written in
+    a single sequential pass without ever being copied in full.
+
+    Args:
+        path: Path to the file
+        mArray: Array indexed as [x, y, z, component], or [x, y, component] for a 2D film
+        cellSize: Size of each cell along x, y and z, in metres
+        origin: Position of the corner of the mesh, in metres
+        dataFormat: 4 or 8, for single or double precision
+        title: Name of the quantity, written to the header
+        chunkSize: Number of z-layers converted at a time
+    """
+
+    if np.ndim(mArray) == 3:
+        mArray = mArray[:, :, np.newaxis]
+
+    if dataFormat not in CHECK_VALUES:
+        raise ValueError(f'The data format must be 4 or 8 (bytes), not {dataFormat}')
+
+    nodes = np.shape(mArray)[:3]
+    dim = np.shape(mArray)[3]
+    cellSize = np.broadcast_to(np.asarray(cellSize, dtype=np.float64), (3,))
+    origin = np.broadcast_to(np.asarray(origin, dtype=np.float64), (3,))
+
+    # The same header entries as in the files written by MuMax
+    header = ['OOMMF OVF 2.0', 'Segment count: 1', 'Begin: Segment', 'Begin: Header', f'Title: {title}', 'meshtype: rectangular', 'meshunit: m']
+    header += [f'{axis}min: {origin[idx]:.10g}' for idx, axis in enumerate('xyz')]
+    header += [f'{axis}max: {origin[idx] + nodes[idx] * cellSize[idx]:.10g}' for idx, axis in enumerate('xyz')]
+    header += [f'valuedim: {dim}']
+
+    if dim == 3:
+        header += [f'valuelabels: {title}_x {title}_y {title}_z', 'valueunits: 1 1 1']
+
+    header += [f'{axis}base: {origin[idx] + cellSize[idx] / 2:.10g}' for idx, axis in enumerate('xyz')]
+    header += [f'{axis}nodes: {nodes[idx]}' for idx, axis in enumerate('xyz')]
+    header += [f'{axis}stepsize: {cellSize[idx]:.10g}' for idx, axis in enumerate('xyz')]
+    header += ['End: Header', f'Begin: Data Binary {dataFormat}']
+
+    dtype = np.dtype(f'<f{dataFormat}')
+
+    with open(path, 'wb') as f:
+
+        f.write(''.join(f'# {line}\n' for line in header).encode())
+        f.write(np.array([CHECK_VALUES[dataFormat]], dtype=dtype).tobytes())
+
+        # The data is stored with x varying fastest, so each block of z-layers is written with its axes reversed
+        for k0 in range(0, nodes[2], chunkSize):
+            f.write(np.ascontiguousarray(np.transpose(mArray[:, :, k0:k0 + chunkSize], (2, 1, 0, 3)), dtype=dtype).tobytes())
+
+        f.write(f'\n# End: Data Binary {dataFormat}\n# End: Segment\n'.encode())
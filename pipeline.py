@@ -0,0 +1,321 @@
+###########################################################
+# Pipelines from textures to glyphs, in fixed-size chunks #
+###########################################################
+
+# The scripts compute a whole texture, colour it and draw it in one go, so none of it can be reused without Blender.
+# Here each step is a generator over chunks of points: a chunk is a dictionary of arrays with one row per point, always
+# with 'ids' (the indices of the points in the full grid), 'positions' and 'directions', and optionally 'values' (e.g.
+# the helicity) and 'colours'. Sources compute (or read) the texture one chunk at a time, transforms filter or add to
+# each chunk as it passes, and sinks consume the chunks, e.g.
+#
+#     chunks = hopfionSource(X, Y, Z, L, R, w)
+#     chunks = mask(chunks, lambda chunk: isInTube(*chunk['positions'].T, L, R))
+#     chunks = colourMap(chunks, 'hsv', vmin=-np.pi, vmax=np.pi, periodic=True, key='values')
+#     plySink(chunks, 'tube.ply')
+#
+# Nothing runs until the sink asks for the chunks, and only one chunk is held at a time, so the peak memory does not grow
+# with the size of the texture (apart from blenderSink() and gltfSink(), which need all of the glyphs at once).
+# Everything apart from blenderSink() only needs NumPy (not bpy).
+
+import os
+import shutil
+import zipfile
+import tempfile
+import numpy as np
+from textures import skyrmionField, hopfionTube
+from spheres import sphereField
+from volumes import getGridShape, getChunks, loadSlab
+from vectors import applyColourMap
+from colourmaps import getColourMap
+from exporters import writeGLTF
+
+# Default number of points in each chunk
+CHUNK_SIZE = 2**16
+
+
+def skyrmionSource(skyrmions, X, Y, chunkSize=CHUNK_SIZE):
+
+    """ Chunks of the texture made up of several skyrmions (see textures.skyrmionField()) on a 2D grid in the plane z = 0.
+
+    Args:
+        skyrmions: List of Skyrmion objects
+        X, Y: 1D arrays of the grid coordinates along each axis
+        chunkSize: Number of points in each chunk
+    """
+
+    X, Y = np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64)
+
+    for ids in _gridChunks((len(X), len(Y)), chunkSize):
+        i, j = np.unravel_index(ids, (len(X), len(Y)))
+        positions = np.stack([X[i], Y[j], np.zeros(len(ids))], axis=-1)
+        yield {'ids': ids, 'positions': positions, 'directions': skyrmionField(skyrmions, X[i], Y[j])}
+
+
+def hopfionSource(X, Y, Z, L, R, w, m=1, eta=np.pi/2, hopf_index=1, chunkSize=CHUNK_SIZE):
+
+    """ Chunks of the skyrmion tube bent round into a ring (see textures.hopfionTube()) on a 3D grid, with the helicity as the 'values'.
+
+    Args:
+        X, Y, Z: 1D arrays of the grid coordinates along each axis
+        L, R, w, m, eta, hopf_index: Passed on to textures.hopfionTube()
+        chunkSize: Number of points in each chunk
+    """
+
+    X, Y, Z = [np.asarray(coordinates, dtype=np.float64) for coordinates in (X, Y, Z)]
+
+    for ids in _gridChunks((len(X), len(Y), len(Z)), chunkSize):
+        i, j, k = np.unravel_index(ids, (len(X), len(Y), len(Z)))
+        directions, helicity = hopfionTube(X[i], Y[j], Z[k], L, R, w, m, eta, hopf_index)
+        yield {'ids': ids, 'positions': np.stack([X[i], Y[j], Z[k]], axis=-1), 'directions': directions, 'values': helicity}
+
+
+def sphereSource(R, h, m=1, eta=np.pi/2, N=750, method='fibonacci', chunkSize=CHUNK_SIZE):
+
+    """ Chunks of the skyrmion mapped onto a sphere (see spheres.sphereField()), whose points are all found at once but then passed on in chunks.
+
+    Args:
+        R, h, m, eta, N, method: Passed on to spheres.sphereField()
+        chunkSize: Number of points in each chunk
+    """
+
+    positions, directions = sphereField(R, h, m, eta, N, method)
+
+    for start in range(0, len(positions), chunkSize):
+        ids = np.arange(start, min(start + chunkSize, len(positions)))
+        yield {'ids': ids, 'positions': positions[ids], 'directions': directions[ids]}
+
+
+def ovfSource(path, step=1, origin=(0, 0, 0), spacing=1, chunkSize=CHUNK_SIZE):
+
+    """ Chunks of the magnetization in an OVF file, read a few z-layers at a time.
+
+    Args:
+        path: Path to the file
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+        origin: Position of the point [0, 0, 0]
+        spacing: Distance between neighbouring points (a number, or one per axis)
+        chunkSize: Number of points in each chunk
+    """
+
+    nx, ny, nz, dim = getGridShape(path, step)
+
+    def readLayers():
+        for k0, k1 in getChunks(nz, max(1, chunkSize // (nx * ny))):
+            slab, _ = loadSlab(path, k0, k1, step)
+            i, j, k = [index.ravel() for index in np.meshgrid(np.arange(nx), np.arange(ny), np.arange(k0, k1), indexing='ij')]
+            positions = np.asarray(origin) + np.asarray(spacing) * np.stack([i, j, k], axis=-1)
+            yield {'ids': np.ravel_multi_index((i, j, k), (nx, ny, nz)), 'positions': positions, 'directions': slab.reshape(-1, dim)}
+
+    # Whole z-layers are read at a time, so they are regrouped into chunks of the requested size
+    yield from rechunk(readLayers(), chunkSize)
+
+
+def rechunk(chunks, chunkSize=CHUNK_SIZE):
+
+    """ Regroup chunks of any sizes (e.g. after mask()) into chunks of chunkSize points (apart from the last). """
+
+    pending = []
+    count = 0
+
+    for chunk in chunks:
+
+        pending.append(chunk)
+        count += len(chunk['ids'])
+
+        while count >= chunkSize:
+            merged = _concatenate(pending)
+            yield {key: array[:chunkSize] for key, array in merged.items()}
+            pending = [{key: array[chunkSize:] for key, array in merged.items()}]
+            count -= chunkSize
+
+    if count > 0:
+        yield _concatenate(pending)
+
+
+def subsample(chunks, shape, step):
+
+    """ Keep only every step-th point along each axis of the grid of the given shape (identifying the points by their 'ids'). """
+
+    for chunk in chunks:
+        indices = np.stack(np.unravel_index(chunk['ids'], shape), axis=-1)
+        yield _select(chunk, np.all(indices % np.asarray(step) == 0, axis=-1))
+
+
+def mask(chunks, function):
+
+    """ Keep only the points for which function(chunk) is True, e.g. lambda chunk: textures.isInTube(*chunk['positions'].T, L, R). """
+
+    for chunk in chunks:
+        yield _select(chunk, np.asarray(function(chunk), dtype=bool))
+
+
+def colourMap(chunks, lut, vmin=-1, vmax=1, periodic=False, key=None):
+
+    """ Add the 'colours' of the points, from a colour map (see vectors.applyColourMap()).
+
+    Args:
+        chunks: The chunks
+        lut: Lookup table of RGBA values, or the name of a colour map for colourmaps.getColourMap()
+        vmin, vmax, periodic: Passed on to vectors.applyColourMap()
+        key: Array of the chunks from which the colours are found (e.g. 'values'), or None for the z-component of the directions
+    """
+
+    if isinstance(lut, str):
+        lut = getColourMap(lut)
+
+    for chunk in chunks:
+        values = chunk['directions'][:, 2] if key is None else chunk[key]
+        yield dict(chunk, colours=applyColourMap(values, lut, vmin, vmax, periodic))
+
+
+def collect(chunks):
+
+    """ Join all of the chunks into a single dictionary of arrays. """
+
+    return _concatenate(list(chunks))
+
+
+def blenderSink(chunks, name, **kwargs):
+
+    """ Draw all of the points as a single glyph field in Blender (see glyphs.createGlyphField(), to which kwargs are passed on), returning the object. """
+
+    from glyphs import createGlyphField
+
+    points = collect(chunks)
+
+    return createGlyphField(name, points['positions'], points['directions'], points.get('colours'), points.get('values'), ids=points['ids'], **kwargs)
+
+
+def npzSink(chunks, path):
+
+    """ Save all of the arrays of the chunks to a .npz file (which np.load() reads as usual), returning the number of points.
+
+    Each array is first streamed to a temporary file, and then copied into the archive once its total length is known.
+    """
+
+    temporary = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+    files = {}
+    count = 0
+
+    try:
+        for chunk in chunks:
+
+            for key, array in chunk.items():
+                if key not in files:
+                    files[key] = (open(os.path.join(temporary, key), 'wb'), array.dtype, array.shape[1:])
+                files[key][0].write(np.ascontiguousarray(array, dtype=files[key][1]).tobytes())
+
+            count += len(chunk['ids'])
+
+        with zipfile.ZipFile(path, 'w', allowZip64=True) as archive:
+            for key, (f, dtype, shape) in files.items():
+
+                f.close()
+
+                with archive.open(key + '.npy', 'w', force_zip64=True) as member, open(f.name, 'rb') as data:
+                    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (count,) + shape}
+                    np.lib.format.write_array_header_2_0(member, header)
+                    shutil.copyfileobj(data, member, 2**20)
+
+    finally:
+        for f, _, _ in files.values():
+            f.close()
+        shutil.rmtree(temporary)
+
+    return count
+
+
+def plySink(chunks, path):
+
+    """ Save the points to a binary PLY point cloud, with the directions as normals and the colours (if any) as 8-bit RGBA, returning the number of points. """
+
+    count = 0
+
+    with open(path, 'wb') as f:
+
+        dtype = None
+
+        for chunk in chunks:
+
+            # The layout is set by the first chunk, and the number of points is filled in at the end
+            if dtype is None:
+                dtype, countOffset = _writePLYHeader(f, 'colours' in chunk)
+
+            vertices = np.empty(len(chunk['ids']), dtype=dtype)
+
+            for idx, axis in enumerate('xyz'):
+                vertices[axis] = chunk['positions'][:, idx]
+                vertices['n' + axis] = chunk['directions'][:, idx]
+
+            if 'colours' in chunk:
+                for idx, channel in enumerate(['red', 'green', 'blue', 'alpha']):
+                    vertices[channel] = np.round(255 * np.clip(chunk['colours'][:, idx], 0, 1))
+
+            f.write(vertices.tobytes())
+            count += len(vertices)
+
+        if dtype is None:
+            _, countOffset = _writePLYHeader(f, False)
+
+        f.seek(countOffset)
+        f.write(f'{count:020d}'.encode())
+
+    return count
+
+
+def gltfSink(chunks, path, **kwargs):
+
+    """ Save the points as glyphs in a binary glTF file (see exporters.writeGLTF(), to which kwargs are passed on), returning the number of points. """
+
+    points = collect(chunks)
+    writeGLTF(path, points['positions'], points['directions'], points.get('colours'), **kwargs)
+
+    return len(points['ids'])
+
+
+def _writePLYHeader(f, colours):
+
+    """ Write the header of a binary PLY file, with a placeholder for the number of vertices, returning the vertex dtype and the position of the placeholder. """
+
+    fields = [(name, '<f4') for name in ['x', 'y', 'z', 'nx', 'ny', 'nz']]
+
+    if colours:
+        fields += [(name, 'u1') for name in ['red', 'green', 'blue', 'alpha']]
+
+    f.write(b'ply\nformat binary_little_endian 1.0\nelement vertex ')
+    countOffset = f.tell()
+    f.write(b'0' * 20 + b'\n')
+
+    for name, dtype in fields:
+        f.write(f'property {"float" if dtype == "<f4" else "uchar"} {name}\n'.encode())
+
+    f.write(b'end_header\n')
+
+    return np.dtype(fields), countOffset
+
+
+def _gridChunks(shape, chunkSize):
+
+    """ The flat indices of the points of a grid, chunkSize at a time. """
+
+    total = int(np.prod(shape))
+
+    for start in range(0, total, chunkSize):
+        yield np.arange(start, min(start + chunkSize, total))
+
+
+def _select(chunk, keep):
+
+    """ The points of a chunk for which keep is True. """
+
+    return {key: array[keep] for key, array in chunk.items()}
+
+
+def _concatenate(chunks):
+
+    """ Join chunks into one. """
+
+    if not chunks:
+        return {}
+
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
@@ -0,0 +1,421 @@
+##################################################################
+# Preimages of the analytic hopfion and of sampled magnetization #
+##################################################################
+
+# The preimage of a direction (chi, alpha) of the magnetization is the closed curve made up of all points at which the
+# magnetization points along that direction. For the skyrmion tube bent round into a ring (see textures.hopfionTube()),
+# the preimages can be found analytically as functions of the angle psi around the ring. All functions here broadcast
+# over their arguments, so whole families of preimages can be computed at once (e.g. with chi of shape (K, 1) and psi of
+# shape (P,) to get K preimages sampled at P points each). They only need NumPy (not bpy).
+
+import numpy as np
+
+
+def getXYZ(psi, alpha, chi, L=20, R=5, w=2, m=1, eta=np.pi/2):
+
+    """
+    Position of the point at angle psi around the ring at which the magnetization points along (chi, alpha).
+
+    Args:
+        psi: Angle around the "doughnut" when viewed from above, i.e. to the global x-axis
+        alpha: Global angle of the magnetization from the z-axis
+        chi: Global azimuthal angle of the magnetization
+        L: Skyrmion tube major radius (of "doughnut hole")
+        R: Skyrmion tube minor radius
+        w: Skyrmion domain wall width
+        m: Vorticity
+        eta: Helicity
+
+    Returns:
+        x, y, z, each of the broadcast shape of psi, alpha and chi
+
+    """
+
+    A = np.cos(psi) * np.sin(alpha) * np.cos(chi) + np.sin(psi) * np.sin(alpha) * np.sin(chi)
+    B = -np.sin(psi) * np.sin(alpha) * np.cos(chi) + np.cos(psi) * np.sin(alpha) * np.sin(chi)
+
+    Phi = np.arctan2(np.cos(alpha), A)
+    Theta = np.arccos(B)
+
+    phi = (Phi - eta) / m
+
+    r = w * np.arcsinh(np.sinh(R/w) / np.tan(Theta/2))
+
+    xPrime = r * np.cos(phi)
+    z = r * np.sin(phi)
+
+    x = (L + xPrime) * np.cos(psi)
+    y = (L + xPrime) * np.sin(psi)
+
+    return x, y, z
+
+
+def getTangent(psi, alpha, chi, L=20, R=5, w=2, m=1, eta=np.pi/2):
+
+    """ The derivative of the position from getXYZ() with respect to psi, worked out analytically by the chain rule (arguments as for getXYZ()). """
+
+    A = np.cos(psi) * np.sin(alpha) * np.cos(chi) + np.sin(psi) * np.sin(alpha) * np.sin(chi)
+    B = -np.sin(psi) * np.sin(alpha) * np.cos(chi) + np.cos(psi) * np.sin(alpha) * np.sin(chi)
+
+    Phi = np.arctan2(np.cos(alpha), A)
+    Theta = np.arccos(B)
+
+    phi = (Phi - eta) / m
+
+    u = np.sinh(R/w) / np.tan(Theta/2)
+    r = w * np.arcsinh(u)
+
+    xPrime = r * np.cos(phi)
+
+    # dA/dpsi = B and dB/dpsi = -A, and 1 - B^2 = A^2 + cos^2(alpha)
+    dPhi = -np.cos(alpha) * B / (A**2 + np.cos(alpha)**2)
+    dTheta = A / np.sqrt(A**2 + np.cos(alpha)**2)
+
+    dphi = dPhi / m
+    dr = -w / np.sqrt(1 + u**2) * np.sinh(R/w) / (2 * np.sin(Theta/2)**2) * dTheta
+
+    dxPrime = dr * np.cos(phi) - r * np.sin(phi) * dphi
+    dz = dr * np.sin(phi) + r * np.cos(phi) * dphi
+
+    dx = dxPrime * np.cos(psi) - (L + xPrime) * np.sin(psi)
+    dy = dxPrime * np.sin(psi) + (L + xPrime) * np.cos(psi)
+
+    return dx, dy, dz
+
+
+def getPreimages(chi, alpha, psi, **parameters):
+
+    """
+    Sample many preimages at once.
+
+    Args:
+        chi: (K,) array of the global azimuthal angles of the target directions
+        alpha: (K,) array of the global angles of the target directions from the z-axis
+        psi: (P,) array of the angles around the ring at which each preimage is sampled
+        parameters: Parameters of the hopfion, passed on to getXYZ() (L, R, w, m, eta)
+
+    Returns:
+        points: (K, P, 3) array of the points on each of the preimages
+        tangents: (K, P, 3) array of the derivatives of the points with respect to psi
+        directions: (K, 3) array of the target directions (i.e. the magnetization along each preimage)
+
+    """
+
+    chi = np.atleast_1d(np.asarray(chi, dtype=np.float64))[:, np.newaxis]
+    alpha = np.atleast_1d(np.asarray(alpha, dtype=np.float64))[:, np.newaxis]
+    psi = np.asarray(psi, dtype=np.float64)[np.newaxis, :]
+
+    points = np.stack(np.broadcast_arrays(*getXYZ(psi, alpha, chi, **parameters)), axis=-1)
+    tangents = np.stack(np.broadcast_arrays(*getTangent(psi, alpha, chi, **parameters)), axis=-1)
+
+    directions = np.stack([np.sin(alpha) * np.cos(chi), np.sin(alpha) * np.sin(chi), np.cos(alpha)], axis=-1)[:, 0]
+
+    return points, tangents, directions
+
+
+# The preimages of sampled magnetization (e.g. from a simulation) are found as the intersection of the two isosurfaces
+# m . e1 = 0 and m . e2 = 0 (with e1 and e2 perpendicular to the target direction n), on the side where m . n > 0.
+# Each face of each grid cell is split into two triangles, over which the magnetization is interpolated linearly, and we
+# find the point (if any) at which the intersection pierces each triangle. A preimage passing through a cell enters
+# through one triangle and leaves through another, so each cell with two pierced triangles gives one segment of the
+# preimage. As neighbouring cells share faces, the segments can then be joined up into polylines. The grid is processed
+# in chunks along z (which may be handed to separate worker processes), so only one chunk needs to be in memory at a time.
+
+# Corner offsets (along the two in-plane axes) of the two triangles into which each face is split
+TRIANGLES = [((0, 0), (1, 0), (1, 1)), ((0, 0), (1, 1), (0, 1))]
+
+# The two in-plane axes of faces whose normals are along x, y and z
+FACE_AXES = [(1, 2), (2, 0), (0, 1)]
+
+
+def extractPreimage(mArray, direction, origin=(0, 0, 0), cellSize=(1, 1, 1), maxAngle=np.pi/2, chunkSize=16, workers=1):
+
+    """
+    Find the preimage of a direction in a sampled magnetization, as polylines.
+
+    Args:
+        mArray: Magnetization indexed as [x, y, z, component] (e.g. from textures.hopfionTube() or ovf.loadOVF(); may be memory-mapped)
+        direction: The target direction (need not be normalised)
+        origin: Position of the point mArray[0, 0, 0]
+        cellSize: Spacing of the grid points along x, y and z
+        maxAngle: Triangles across which the magnetization turns by more than this angle are treated as discontinuities (e.g.
+            the singular line of an analytic texture, or a Bloch point) and ignored
+        chunkSize: Number of cells along z processed at a time
+        workers: Number of processes across which the chunks are split (1 to process them in this process)
+
+    Returns:
+        List of (P, 3) arrays of the points along each polyline, and a list of whether each polyline is a closed loop
+
+    """
+
+    n = np.asarray(direction, dtype=np.float64)
+    n = n / np.linalg.norm(n)
+
+    # Two unit vectors perpendicular to n
+    e1 = np.cross(n, [1, 0, 0] if abs(n[0]) < 0.9 else [0, 1, 0])
+    e1 /= np.linalg.norm(e1)
+    e2 = np.cross(n, e1)
+
+    nx, ny, nz, _ = mArray.shape
+    chunks = [(mArray[:, :, k0:min(k0 + chunkSize, nz - 1) + 1], k0, (nx, ny, nz), n, e1, e2, np.cos(maxAngle)) for k0 in range(0, nz - 1, chunkSize)]
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_processChunk, *zip(*chunks)))
+    else:
+        results = [_processChunk(*chunk) for chunk in chunks]
+
+    ids = np.concatenate([result[0] for result in results])
+    points = np.concatenate([result[1] for result in results])
+    segments = np.concatenate([result[2] for result in results])
+
+    # Triangles on the boundaries between chunks appear in both chunks
+    ids, idx = np.unique(ids, return_index=True)
+    points = points[idx]
+    segments = np.searchsorted(ids, segments)
+
+    # Where the preimage dips through a face and straight back, the cells either side both join the same two triangles;
+    # the dip (smaller than a cell) is dropped, so that the rest of the preimage is joined up past it
+    segments, counts = np.unique(np.sort(segments, axis=1), axis=0, return_counts=True)
+    segments = segments[counts == 1]
+
+    polylines, closed = _stitch(len(ids), segments)
+    polylines, closed = _joinEnds(points, polylines, closed, (nx, ny, nz))
+
+    return [np.asarray(origin) + points[polyline] * np.asarray(cellSize) for polyline in polylines], closed
+
+
+def _processChunk(mSlab, k0, shape, n, e1, e2, minCosine):
+
+    """ Find the pierced triangles and segments of the preimage in a slab of cells starting at z-index k0.
+
+    Returns:
+        Global IDs of the pierced triangles, their positions (in units of cells), and (M, 2) array of the pairs of IDs joined by segments
+    """
+
+    mSlab = np.asarray(mSlab, dtype=np.float64)
+    f1 = mSlab @ e1
+    f2 = mSlab @ e2
+    g = mSlab @ n
+
+    nx, ny, nz = shape
+    kc = mSlab.shape[2] - 1  # Number of cells along z in this chunk
+
+    # Global shapes of the arrays of faces with normals along x, y and z
+    faceShapes = [(nx, ny - 1, nz - 1), (nx - 1, ny, nz - 1), (nx - 1, ny - 1, nz)]
+    bases = np.cumsum([0] + [2 * np.prod(faceShape) for faceShape in faceShapes])
+
+    pierced = []
+    faceIds = []
+    allIds = []
+    allPoints = []
+
+    for orientation in range(3):
+
+        flags, positions = _pierceFaces(mSlab, f1, f2, g, orientation, minCosine)
+
+        # Global IDs of the triangles, numbering the faces of each orientation in turn
+        i, j, k, t = np.ogrid[:flags.shape[0], :flags.shape[1], :flags.shape[2], :2]
+        faceShape = faceShapes[orientation]
+        ids = bases[orientation] + ((i * faceShape[1] + j) * faceShape[2] + (k + k0)) * 2 + t
+
+        positions[..., 2] += k0
+
+        pierced.append(flags)
+        faceIds.append(np.broadcast_to(ids, flags.shape))
+        allIds.append(faceIds[-1][flags])
+        allPoints.append(positions[flags])
+
+    # The 12 triangles on the faces of each cell: the faces below and above the cell along x, y and z
+    cellFlags = np.concatenate([
+        pierced[0][:-1], pierced[0][1:],
+        pierced[1][:, :-1], pierced[1][:, 1:],
+        pierced[2][:, :, :-1], pierced[2][:, :, 1:],
+    ], axis=-1).reshape(-1, 12)
+
+    cellIds = np.concatenate([
+        faceIds[0][:-1], faceIds[0][1:],
+        faceIds[1][:, :-1], faceIds[1][:, 1:],
+        faceIds[2][:, :, :-1], faceIds[2][:, :, 1:],
+    ], axis=-1).reshape(-1, 12)
+
+    counts = np.sum(cellFlags, axis=1)
+
+    # Each cell pierced twice gives one segment (the first and last pierced triangles of the cell)
+    single = counts == 2
+    first = np.argmax(cellFlags[single], axis=1)
+    last = 11 - np.argmax(cellFlags[single][:, ::-1], axis=1)
+    rows = np.arange(np.sum(single))
+    segments = [np.stack([cellIds[single][rows, first], cellIds[single][rows, last]], axis=-1)]
+
+    # Rarely, more than one piece of the preimage passes through a cell; the pierced triangles are then just paired up in turn
+    for cell in np.nonzero((counts > 2) & (counts % 2 == 0))[0]:
+        segments.append(cellIds[cell][cellFlags[cell]].reshape(-1, 2))
+
+    return np.concatenate(allIds), np.concatenate(allPoints), np.concatenate(segments)
+
+
+def _pierceFaces(mSlab, f1, f2, g, orientation, minCosine):
+
+    """ Find where the curve f1 = f2 = 0 (with g > 0) pierces the triangles of each face with the given normal, skipping
+    triangles between any two of whose corners the cosine of the angle between the magnetizations is below minCosine.
+
+    Returns:
+        Boolean array of shape faceShape + (2,) of whether each triangle is pierced, and faceShape + (2, 3) array of the
+        positions (in units of cells, relative to the start of the chunk) at which they are pierced
+    """
+
+    axisA, axisB = FACE_AXES[orientation]
+
+    def corner(f, da, db):
+        """ Values at the given corner of every face """
+        slices = [slice(None)] * 3
+        slices[axisA] = slice(da, f.shape[axisA] - 1 + da)
+        slices[axisB] = slice(db, f.shape[axisB] - 1 + db)
+        return f[tuple(slices)]
+
+    faceShape = corner(f1, 0, 0).shape
+    flags = np.zeros(faceShape + (2,), dtype=bool)
+    positions = np.zeros(faceShape + (2, 3))
+
+    # Position of the first corner of every face
+    grid = np.indices(faceShape, dtype=np.float64)
+
+    for t, (A, B, C) in enumerate(TRIANGLES):
+
+        f1a, f1b, f1c = corner(f1, *A), corner(f1, *B), corner(f1, *C)
+        f2a, f2b, f2c = corner(f2, *A), corner(f2, *B), corner(f2, *C)
+        ga, gb, gc = corner(g, *A), corner(g, *B), corner(g, *C)
+
+        # Solve for the barycentric coordinates (u, v) at which both interpolated functions vanish
+        d1b, d1c = f1b - f1a, f1c - f1a
+        d2b, d2c = f2b - f2a, f2c - f2a
+        det = d1b * d2c - d1c * d2b
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = (f2a * d1c - f1a * d2c) / det
+            v = (f1a * d2b - f2a * d1b) / det
+            inside = (det != 0) & (u >= 0) & (v >= 0) & (u + v <= 1)
+            inside &= ga + u * (gb - ga) + v * (gc - ga) > 0
+
+        ma, mb, mc = corner(mSlab, *A), corner(mSlab, *B), corner(mSlab, *C)
+        for mFirst, mSecond in [(ma, mb), (mb, mc), (mc, ma)]:
+            inside &= np.einsum('...i,...i->...', mFirst, mSecond) >= minCosine
+
+        flags[..., t] = inside
+
+        for axis in range(3):
+            positions[..., t, axis] = grid[axis]
+
+        with np.errstate(invalid='ignore'):
+            positions[..., t, axisA] += A[0] + u * (B[0] - A[0]) + v * (C[0] - A[0])
+            positions[..., t, axisB] += A[1] + u * (B[1] - A[1]) + v * (C[1] - A[1])
+
+    return flags, positions
+
+
+def _stitch(numPoints, segments):
+
+    """ Join up segments (pairs of point indices) into polylines, given that each point belongs to at most two segments.
+
+    Returns:
+        List of arrays of the point indices along each polyline, and a list of whether each polyline is closed
+    """
+
+    neighbours = [[] for _ in range(numPoints)]
+
+    for a, b in segments:
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+
+    visited = np.zeros(numPoints, dtype=bool)
+    polylines = []
+    closed = []
+
+    # Open polylines start from their ends (points with only one neighbour); closed loops can start anywhere
+    starts = [point for point in range(numPoints) if len(neighbours[point]) == 1] + list(range(numPoints))
+
+    for start in starts:
+
+        if visited[start] or not neighbours[start]:
+            continue
+
+        polyline = [start]
+        visited[start] = True
+        previous, current = None, start
+
+        while True:
+
+            following = [point for point in neighbours[current] if point != previous and not visited[point]]
+
+            if not following:
+                break
+
+            previous, current = current, following[0]
+            polyline.append(current)
+            visited[current] = True
+
+        polylines.append(np.array(polyline))
+        closed.append(len(polyline) > 2 and start in neighbours[current])
+
+    return polylines, closed
+
+
+def _joinEnds(points, polylines, closed, shape):
+
+    """ Join open polylines whose ends meet, i.e. lie within a cell of each other (where a cell was pierced an odd number
+    of times, e.g. by the preimage passing through an edge shared by two triangles, so that it gave no segment). Ends on
+    the outer faces of the grid, where the preimage leaves the sample, are left as they are.
+
+    Args:
+        points: (N, 3) array of the positions of the pierced triangles (in units of cells)
+        polylines, closed: As returned by _stitch()
+        shape: Shape (nx, ny, nz) of the grid
+
+    Returns:
+        The polylines and whether each is closed, as for _stitch()
+    """
+
+    polylines, closed = list(polylines), list(closed)
+
+    def isInterior(point):
+        return np.all((points[point] > 0) & (points[point] < np.asarray(shape) - 1))
+
+    while True:
+
+        # The loose ends, as (polyline, whether it is the last point) pairs
+        ends = [(idx, last) for idx, polyline in enumerate(polylines) if not closed[idx] for last in (False, True)
+                if isInterior(polyline[-1 if last else 0])]
+
+        # The closest pair of ends within a cell diagonal of each other (the two ends of a single piece only if it has enough points to make a loop)
+        best, pair = np.sqrt(3), None
+
+        for a in range(len(ends)):
+            for b in range(a + 1, len(ends)):
+
+                (idxA, lastA), (idxB, lastB) = ends[a], ends[b]
+
+                if idxA == idxB and len(polylines[idxA]) < 3:
+                    continue
+
+                distance = np.linalg.norm(points[polylines[idxA][-1 if lastA else 0]] - points[polylines[idxB][-1 if lastB else 0]])
+
+                if distance <= best:
+                    best, pair = distance, (ends[a], ends[b])
+
+        if pair is None:
+            return polylines, closed
+
+        (idxA, lastA), (idxB, lastB) = pair
+
+        if idxA == idxB:
+            closed[idxA] = True
+            continue
+
+        # Orient the pieces so that the end of the first meets the start of the second
+        first = polylines[idxA] if lastA else polylines[idxA][::-1]
+        second = polylines[idxB] if not lastB else polylines[idxB][::-1]
+
+        polylines[idxA] = np.concatenate([first, second])
+        del polylines[idxB], closed[idxB]
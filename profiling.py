@@ -0,0 +1,104 @@
+#######################################
+# Time the stages of building a scene #
+#######################################
+
+# A script creates a Profiler and wraps each of its stages (loading files, the NumPy maths, drawing the glyphs,
+# keyframing, saving...) in "with profiler.stage('name'):". For each stage, the wall time, the number of times it was
+# entered and the peak memory use (resident set size) of the process are recorded, and can then be printed as a table
+# or written to a JSON file, to compare runs on real data. This only needs the standard library (not bpy).
+
+import sys
+import json
+import time
+import functools
+import contextlib
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def getPeakRSS():
+
+    """ The largest resident set size of this process so far, in bytes (or None if it cannot be found). """
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss is in bytes on macOS, but in kilobytes on Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Profiler:
+
+    def __init__(self):
+        self.stages = {}  # Totals for each stage, in the order in which the stages were first entered
+
+    @contextlib.contextmanager
+    def stage(self, name):
+
+        """ Context manager timing the code within it as part of the named stage (whose totals add up if it is entered more than once). """
+
+        record = self.stages.setdefault(name, {'time': 0.0, 'calls': 0, 'peakRSS': None, 'peakIncrease': 0})
+
+        peakBefore = getPeakRSS()
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            record['time'] += time.perf_counter() - start
+            record['calls'] += 1
+
+            peakAfter = getPeakRSS()
+
+            # As the peak can only rise, a stage which raises it is one which needs more memory than any stage before it
+            if peakAfter is not None:
+                record['peakRSS'] = peakAfter
+                record['peakIncrease'] += peakAfter - peakBefore
+
+    def timed(self, name=None):
+
+        """ Decorator timing every call of a function as part of the named stage (the function's name by default). """
+
+        def decorator(function):
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or function.__name__):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self):
+
+        """ The totals of all of the stages as a table. """
+
+        total = sum(record['time'] for record in self.stages.values())
+        width = max([len(name) for name in self.stages] + [len('total')])
+
+        lines = [f'{"stage":<{width}} {"time (s)":>10} {"%":>6} {"calls":>6} {"peak RSS (MB)":>14} {"increase (MB)":>14}']
+
+        for name, record in self.stages.items():
+
+            fraction = 100 * record['time'] / total if total > 0 else 0
+            peak = '' if record['peakRSS'] is None else f'{record["peakRSS"] / 2**20:.1f}'
+            increase = '' if record['peakRSS'] is None else f'{record["peakIncrease"] / 2**20:.1f}'
+
+            lines.append(f'{name:<{width}} {record["time"]:>10.3f} {fraction:>6.1f} {record["calls"]:>6} {peak:>14} {increase:>14}')
+
+        lines.append(f'{"total":<{width}} {total:>10.3f}')
+
+        return '\n'.join(lines)
+
+    def dump(self, path):
+
+        """ Write the totals of all of the stages to a JSON file. """
+
+        with open(path, 'w') as f:
+            json.dump({'platform': sys.platform, 'stages': self.stages}, f, indent=4)
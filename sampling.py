@@ -0,0 +1,179 @@
+#############################################################
+# Choose where to draw glyphs, for a fixed budget of glyphs #
+#############################################################
+
+# Drawing a glyph at every step-th grid point wastes most of the glyphs on uniform regions, while domain walls get too
+# few. Instead, each grid point is given a weight, the relative density of glyphs wanted around it (higher where the
+# magnetization changes quickly, and lower far from the camera), and the points are chosen from a hierarchy of
+# successively finer grids: every point belongs to the coarsest grid (stride 2^level) on which it lies, and is kept
+# wherever that grid is at least as fine as the weight asks for. The glyphs are therefore still laid out on regular
+# grids (so uniform regions look as they did with a fixed stride), refined by factors of two around the walls. The
+# selection only depends on the weights, so it is the same every time the script is run. These only need NumPy (not bpy).
+
+import numpy as np
+
+
+def gradientMagnitude(mArray, cellSize=1):
+
+    """ Magnitude of the gradient of the magnetization, i.e. how quickly it turns, at each grid point.
+
+    Args:
+        mArray: Magnetization indexed as [x, y, component] or [x, y, z, component]
+        cellSize: Spacing of the grid points (a number, or one per axis)
+
+    Returns:
+        Array of the shape of the grid (mArray.shape[:-1])
+    """
+
+    mArray = np.asarray(mArray)
+    dims = mArray.ndim - 1
+    cellSize = np.broadcast_to(cellSize, (dims,))
+
+    squared = np.zeros(mArray.shape[:-1])
+
+    for axis in range(dims):
+        if mArray.shape[axis] > 1:
+            squared += np.sum(np.gradient(mArray, cellSize[axis], axis=axis)**2, axis=-1)
+
+    return np.sqrt(squared)
+
+
+def getWeights(mArray, cellSize=1, floor=0.05, positions=None, cameraPosition=None):
+
+    """ Relative density of glyphs wanted at each grid point.
+
+    The weight is proportional to the gradient of the magnetization (but no less than floor times its largest value, so
+    that uniform regions are still drawn sparsely) and, if a camera position is given, inversely proportional to the
+    distance from the camera (so that the glyphs are spread evenly over the image rather than over the sample).
+
+    Args:
+        mArray: Magnetization indexed as [x, y, component] or [x, y, z, component]
+        cellSize: Spacing of the grid points (a number, or one per axis)
+        floor: Smallest weight due to the gradient, relative to the largest
+        positions: Array of the positions of the grid points, of shape mArray.shape (needed for cameraPosition)
+        cameraPosition: Position of the camera, or None to ignore the distance to the camera
+
+    Returns:
+        Array of the shape of the grid, with values of at most 1
+    """
+
+    gradient = gradientMagnitude(mArray, cellSize)
+    weights = np.maximum(gradient / max(np.max(gradient), np.finfo(float).tiny), floor)
+
+    if cameraPosition is not None:
+        distance = np.linalg.norm(np.asarray(positions) - np.asarray(cameraPosition), axis=-1)
+        weights *= np.min(distance) / np.maximum(distance, np.min(distance))
+
+    return weights
+
+
+def frustumMask(positions, matrix, margin=0.05):
+
+    """ Find which points are within the view of the camera.
+
+    Args:
+        positions: (..., 3) array of positions in global coordinates
+        matrix: 4x4 array mapping global to clip coordinates, i.e. the camera's projection matrix times its view matrix
+            (see utils.getCameraMatrix())
+        margin: Fraction by which the field of view is widened, so that glyphs just outside the edge (which may still be
+            partly visible) are kept
+
+    Returns:
+        Boolean array of shape positions.shape[:-1]
+    """
+
+    positions = np.asarray(positions, dtype=np.float64)
+    matrix = np.asarray(matrix, dtype=np.float64)
+
+    clip = positions @ matrix[:3, :3].T + matrix[:3, 3]
+    w = positions @ matrix[3, :3] + matrix[3, 3]
+
+    return (w > 0) & np.all(np.abs(clip) <= (1 + margin) * w[..., np.newaxis], axis=-1)
+
+
+def sampleGrid(weights, budget, mask=None):
+
+    """ Choose at most budget of the grid points, more densely where the weights are higher.
+
+    Args:
+        weights: Array (of the shape of the grid) of the relative density of glyphs wanted at each point
+        budget: Largest number of points chosen, or None to choose all of the points
+        mask: Boolean array of the shape of the grid, of the points which may be chosen (e.g. from frustumMask()), or None for all
+
+    Returns:
+        Boolean array of the shape of the grid, of the chosen points
+    """
+
+    weights = np.asarray(weights, dtype=np.float64)
+    allowed = (weights > 0) if mask is None else (weights > 0) & mask
+
+    if budget is None or np.count_nonzero(allowed) <= budget:
+        return allowed
+
+    # A point on a grid of stride 2^level is kept if that stride is no larger than the spacing wanted, 1/weight (up to
+    # an overall factor, which is set by the budget), i.e. if level + log2(weight) is large enough
+    with np.errstate(divide='ignore'):
+        score = _getLevels(weights.shape) + np.log2(weights)
+
+    score[~allowed] = -np.inf
+
+    return _getChosen(score, budget)
+
+
+def _getChosen(score, budget):
+
+    """ Choose the points with the highest scores, at most budget of them.
+
+    The threshold is the score of the budget-th point; points with that exact score (typically a whole level of a uniform
+    region) are dropped together, rather than keeping some of them, so that no region is left half-filled. Only if no point
+    scores higher than the threshold are some of them kept, which are then the first budget of them (in flat order).
+
+    Args:
+        score: Array of the scores of the points
+        budget: Largest number of points chosen
+
+    Returns:
+        Boolean array of the shape of score, of the chosen points
+    """
+
+    if budget <= 0:
+        return np.zeros(np.shape(score), dtype=bool)
+
+    threshold = np.partition(score, -budget, axis=None)[-budget]
+    chosen = score > threshold
+
+    if not np.any(chosen):
+        chosen.flat[np.flatnonzero(score == threshold)[:budget]] = True
+
+    return chosen
+
+
+def _getLevels(shape):
+
+    """ The level of each point of a grid: the largest L such that the point lies on the grid of stride 2^L. """
+
+    levels = None
+
+    for axis, n in enumerate(shape):
+        axisLevels = _getAxisLevels(n).reshape([-1 if i == axis else 1 for i in range(len(shape))])
+        levels = axisLevels if levels is None else np.minimum(levels, axisLevels)
+
+    return levels
+
+
+def _getAxisLevels(n):
+
+    """ The level of each index along an axis of n points. """
+
+    # A single point places no limit on the level, so that e.g. a film one layer thick is sampled just as in 2D
+    if n == 1:
+        return np.full(1, np.iinfo(np.int64).max)
+
+    index = np.arange(n)
+    maxLevel = int(np.ceil(np.log2(max(n, 2))))
+
+    # The number of trailing zeros in the binary representation of the index (with 0 on the coarsest grid)
+    axisLevels = np.full(n, maxLevel)
+    axisLevels[1:] = np.log2(index[1:] & -index[1:]).astype(int)
+
+    return axisLevels
@@ -0,0 +1,150 @@
+################################################################
+# Points spread evenly over a sphere, and fields defined on it #
+################################################################
+
+# The sphere in Stereographic.py used to be built ring by ring, with one operator call per cone. The functions here
+# return the angles of all of the points at once (either on rings, with the algorithm from
+# https://www.cmu.edu/biolphys/deserno/pdf/sphere_equi.pdf, or on a Fibonacci lattice), so the whole field can be drawn
+# as a single instanced object (see glyphs.createGlyphField()). They only need NumPy (not bpy).
+
+import numpy as np
+
+
+def desernoSphere(N):
+
+    """ Angles of roughly N points spread evenly over a sphere, on rings of constant polar angle.
+
+    Args:
+        N: Approximate number of points (the exact number depends on how many fit onto each ring)
+
+    Returns:
+        theta: Array of the polar angles of the points
+        phi: Array of the azimuthal angles of the points
+    """
+
+    a = 4 * np.pi / N
+    d = np.sqrt(a)
+    M_theta = int(np.round(np.pi / d))
+    d_theta = np.pi / M_theta
+    d_phi = a / d_theta
+
+    ringTheta = np.pi * (np.arange(M_theta) + 0.5) / M_theta
+    M_phi = np.round(2 * np.pi * np.sin(ringTheta) / d_phi).astype(int)
+
+    # The index of each point within its ring
+    j = np.arange(np.sum(M_phi)) - np.repeat(np.cumsum(M_phi) - M_phi, M_phi)
+
+    theta = np.repeat(ringTheta, M_phi)
+    phi = 2 * np.pi * j / np.repeat(M_phi, M_phi)
+
+    return theta, phi
+
+
+def fibonacciSphere(N):
+
+    """ Angles of exactly N points spread evenly over a sphere, on a Fibonacci lattice (each point encloses the same area).
+
+    Args:
+        N: Number of points
+
+    Returns:
+        theta: Array of the polar angles of the points
+        phi: Array of the azimuthal angles of the points
+    """
+
+    i = np.arange(N)
+    goldenRatio = (1 + np.sqrt(5)) / 2
+
+    theta = np.arccos(1 - 2 * (i + 0.5) / N)
+    phi = np.mod(2 * np.pi * i / goldenRatio, 2 * np.pi)
+
+    return theta, phi
+
+
+def sphereField(R, h, m=1, eta=np.pi/2, N=750, method='fibonacci'):
+
+    """ Positions and magnetization of a skyrmion wrapped around a sphere (the magnetization at each point points radially
+    outwards, turned about the z-axis by the vorticity and helicity), before it is stereographically projected onto the plane.
+
+    Args:
+        R: Radius of the sphere
+        h: Height of sphere above the plane (i.e. tangent to the plane for h=0)
+        m: Vorticity/skyrmion winding number
+        eta: Skyrmion helicity
+        N: (Approximate) number of points
+        method: How the points are spread over the sphere, either 'fibonacci' or 'deserno' (see fibonacciSphere() and desernoSphere())
+
+    Returns:
+        positions: (N, 3) array of the points on the sphere
+        directions: (N, 3) array of the magnetization at the points
+    """
+
+    if method == 'fibonacci':
+        theta, phi = fibonacciSphere(N)
+    elif method == 'deserno':
+        theta, phi = desernoSphere(N)
+    else:
+        raise ValueError(f'Unknown method {method}')
+
+    Phi = m * phi + eta
+
+    positions = np.stack([R*np.cos(phi)*np.sin(theta), R*np.sin(phi)*np.sin(theta), R + h + R*np.cos(theta)], axis=-1)
+    directions = np.stack([np.cos(Phi)*np.sin(theta), np.sin(Phi)*np.sin(theta), np.cos(theta)], axis=-1)
+
+    return positions, directions
+
+
+def planeField(R, h, x, y, m=1, eta=np.pi/2):
+
+    """ Magnetization of the skyrmion in the z=0 plane, from stereographic projection from a sphere tangential to the plane.
+
+    Args:
+        R: Radius of the sphere
+        h: Height of sphere above the plane (i.e. tangent to the plane for h=0)
+        x: Array of x-values
+        y: Array of y-values (of the same shape as x)
+        m: Vorticity/skyrmion number
+        eta: Helicity
+
+    Returns:
+        Array of the magnetization, of shape x.shape + (3,)
+    """
+
+    phi = np.arctan2(y, x)
+    r = np.sqrt(x**2 + y**2)
+
+    # Angle between corresponding point on sphere and vertical
+    alpha = np.arctan(r/(h+2*R))
+
+    Theta = np.pi - 2*alpha
+    Phi = m * phi + eta
+
+    return np.stack([np.cos(Phi)*np.sin(Theta), np.sin(Phi)*np.sin(Theta), np.cos(Theta)], axis=-1)
+
+
+def stereographicProjection(positions, R, h):
+
+    """ Project points on the sphere onto the z=0 plane, from the top of the sphere.
+
+    Each point moves along the straight line from the top of the sphere, so the magnetization at the projected point is the
+    same as at the point on the sphere (c.f. planeField()).
+
+    Args:
+        positions: (N, 3) array of points on the sphere (e.g. from sphereField())
+        R: Radius of the sphere
+        h: Height of sphere above the plane (i.e. tangent to the plane for h=0)
+
+    Returns:
+        (N, 3) array of the projected points (infinite for the top of the sphere itself)
+    """
+
+    positions = np.asarray(positions, dtype=np.float64)
+    top = np.array([0, 0, h + 2*R])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = top[2] / (top[2] - positions[:, 2:3])
+
+    projected = top + t * (positions - top)
+    projected[:, 2] = 0
+
+    return projected
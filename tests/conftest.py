@@ -0,0 +1,65 @@
+# The shared modules live in the root of the repository, and are imported from there as by the scripts
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textures import hopfionTube
+
+
+def smoothField(shape=(24, 20, 12), phase=0):
+
+    """ A smoothly turning unit vector field on a grid of the given shape (with differing sizes along each axis, so that mixing them up shows). """
+
+    x, y, z = np.meshgrid(*[np.linspace(0, 1, n) for n in shape], indexing='ij')
+
+    theta = 2 * z + 0.5 + 0.3 * np.sin(5 * y)
+    phi = 3 * x + y + phase
+
+    return np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)], axis=-1)
+
+
+def hopfionGrid(shape=(24, 20, 12), L=8, R=3, w=1, hopf_index=1):
+
+    """ The skyrmion tube from textures.hopfionTube() on a small grid of the given shape. """
+
+    X, Y, Z = [np.linspace(-1.6*L, 1.6*L, n) for n in shape[:2]] + [np.linspace(-0.8*L, 0.8*L, shape[2])]
+    x, y, z = np.meshgrid(X, Y, Z, indexing='ij')
+
+    return hopfionTube(x, y, z, L, R, w, hopf_index=hopf_index)[0]
+
+
+def writeTestOVF(path, mArray, dataFormat=8):
+
+    """ Write an array to an OVF 2.0 file with binary data, as MuMax does (independently of ovf.py, so that the loader is not only tested against its own writer). """
+
+    nx, ny, nz, dim = mArray.shape
+    dtype = np.dtype(f'<f{dataFormat}')
+
+    header = ['OOMMF OVF 2.0', 'Segment count: 1', 'Begin: Segment', 'Begin: Header', 'Title: m', 'meshtype: rectangular', 'meshunit: m']
+    header += [f'{axis}min: 0' for axis in 'xyz'] + [f'{axis}max: {n}e-09' for axis, n in zip('xyz', (nx, ny, nz))]
+    header += [f'valuedim: {dim}', 'valuelabels: m_x m_y m_z', 'valueunits: 1 1 1']
+    header += [f'{axis}base: 5e-10' for axis in 'xyz'] + [f'{axis}nodes: {n}' for axis, n in zip('xyz', (nx, ny, nz))]
+    header += [f'{axis}stepsize: 1e-09' for axis in 'xyz'] + ['End: Header', f'Begin: Data Binary {dataFormat}']
+
+    with open(path, 'wb') as f:
+        f.write(''.join(f'# {line}\n' for line in header).encode())
+        f.write(np.array([{4: 1234567.0, 8: 123456789012345.0}[dataFormat]], dtype=dtype).tobytes())
+        f.write(np.ascontiguousarray(mArray.transpose(2, 1, 0, 3), dtype=dtype).tobytes())
+        f.write(f'\n# End: Data Binary {dataFormat}\n# End: Segment\n'.encode())
+
+
+@pytest.fixture
+def ovfSeries(tmp_path):
+
+    """ Paths to a series of three OVF files of slightly different textures, and the arrays written to them. """
+
+    frames = np.stack([smoothField(phase=frame) for frame in range(3)])
+    paths = [str(tmp_path / f'm{frame:06d}.ovf') for frame in range(len(frames))]
+
+    for path, frame in zip(paths, frames):
+        writeTestOVF(path, frame)
+
+    return paths, frames
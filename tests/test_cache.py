@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pytest
+from cache import cached, evict
+
+
+def field(n, scale=1):
+    return scale * np.arange(n, dtype=np.float64), np.ones((n, 3))
+
+
+def testHitAndMissAgree(tmp_path):
+
+    function = cached(field, directory=str(tmp_path))
+
+    # Both the first call (which computes the result) and the second (which loads it) give read-only memory-mapped arrays
+    fresh = function(5, scale=2)
+    loaded = function(5, scale=2)
+
+    for result in (fresh, loaded):
+        assert isinstance(result, tuple) and len(result) == 2
+        assert all(isinstance(array, np.memmap) and not array.flags.writeable for array in result)
+
+    assert np.array_equal(fresh[0], 2 * np.arange(5)) and np.array_equal(loaded[0], fresh[0])
+
+    with pytest.raises(ValueError):
+        loaded[0][0] = 1
+
+
+def testKeys(tmp_path):
+
+    function = cached(field, directory=str(tmp_path))
+
+    function(5)
+    function(5, scale=2)
+    function(np.int64(5))
+    function(5)
+
+    # One result for each distinct set of arguments
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def testOnlyArrays(tmp_path):
+
+    with pytest.raises(TypeError):
+        cached(lambda: 1, directory=str(tmp_path))()
+
+
+def testEvict(tmp_path):
+
+    function = cached(field, directory=str(tmp_path), maxSize=10**9)
+
+    for n in range(1, 4):
+        function(1000 * n)
+
+    # Using the smallest result again keeps it, while the others are deleted least recently used first
+    function(1000)
+    size = sum(entry.stat().st_size for directory in os.scandir(tmp_path) for entry in os.scandir(directory.path))
+    evict(str(tmp_path), size - 1)
+
+    remaining = os.listdir(tmp_path)
+    assert len(remaining) == 2
+    assert np.array_equal(function(1000)[0], np.arange(1000)) and len(os.listdir(tmp_path)) == 2
+
+
+def testEvictStaleTemporaryDirectories(tmp_path):
+
+    stale = tmp_path / '.stale'
+    recent = tmp_path / '.recent'
+    stale.mkdir()
+    recent.mkdir()
+    os.utime(stale, (0, 0))
+
+    evict(str(tmp_path))
+
+    # Only those old enough that nothing can still be writing them are deleted
+    assert not stale.exists() and recent.exists()
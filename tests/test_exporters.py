@@ -0,0 +1,106 @@
+import json
+import struct
+import numpy as np
+import pytest
+from exporters import getGlyphMesh, writeGLTF, writePLY, _getRotationMatrices
+
+
+def readGLB(path):
+
+    """ The JSON document of a binary glTF file, and a function returning the array of each accessor. """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, length = struct.unpack('<4sII', data[:12])
+    assert (magic, version, length) == (b'glTF', 2, len(data))
+
+    documentLength, _ = struct.unpack('<I4s', data[12:20])
+    document = json.loads(data[20:20 + documentLength])
+    binary = data[28 + documentLength:]
+
+    def accessor(idx):
+        accessor = document['accessors'][idx]
+        view = document['bufferViews'][accessor['bufferView']]
+        values = np.frombuffer(binary[view['byteOffset']:view['byteOffset'] + view['byteLength']], {5126: '<f4', 5125: '<u4'}[accessor['componentType']])
+        return values.reshape(accessor['count'], -1)
+
+    return document, accessor
+
+
+@pytest.mark.parametrize('glyph', ['CONE', 'ARROW'])
+def testGlyphMesh(glyph):
+
+    positions, normals, triangles = getGlyphMesh(glyph, 16)
+
+    # The triangles wind anticlockwise seen from outside, i.e. their normals agree with those of their vertices
+    a, b, c = positions[triangles].transpose(1, 0, 2)
+    assert np.all(np.einsum('ij,ij->i', np.cross(b - a, c - a), normals[triangles].mean(axis=1)) > 0)
+    assert np.allclose(np.linalg.norm(normals, axis=1), 1)
+
+    # The glyph points along +z, i.e. its tip lies on the z-axis
+    assert np.allclose(positions[positions[:, 2] == positions[:, 2].max(), :2], 0)
+
+
+def testGLTF(tmp_path):
+
+    rng = np.random.default_rng(0)
+    positions = rng.normal(size=(6, 3))
+    directions = rng.normal(size=(6, 3))
+    directions[:2] = [[0, 0, 1], [0, 0, -1]]  # Rotations by 0 and pi
+    colours = rng.random((6, 4))
+
+    writeGLTF(str(tmp_path / 'glyphs.glb'), positions, directions, colours, scale=0.5)
+    document, accessor = readGLB(str(tmp_path / 'glyphs.glb'))
+
+    attributes = document['nodes'][1]['extensions']['EXT_mesh_gpu_instancing']['attributes']
+    translations, rotations, instanceColours = [accessor(attributes[name]) for name in ['TRANSLATION', 'ROTATION', '_COLOR_0']]
+
+    assert np.allclose(translations, positions, atol=1e-6)
+    assert np.allclose(instanceColours, colours[:, :3], atol=1e-6)
+
+    # The rotations are unit quaternions [x, y, z, w] taking the tip of the glyph (along +z) to each direction
+    assert np.allclose(np.linalg.norm(rotations, axis=1), 1, atol=1e-6)
+
+    tip = np.array([0, 0, 1.0])
+    rotatedTips = _getRotationMatrices(rotations[:, [3, 0, 1, 2]]) @ tip
+    assert np.allclose(rotatedTips, directions / np.linalg.norm(directions, axis=1, keepdims=True), atol=1e-5)
+
+    # The mesh is stored once, at the given scale
+    glyphPositions, _, triangles = getGlyphMesh('CONE', 32)
+    assert np.allclose(accessor(0), 0.5 * glyphPositions, atol=1e-6)
+    assert np.array_equal(accessor(2).reshape(-1, 3), triangles)
+
+    # The root node turns Blender's z-up to glTF's y-up, by -90 degrees about x
+    assert np.allclose(document['nodes'][0]['rotation'], [-np.sqrt(0.5), 0, 0, np.sqrt(0.5)])
+
+
+def testEmptyGLTF(tmp_path):
+
+    with pytest.raises(ValueError):
+        writeGLTF(str(tmp_path / 'glyphs.glb'), np.empty((0, 3)), np.empty((0, 3)))
+
+
+def testPLY(tmp_path):
+
+    rng = np.random.default_rng(1)
+    positions = rng.normal(size=(5, 3))
+    directions = rng.normal(size=(5, 3))
+
+    writePLY(str(tmp_path / 'glyphs.ply'), positions, directions, glyph='ARROW', vertices=8)
+
+    with open(str(tmp_path / 'glyphs.ply'), 'rb') as f:
+        data = f.read()
+
+    header, body = data.split(b'end_header\n')
+    glyphPositions, _, triangles = getGlyphMesh('ARROW', 8)
+
+    assert f'element vertex {5 * len(glyphPositions)}'.encode() in header
+    assert f'element face {5 * len(triangles)}'.encode() in header
+
+    vertices = np.frombuffer(body[:5 * len(glyphPositions) * 24], '<f4').reshape(5, len(glyphPositions), 6)
+    assert len(body) == 5 * len(glyphPositions) * 24 + 5 * len(triangles) * 13
+
+    # The tip of each arrow lies 3 along its direction from its point
+    tips = vertices[:, np.argmax(glyphPositions[:, 2]), :3]
+    assert np.allclose(tips, positions + 3 * directions / np.linalg.norm(directions, axis=1, keepdims=True), atol=1e-5)
@@ -0,0 +1,32 @@
+import sys
+import pytest
+from farm import findBlender, blenderCommand, runCommands
+
+
+def testFindBlender(monkeypatch):
+
+    monkeypatch.setenv('BLENDER', '/opt/blender/blender')
+
+    assert findBlender() == '/opt/blender/blender'
+
+
+def testBlenderCommand():
+
+    command = blenderCommand('scene.blend', ['-s', 1, '-e', 10, '-a'], ['hopf_index=2'], blender='blender', threads=4)
+
+    # The number of threads comes before the arguments which render, and the script's arguments come last
+    assert command == ['blender', '-b', 'scene.blend', '-t', '4', '-s', '1', '-e', '10', '-a', '--', 'hopf_index=2']
+    assert blenderCommand('scene.blend', blender='blender') == ['blender', '-b', 'scene.blend']
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def testRunCommands(tmp_path, workers):
+
+    commands = [[sys.executable, '-c', f'import sys; print({idx}); sys.exit({idx % 2})'] for idx in range(4)]
+    logs = [str(tmp_path / f'{idx}.log') for idx in range(4)]
+
+    assert runCommands(commands, workers, logs) == [0, 1, 0, 1]
+
+    for idx, log in enumerate(logs):
+        with open(log) as f:
+            assert f.read().strip() == str(idx)
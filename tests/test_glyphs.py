@@ -0,0 +1,146 @@
+import sys
+import types
+import importlib
+import numpy as np
+import pytest
+
+
+class KeyframePoints:
+
+    """ Stands in for FCurve.keyframe_points, storing the (frame, value) pairs as an array. """
+
+    def __init__(self):
+        self.co = np.empty((0, 2), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.co)
+
+    def add(self, count):
+        self.co = np.concatenate([self.co, np.zeros((count, 2), dtype=np.float32)])
+
+    def foreach_set(self, key, values):
+        self.co = np.asarray(values, dtype=np.float32).reshape(-1, 2).copy()
+
+    def clear(self):
+        self.co = np.empty((0, 2), dtype=np.float32)
+
+
+class FCurve:
+
+    def __init__(self, dataPath, index):
+        self.data_path = dataPath
+        self.array_index = index
+        self.keyframe_points = KeyframePoints()
+
+    def update(self):
+        pass
+
+
+class FCurves(list):
+
+    """ Stands in for Action.fcurves before Blender 4.4, where creating an F-curve which already exists is an error. """
+
+    def find(self, dataPath, index=0):
+        return next((fcurve for fcurve in self if fcurve.data_path == dataPath and fcurve.array_index == index), None)
+
+    def new(self, dataPath, index=0):
+
+        if self.find(dataPath, index) is not None:
+            raise RuntimeError(f'F-Curve \'{dataPath}[{index}]\' already exists in action')
+
+        self.append(FCurve(dataPath, index))
+
+        return self[-1]
+
+
+class Mesh:
+
+    def __init__(self, name):
+        self.name = name
+        self.animation_data = None
+
+    def animation_data_create(self):
+        self.animation_data = types.SimpleNamespace(action=None)
+
+
+@pytest.fixture
+def glyphs(monkeypatch):
+
+    """ glyphs.py, imported with a stand-in for the parts of bpy which are used to animate attributes. """
+
+    bpy = types.SimpleNamespace(data=types.SimpleNamespace(actions=types.SimpleNamespace(new=lambda name: types.SimpleNamespace(name=name, fcurves=FCurves()))))
+
+    monkeypatch.setitem(sys.modules, 'bpy', bpy)
+    monkeypatch.delitem(sys.modules, 'glyphs', raising=False)
+
+    return importlib.import_module('glyphs')
+
+
+def testKeyframeAttributeRerun(glyphs):
+
+    mesh = Mesh('Cones')
+    frames = np.array([0, 5, 10])
+    directions = np.random.default_rng(0).normal(size=(len(frames), 4, 3))
+
+    glyphs.keyframeAttribute(mesh, 'direction', frames, directions)
+
+    # Running the script again reuses the F-curves, replacing their keyframes rather than adding to them
+    glyphs.keyframeAttribute(mesh, 'direction', frames, 2 * directions)
+
+    fcurves = mesh.animation_data.action.fcurves
+    assert len(fcurves) == 4 * 3
+
+    fcurve = fcurves.find('attributes["direction"].data[2].vector', index=1)
+    assert np.array_equal(fcurve.keyframe_points.co, np.stack([frames, 2 * directions[:, 2, 1]], axis=-1).astype(np.float32))
+
+
+def testKeyframeAttributeLimit(glyphs):
+
+    frames = np.arange(2)
+    values = np.zeros((len(frames), glyphs.MAX_KEYFRAMED_POINTS + 1))
+
+    with pytest.raises(ValueError):
+        glyphs.keyframeAttribute(Mesh('Cones'), 'value', frames, values)
+
+
+class Points:
+
+    """ Stands in for ShapeKey.data, storing the coordinates as a flat array. """
+
+    def foreach_set(self, key, values):
+        self.co = np.asarray(values, dtype=np.float32).copy()
+
+
+class Object:
+
+    """ Stands in for an object with shape keys, whose new shape keys are renamed (e.g. to Morph.001) if their name is taken. """
+
+    def __init__(self, count):
+        self.data = types.SimpleNamespace(shape_keys=None, vertices=[None] * count)
+
+    def shape_key_add(self, name, from_mix=False):
+
+        if self.data.shape_keys is None:
+            self.data.shape_keys = Mesh('Key')
+            self.data.shape_keys.key_blocks = {}
+
+        keyBlocks = self.data.shape_keys.key_blocks
+        uniqueName = next(candidate for candidate in [name] + [f'{name}.{idx:03d}' for idx in range(1, 1000)] if candidate not in keyBlocks)
+
+        keyBlocks[uniqueName] = types.SimpleNamespace(name=uniqueName, data=Points())
+
+        return keyBlocks[uniqueName]
+
+
+def testMorphGlyphFieldRerun(glyphs):
+
+    obj = Object(4)
+    targets = np.arange(12).reshape(4, 3)
+
+    glyphs.morphGlyphField(obj, targets, 1, 100)
+    shapeKey = glyphs.morphGlyphField(obj, 2 * targets, 1, 100)
+
+    # The second run moves the glyphs with the same shape key, and only that shape key is animated
+    assert list(obj.data.shape_keys.key_blocks) == ['Basis', 'Morph'] and shapeKey.name == 'Morph'
+    assert np.array_equal(shapeKey.data.co, 2 * targets.ravel())
+    assert [fcurve.data_path for fcurve in obj.data.shape_keys.animation_data.action.fcurves] == ['key_blocks["Morph"].value']
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from conftest import hopfionGrid
+from hopf import hopfIndex, topologicalCharge, _hopfIndexSlabs
+from textures import Skyrmion, skyrmionField
+
+
+def referenceHopfIndex(mArray):
+
+    """ The "one-line" calculation which used to be at the end of SkyrmionTube.py, with the sign for arrays indexed as [x, y, z]. """
+
+    mReduced = mArray[:-1, :-1, :-1]
+    mdx = np.diff(mArray, axis=0)[:, :-1, :-1]
+    mdy = np.diff(mArray, axis=1)[:-1, :, :-1]
+    mdz = np.diff(mArray, axis=2)[:-1, :-1, :]
+
+    Fz = np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdx, mdy))
+    Fx = np.einsum('ijkl,ijkl->ijk', mReduced, np.cross(mdy, mdz))
+
+    return np.sum(np.einsum('ijkl,ijkl->ijk', mReduced, np.cumsum(Fz, axis=1)[..., np.newaxis] * np.cross(mdz, mdy) + np.cumsum(Fx, axis=1)[..., np.newaxis] * np.cross(mdx, mdy))) / (4 * np.pi)**2
+
+
+@pytest.mark.parametrize('slabSize', [1, 3, 8, 100])
+@pytest.mark.parametrize('hopf_index', [1, 2])
+def testSlabsMatchReference(slabSize, hopf_index):
+
+    mArray = hopfionGrid(hopf_index=hopf_index)
+
+    assert np.isclose(_hopfIndexSlabs(mArray, slabSize), referenceHopfIndex(mArray))
+
+
+def testHopfIndexOfTube():
+
+    mArray = hopfionGrid(shape=(64, 64, 32), L=20, R=5, w=2)
+
+    # Coarse grids underestimate the index, but both gauges agree on it
+    assert 0.8 < hopfIndex(mArray) < 1.1
+    assert np.isclose(hopfIndex(mArray), hopfIndex(mArray, method='fft'), atol=0.05)
+
+
+@pytest.mark.parametrize('method', ['slab', 'fft'])
+def testSingleLayer(method):
+
+    with pytest.raises(ValueError):
+        hopfIndex(hopfionGrid()[:, :, :1], method=method)
+
+
+def testUnknownMethod():
+
+    with pytest.raises(ValueError):
+        hopfIndex(hopfionGrid(), method='spectral')
+
+
+def testTopologicalCharge():
+
+    X = np.linspace(-40, 40, 161)
+    x, y = np.meshgrid(X, X, indexing='ij')
+
+    assert np.isclose(abs(topologicalCharge(skyrmionField([Skyrmion(0, 0)], x, y))), 1, atol=0.02)
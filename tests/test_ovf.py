@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from conftest import smoothField, writeTestOVF
+from ovf import readHeader, loadOVF, iterSeries, loadSeries, writeOVF
+
+
+@pytest.mark.parametrize('dataFormat', [4, 8])
+def testLoadOVF(tmp_path, dataFormat):
+
+    mArray = smoothField()
+    path = str(tmp_path / 'm.ovf')
+    writeTestOVF(path, mArray, dataFormat)
+
+    header = readHeader(path)
+    assert header['shape'] == mArray.shape
+    assert header['dataFormat'] == dataFormat and header['xstepsize'] == 1e-9
+
+    assert np.allclose(loadOVF(path), mArray, atol=1e-7 if dataFormat == 4 else 0)
+
+
+def testLoadStepAndRegion(tmp_path):
+
+    mArray = smoothField()
+    path = str(tmp_path / 'm.ovf')
+    writeTestOVF(path, mArray)
+
+    assert np.array_equal(loadOVF(path, step=(2, 3, 4)), mArray[::2, ::3, ::4])
+
+    region = (slice(3, 17), slice(None), slice(2, 9))
+    assert np.array_equal(loadOVF(path, step=2, region=region), mArray[region][::2, ::2, ::2])
+
+
+def testInvalidCheckValue(tmp_path):
+
+    path = str(tmp_path / 'm.ovf')
+    writeTestOVF(path, smoothField(), 4)
+
+    # Reading single precision data as double precision gives the wrong check value
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    with open(path, 'wb') as f:
+        f.write(data.replace(b'Binary 4', b'Binary 8', 1))
+
+    with pytest.raises(ValueError):
+        loadOVF(path)
+
+
+def testLoadSeries(ovfSeries):
+
+    paths, frames = ovfSeries
+
+    assert np.array_equal(loadSeries(paths), frames)
+    assert np.array_equal(loadSeries(paths, step=2, workers=2), frames[:, ::2, ::2, ::2])
+    assert all(np.array_equal(loaded, frame) for loaded, frame in zip(iterSeries(paths, workers=1), frames))
+
+
+def testLoadSeriesCache(ovfSeries, tmp_path):
+
+    paths, frames = ovfSeries
+    cachePath = str(tmp_path / 'frames.npy')
+
+    # The same kind of array is returned whether the frames are loaded from the files or from the cache
+    fresh = loadSeries(paths, step=2, cachePath=cachePath)
+    cached = loadSeries(paths, step=2, cachePath=cachePath)
+
+    for loaded in (fresh, cached):
+        assert isinstance(loaded, np.memmap)
+        assert not loaded.flags.writeable
+
+    assert np.array_equal(fresh, cached)
+
+
+def testLoadSeriesCacheOptions(ovfSeries, tmp_path):
+
+    paths, frames = ovfSeries
+    cachePath = str(tmp_path / 'frames.npy')
+
+    assert np.array_equal(loadSeries(paths, step=2, cachePath=cachePath), frames[:, ::2, ::2, ::2])
+    assert np.array_equal(loadSeries(paths, step=2, cachePath=cachePath), frames[:, ::2, ::2, ::2])
+
+    # Different options, or files changed since, do not use the cached frames
+    assert np.array_equal(loadSeries(paths, step=3, cachePath=cachePath), frames[:, ::3, ::3, ::3])
+
+    writeTestOVF(paths[0], frames[1])
+    assert np.array_equal(loadSeries(paths, step=3, cachePath=cachePath)[0], frames[1, ::3, ::3, ::3])
+
+
+def testLoadEmptySeries(tmp_path):
+
+    with pytest.raises(ValueError):
+        loadSeries([], cachePath=str(tmp_path / 'frames.npy'))
+
+
+@pytest.mark.parametrize('dataFormat', [4, 8])
+def testWriteOVF(tmp_path, dataFormat):
+
+    mArray = smoothField()
+    path = str(tmp_path / 'm.ovf')
+    writeOVF(path, mArray, cellSize=(1e-9, 2e-9, 3e-9), origin=(0, 0, -1e-9), dataFormat=dataFormat, chunkSize=5)
+
+    header = readHeader(path)
+    assert header['shape'] == mArray.shape
+    assert np.isclose(header['ystepsize'], 2e-9) and np.isclose(header['zmin'], -1e-9) and np.isclose(header['zmax'], 35e-9)
+
+    # Byte for byte the same data as written by MuMax
+    reference = str(tmp_path / 'reference.ovf')
+    writeTestOVF(reference, mArray, dataFormat)
+
+    with open(path, 'rb') as f, open(reference, 'rb') as g:
+        assert f.read()[readHeader(path)['dataOffset']:] == g.read()[readHeader(reference)['dataOffset']:]
+
+    assert np.allclose(loadOVF(path), mArray, atol=1e-7 if dataFormat == 4 else 0)
+
+
+def testWriteFilm(tmp_path):
+
+    film = smoothField()[:, :, 0]
+    path = str(tmp_path / 'm.ovf')
+    writeOVF(path, film, dataFormat=8)
+
+    assert np.array_equal(loadOVF(path), film[:, :, np.newaxis])
+
+
+def testWriteInvalidFormat(tmp_path):
+
+    with pytest.raises(ValueError):
+        writeOVF(str(tmp_path / 'm.ovf'), smoothField(), dataFormat=2)
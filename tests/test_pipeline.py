@@ -0,0 +1,75 @@
+import numpy as np
+from conftest import hopfionGrid
+from ovf import writeOVF
+from textures import Skyrmion, skyrmionField, hopfionTube, isInTube, getTubeMask
+from pipeline import skyrmionSource, hopfionSource, ovfSource, rechunk, subsample, mask, colourMap, collect, npzSink, plySink
+
+
+def testOvfSourceNpzSinkRoundTrip(tmp_path):
+
+    mArray = hopfionGrid()
+    writeOVF(str(tmp_path / 'm.ovf'), mArray, dataFormat=8)
+
+    chunks = ovfSource(str(tmp_path / 'm.ovf'), step=(2, 1, 3), origin=(1, 2, 3), spacing=0.5, chunkSize=500)
+    count = npzSink(chunks, str(tmp_path / 'm.npz'))
+
+    expected = mArray[::2, :, ::3]
+    stored = np.load(str(tmp_path / 'm.npz'))
+
+    # The points come a few z-layers at a time, so are identified by their ids rather than their order
+    assert count == expected.size // 3
+    assert np.array_equal(np.sort(stored['ids']), np.arange(count))
+    assert np.array_equal(stored['directions'], expected.reshape(-1, 3)[stored['ids']])
+
+    i, j, k = np.unravel_index(stored['ids'], expected.shape[:3])
+    assert np.allclose(stored['positions'], np.stack([1 + 0.5*i, 2 + 0.5*j, 3 + 0.5*k], axis=-1))
+
+
+def testOvfSourceChunkSizes(tmp_path):
+
+    writeOVF(str(tmp_path / 'm.ovf'), hopfionGrid())
+
+    sizes = [len(chunk['ids']) for chunk in ovfSource(str(tmp_path / 'm.ovf'), chunkSize=1000)]
+
+    assert sizes[:-1] == [1000] * (len(sizes) - 1)
+    assert sum(sizes) == 24 * 20 * 12
+
+
+def testHopfionPipeline(tmp_path):
+
+    X, Y, Z = np.linspace(-25, 25, 30), np.linspace(-25, 25, 26), np.linspace(-8, 8, 10)
+    L, R, w = 10, 4, 2
+
+    chunks = hopfionSource(X, Y, Z, L, R, w, chunkSize=1000)
+    chunks = mask(chunks, lambda chunk: isInTube(*chunk['positions'].T, L, R))
+    chunks = subsample(chunks, (len(X), len(Y), len(Z)), 2)
+    chunks = colourMap(chunks, 'hsv', vmin=-np.pi, vmax=np.pi, periodic=True, key='values')
+    points = collect(rechunk(chunks, 333))
+
+    x, y, z = np.meshgrid(X, Y, Z, indexing='ij')
+    mArray, helicity = hopfionTube(x, y, z, L, R, w)
+    keep = getTubeMask(X, Y, Z, L, R)
+    keep[1::2] = keep[:, 1::2] = keep[:, :, 1::2] = False
+
+    assert np.array_equal(points['ids'], np.flatnonzero(keep))
+    assert np.allclose(points['directions'], mArray[keep])
+    assert np.allclose(points['values'], helicity[keep])
+    assert points['colours'].shape == (np.count_nonzero(keep), 4)
+
+
+def testPlySink(tmp_path):
+
+    X = np.linspace(-20, 20, 15)
+    count = plySink(colourMap(skyrmionSource([Skyrmion(0, 0)], X, X, chunkSize=100), 'RdBu_r'), str(tmp_path / 'm.ply'))
+
+    with open(str(tmp_path / 'm.ply'), 'rb') as f:
+        header = f.read().split(b'end_header\n')[0].decode().splitlines()
+
+    assert count == len(X)**2
+    assert f'element vertex {count:020d}' in header
+
+    x, y = np.meshgrid(X, X, indexing='ij')
+    vertices = np.fromfile(str(tmp_path / 'm.ply'), dtype=[(axis, '<f4') for axis in ['x', 'y', 'z', 'nx', 'ny', 'nz']] + [(channel, 'u1') for channel in 'rgba'],
+                           offset=len('\n'.join(header)) + len('\nend_header\n'))
+
+    assert np.allclose(np.stack([vertices['nx'], vertices['ny'], vertices['nz']], axis=-1), skyrmionField([Skyrmion(0, 0)], x, y).reshape(-1, 3), atol=1e-6)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from textures import hopfionTube
+from preimages import getXYZ, getTangent, getPreimages, extractPreimage, _stitch, _joinEnds
+
+L, R, w = 20, 5, 2
+
+
+def getDirection(chi, alpha):
+    return np.array([np.sin(alpha) * np.cos(chi), np.sin(alpha) * np.sin(chi), np.cos(alpha)])
+
+
+@pytest.mark.parametrize('chi, alpha', [(np.pi/2, np.pi), (0, np.pi/4), (0.5, np.pi/2), (2, 2.5)])
+def testPreimagesOfTube(chi, alpha):
+
+    # The analytic preimages are those of the tube whose helicity does not wind around the ring
+    points, _, directions = getPreimages([chi], [alpha], np.linspace(0, 2*np.pi, 50), L=L, R=R, w=w)
+    mArray, _ = hopfionTube(*points[0].T, L, R, w, hopf_index=0)
+
+    assert np.allclose(mArray, directions[0], atol=1e-9)
+    assert np.allclose(directions[0], getDirection(chi, alpha))
+
+
+def testTangent():
+
+    psi = np.linspace(0, 2*np.pi, 50)
+    h = 1e-6
+
+    forward = np.array(getXYZ(psi + h, np.pi/3, 1.2, L, R, w))
+    backward = np.array(getXYZ(psi - h, np.pi/3, 1.2, L, R, w))
+
+    assert np.allclose(np.array(getTangent(psi, np.pi/3, 1.2, L, R, w)), (forward - backward) / (2*h), atol=1e-5)
+
+
+@pytest.fixture(scope='module')
+def sampledTube():
+
+    X = np.linspace(-1.6*L, 1.6*L, 40)
+    Z = np.linspace(-0.8*L, 0.8*L, 20)
+    x, y, z = np.meshgrid(X, X, Z, indexing='ij')
+
+    mArray, _ = hopfionTube(x, y, z, L, R, w, hopf_index=0)
+
+    return mArray, (X[0], X[0], Z[0]), (X[1] - X[0], X[1] - X[0], Z[1] - Z[0])
+
+
+# (1.05, pi/4) dips through a face of this grid and straight back, which used to split it into two pieces
+@pytest.mark.parametrize('chi, alpha', [(np.pi/2, np.pi), (0, np.pi/4), (1.05, np.pi/4), (2, 3*np.pi/4)])
+def testExtractPreimage(sampledTube, chi, alpha):
+
+    mArray, origin, cellSize = sampledTube
+
+    polylines, closed = extractPreimage(mArray, getDirection(chi, alpha), origin, cellSize)
+
+    assert len(polylines) == 1 and closed == [True]
+
+    # Every point found lies close to the analytic preimage
+    reference, _, _ = getPreimages([chi], [alpha], np.linspace(0, 2*np.pi, 2000), L=L, R=R, w=w)
+    distances = np.min(np.linalg.norm(polylines[0][:, np.newaxis] - reference[0][np.newaxis], axis=-1), axis=1)
+
+    assert np.max(distances) < 0.5 * max(cellSize)
+
+
+def testExtractPreimageChunks(sampledTube):
+
+    mArray, origin, cellSize = sampledTube
+    direction = getDirection(0, np.pi/4)
+
+    polylines, closed = extractPreimage(mArray, direction, origin, cellSize, chunkSize=100)
+
+    for chunkSize, workers in [(1, 1), (3, 2)]:
+
+        chunkedPolylines, chunkedClosed = extractPreimage(mArray, direction, origin, cellSize, chunkSize=chunkSize, workers=workers)
+
+        # The same loop, possibly starting from a different point
+        assert chunkedClosed == closed
+        assert len(chunkedPolylines[0]) == len(polylines[0])
+        assert np.allclose(np.sort(chunkedPolylines[0], axis=0), np.sort(polylines[0], axis=0))
+
+
+def testStitch():
+
+    polylines, closed = _stitch(7, np.array([[0, 1], [2, 1], [3, 4], [4, 5], [5, 3]]))
+
+    assert [polyline.tolist() for polyline in polylines] == [[0, 1, 2], [3, 4, 5]]
+    assert closed == [False, True]
+
+
+def testJoinEnds():
+
+    # Two pieces of a loop broken in two places inside the grid, and a piece which leaves the grid at both ends
+    angles = np.linspace(0, 2*np.pi, 24, endpoint=False)
+    loop = np.stack([5 + 3 * np.cos(angles), 5 + 3 * np.sin(angles), np.full(24, 5)], axis=-1)
+    line = np.stack([np.full(10, 2), np.full(10, 2), np.arange(10)], axis=-1)
+    points = np.concatenate([loop, line])
+
+    pieces = [np.arange(0, 10), np.arange(11, 24)[::-1], np.arange(24, 34)]
+    polylines, closed = _joinEnds(points, pieces, [False, False, False], (10, 10, 10))
+
+    assert closed == [True, False]
+    assert sorted(polylines[0].tolist()) == [idx for idx in range(24) if idx != 10]
+    assert np.array_equal(polylines[1], pieces[2])
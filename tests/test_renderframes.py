@@ -0,0 +1,29 @@
+import time
+import threading
+import pytest
+from RenderFrames import getFrameChunks, _watchProgress, _now
+
+
+@pytest.mark.parametrize('frames, step, chunkSize, expected', [
+    ([1, 2, 3, 4, 5], 1, 2, [(1, 2), (3, 4), (5, 5)]),
+    ([1, 2, 3, 7, 8, 10], 1, 10, [(1, 3), (7, 8), (10, 10)]),
+    ([0, 5, 10, 15, 25], 5, 3, [(0, 10), (15, 15), (25, 25)]),
+    ([], 1, 4, []),
+])
+def testGetFrameChunks(frames, step, chunkSize, expected):
+    assert getFrameChunks(frames, step, chunkSize) == expected
+
+
+def testWatchProgress(capsys):
+
+    finished = threading.Event()
+    finished.set()
+
+    # When already finished, the progress is checked and printed once before returning
+    _watchProgress([1, 2, 3], lambda frame: frame < 3, finished, interval=0)
+
+    assert capsys.readouterr().out == '[2/3] frames rendered\n'
+
+
+def testNow(tmp_path):
+    assert abs(_now(str(tmp_path)) - time.time()) < 60
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from conftest import hopfionGrid
+from sampling import gradientMagnitude, getWeights, frustumMask, sampleGrid
+
+
+@pytest.mark.parametrize('budget', [10, 100, 1000])
+def testBudget(budget):
+
+    weights = getWeights(hopfionGrid())
+    chosen = sampleGrid(weights, budget)
+
+    assert 0 < np.count_nonzero(chosen) <= budget
+
+    # Points are chosen more densely where the weights are higher
+    assert np.mean(weights[chosen]) > np.mean(weights)
+
+
+def testUniformWeightsGiveRegularGrid():
+
+    # With the same weight everywhere, whole levels of the hierarchy are kept, i.e. a grid of stride 2^level
+    chosen = sampleGrid(np.ones((33, 33)), 300)
+
+    assert np.array_equal(np.argwhere(chosen), np.argwhere(np.ones((17, 17), dtype=bool)) * 2)
+
+
+def testEmptyBudget():
+
+    assert not np.any(sampleGrid(np.ones((50, 50)), 0))
+
+
+def testTiesWithinBudget():
+
+    # All of the points which may be chosen have the same score, so the first of them is taken
+    mask = np.ones((4, 4), dtype=bool)
+    mask[0, 0] = False
+
+    chosen = sampleGrid(np.ones((4, 4)), 1, mask=mask)
+
+    assert np.argwhere(chosen).tolist() == [[0, 2]]
+
+
+def testSingleLayer():
+
+    # A film one layer thick is sampled just as the 2D grid
+    weights = getWeights(hopfionGrid()[:, :, 4])
+
+    assert np.array_equal(sampleGrid(weights[:, :, np.newaxis], 50)[:, :, 0], sampleGrid(weights, 50))
+
+
+def testGradientMagnitude():
+
+    x = np.linspace(0, 1, 11)
+    mArray = np.stack([np.cos(x), np.sin(x), 0 * x], axis=-1)[:, np.newaxis] * np.ones((1, 4, 1))
+
+    # The magnetization turns at unit rate along x (the one-sided differences at the ends are slightly less accurate)
+    assert np.allclose(gradientMagnitude(mArray, cellSize=(0.1, 1))[1:-1], 1, atol=1e-2)
+
+
+def testFrustumMask():
+
+    # A camera at the origin looking along -z with a 90 degree field of view
+    near, far = 0.1, 100
+    matrix = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, -(far + near)/(far - near), -2*far*near/(far - near)], [0, 0, -1, 0]])
+
+    positions = np.array([[0, 0, -5], [4, 0, -5], [6, 0, -5], [0, 0, 5]])
+
+    assert frustumMask(positions, matrix, margin=0).tolist() == [True, True, False, False]
@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+from spheres import sphereField, planeField, stereographicProjection
+
+
+@pytest.mark.parametrize('h', [0, 5])
+def testProjectionKeepsMagnetization(h):
+
+    positions, directions = sphereField(3, h, m=2, eta=0.3, N=2000)
+    projected = stereographicProjection(positions, 3, h)
+
+    # The cones are animated from the sphere onto the plane without turning (see Stereographic.animateProjection())
+    onPlane = np.all(np.isfinite(projected), axis=-1)
+    assert np.allclose(planeField(3, h, projected[onPlane, 0], projected[onPlane, 1], m=2, eta=0.3), directions[onPlane])
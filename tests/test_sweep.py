@@ -0,0 +1,26 @@
+import pytest
+from Sweep import parseParameter, getJobs
+
+
+@pytest.mark.parametrize('argument, expected', [
+    ('eta=0,1.5708', ('eta', [0, 1.5708])),
+    ('mode=film,volume', ('mode', ['film', 'volume'])),
+    ('zSlices=[0,1]', ('zSlices', [[0, 1]])),
+    ('zSlices=[0,1],[2,3]', ('zSlices', [[0, 1], [2, 3]])),
+    ('step=(2,2,1),4', ('step', [(2, 2, 1), 4])),
+    ('title="a,b",c', ('title', ['a,b', 'c'])),
+    ('directory=/data/run1/', ('directory', ['/data/run1/'])),
+])
+def testParseParameter(argument, expected):
+    assert parseParameter(argument) == expected
+
+
+def testGetJobs():
+
+    jobs = getJobs('path/to/SkyrmionTube.py', [('eta', [0, 1.5]), ('hopf_index', [1, 2, 3])])
+
+    # One job for each combination, with the last parameter changing fastest
+    assert len(jobs) == 6
+    assert jobs[0] == {'name': 'SkyrmionTube_eta=0_hopf_index=1', 'parameters': {'eta': 0, 'hopf_index': 1}}
+    assert [job['parameters']['hopf_index'] for job in jobs] == [1, 2, 3, 1, 2, 3]
+    assert len({job['name'] for job in jobs}) == 6
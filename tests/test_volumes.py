@@ -0,0 +1,107 @@
+import os
+import numpy as np
+import pytest
+import volumes
+from conftest import writeTestOVF
+from ovf import loadSeries
+from sampling import gradientMagnitude, sampleGrid
+from volumes import getGridShape, loadSlices, loadProjection, sampleVolume, gatherPoints, getPositions
+
+
+def referenceSample(frames, budget, floor=0.05):
+
+    """ The points chosen by sampling.sampleGrid() from the whole series in memory, with the weights described by sampleVolume(). """
+
+    gradient = np.max([gradientMagnitude(frame) for frame in frames], axis=0)
+
+    return np.flatnonzero(sampleGrid(np.maximum(gradient / gradient.max(), floor), budget))
+
+
+@pytest.mark.parametrize('step', [1, (2, 2, 3)])
+@pytest.mark.parametrize('budget', [0, 1, 50, 500, None])
+@pytest.mark.parametrize('chunkSize, workers', [(4, 1), (5, 2)])
+def testSampleVolumeMatchesSampleGrid(ovfSeries, step, budget, chunkSize, workers):
+
+    paths, _ = ovfSeries
+    frames = loadSeries(paths, step=step)
+
+    indices = sampleVolume(paths, budget, step, chunkSize=chunkSize, workers=workers)
+
+    assert np.array_equal(indices, referenceSample(frames, budget))
+
+
+def testSampleFilm(tmp_path, ovfSeries):
+
+    # A film one layer thick is sampled with the same hierarchy as the 2D grid
+    _, frames = ovfSeries
+    paths = []
+
+    for idx, frame in enumerate(frames):
+        paths.append(str(tmp_path / f'film{idx}.ovf'))
+        writeTestOVF(paths[-1], frame[:, :, 5:6])
+
+    gradient = np.max([gradientMagnitude(frame[:, :, 5]) for frame in frames], axis=0)
+    reference = np.flatnonzero(sampleGrid(np.maximum(gradient / gradient.max(), 0.05), 100))
+
+    assert np.array_equal(sampleVolume(paths, 100, chunkSize=1), reference)
+
+
+def testGatherPoints(ovfSeries):
+
+    paths, frames = ovfSeries
+    step = (2, 1, 3)
+    subsampled = frames[:, ::2, :, ::3]
+
+    indices = sampleVolume(paths, 200, step, chunkSize=2)
+    values = gatherPoints(paths, indices, step, chunkSize=3, workers=2)
+
+    assert values.shape == (len(paths), len(indices), 3)
+    assert np.array_equal(values, subsampled.reshape(len(paths), -1, 3)[:, indices])
+
+    positions = getPositions(getGridShape(paths[0], step)[:3], indices, origin=(1, 2, 3), spacing=(1, 2, 4))
+    i, j, k = np.unravel_index(indices, subsampled.shape[1:4])
+    assert np.array_equal(positions, np.stack([1 + i, 2 + 2*j, 3 + 4*k], axis=-1))
+
+
+@pytest.mark.parametrize('reduction', ['mean', 'min', 'max'])
+def testLoadProjection(ovfSeries, reduction):
+
+    paths, frames = ovfSeries
+    expected = getattr(np, reduction)(frames[0, ::2, ::2], axis=2)
+
+    assert np.allclose(loadProjection(paths[0], (2, 2, 1), reduction, chunkSize=5, workers=2), expected)
+
+
+def testLoadSlices(ovfSeries):
+
+    paths, frames = ovfSeries
+
+    assert np.array_equal(loadSlices(paths[0], [0, 7, 3], step=(1, 2, 1)), frames[0, :, ::2][:, :, [0, 7, 3]])
+
+
+def testSampleSeriesCache(ovfSeries, tmp_path, monkeypatch):
+
+    paths, _ = ovfSeries
+    cachePath = str(tmp_path / 'cones.npz')
+
+    indices, values = volumes.sampleSeries(paths, 50, cachePath=cachePath)
+
+    assert np.array_equal(indices, sampleVolume(paths, 50))
+    assert np.array_equal(values, gatherPoints(paths, indices))
+
+    # Re-running with the same files and options does not read the files
+    with monkeypatch.context() as patch:
+        patch.setattr(volumes, 'sampleVolume', None)
+        patch.setattr(volumes, 'gatherPoints', None)
+
+        cachedIndices, cachedValues = volumes.sampleSeries(paths, 50, cachePath=cachePath)
+
+    assert np.array_equal(cachedIndices, indices) and np.array_equal(cachedValues, values)
+
+    # A changed file, or a different budget, invalidates the cache
+    calls = []
+    monkeypatch.setattr(volumes, 'gatherPoints', lambda *args: calls.append(args) or gatherPoints(*args))
+
+    os.utime(paths[0], (0, 0))
+    assert np.array_equal(volumes.sampleSeries(paths, 50, cachePath=cachePath)[0], indices) and len(calls) == 1
+    assert len(volumes.sampleSeries(paths, 20, cachePath=cachePath)[0]) <= 20 and len(calls) == 2
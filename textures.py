@@ -0,0 +1,265 @@
+##############################################################
+# Analytic magnetization textures, computed over whole grids #
+##############################################################
+
+# These only need NumPy (not bpy), so the textures can be generated (and checked) outside of Blender before any glyphs are drawn.
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+class Skyrmion:
+
+    def __init__(self, centreX, centreY, w=5, R=10, m = 1, eta=np.pi/2):
+        self.centreX = centreX  # Central spin coordinate
+        self.centreY = centreY
+        self.w = w  # Skyrmion domain wall width
+        self.R = R  # Skyrmion radius
+        self.m = m  # Vorticity
+        self.eta = eta  # Helicity (e.g. pi/2 for Bloch-type, 0 for Néel-type, -pi/2 for Bloch type, reversed chirality)
+
+    def getDistance(self, x, y):
+        """ Get the distance between the input point(s) and the skyrmion's centre """
+        return np.sqrt((x - self.centreX)**2 + (y - self.centreY)**2)
+
+    def Theta(self, x, y):
+        """ Spin angle to z-axis """
+        X = x - self.centreX
+        Y = y - self.centreY
+        rho = np.sqrt(X**2 + Y**2)
+        return 2 * np.arctan2(np.sinh(self.R/self.w), np.sinh(rho/self.w))
+
+    def Phi(self, x, y):
+        """ Spin angle in xy-plane """
+        X = x - self.centreX
+        Y = y - self.centreY
+        phi = np.arctan2(Y, X)
+        return self.m * phi + self.eta
+
+
+def getNearestSkyrmion(skyrmions, x, y, chunkSize=2**22):
+
+    """ Work out which skyrmion is closest to each point.
+
+    For many skyrmions, a KD-tree of the skyrmion centres is used (if SciPy is available). Otherwise, the distances from each point
+    to all of the skyrmions are compared at once, in chunks of points so that no more than chunkSize distances are held in memory
+    at a time. In the latter case, points equidistant from several skyrmions are assigned to the first of them in the list.
+
+    Args:
+        skyrmions: List of Skyrmion objects
+        x: Array of x-coordinates
+        y: Array of y-coordinates (of the same shape as x)
+        chunkSize: Maximum number of point-skyrmion distances computed at once, if SciPy is not available
+
+    Returns:
+        Array of the same shape as x, giving the index in skyrmions of the closest skyrmion to each point
+    """
+
+    x, y = np.broadcast_arrays(x, y)
+    points = np.stack([x.ravel(), y.ravel()], axis=-1)
+    centres = np.array([[skyrmion.centreX, skyrmion.centreY] for skyrmion in skyrmions], dtype=np.float64)
+
+    if cKDTree is not None and len(skyrmions) > 16:
+        _, nearest = cKDTree(centres).query(points)
+        return nearest.reshape(x.shape)
+
+    nearest = np.empty(len(points), dtype=np.intp)
+    pointsPerChunk = max(1, chunkSize // len(skyrmions))
+
+    for start in range(0, len(points), pointsPerChunk):
+        chunk = points[start:start+pointsPerChunk]
+        distances = np.sum((chunk[:, np.newaxis, :] - centres[np.newaxis, :, :])**2, axis=-1)
+        nearest[start:start+pointsPerChunk] = np.argmin(distances, axis=1)
+
+    return nearest.reshape(x.shape)
+
+
+def skyrmionField(skyrmions, x, y):
+
+    """ Magnetization of a texture made up of several skyrmions, where each point takes the profile of its closest skyrmion.
+
+    Args:
+        skyrmions: List of Skyrmion objects
+        x: Array of x-coordinates
+        y: Array of y-coordinates (of the same shape as x)
+
+    Returns:
+        Array of shape x.shape + (3,) of the magnetization vectors
+    """
+
+    x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64))
+    nearest = getNearestSkyrmion(skyrmions, x, y)
+
+    # Parameters of the closest skyrmion at each point, so that all points can be evaluated together
+    def getParameter(name):
+        return np.array([getattr(skyrmion, name) for skyrmion in skyrmions], dtype=np.float64)[nearest]
+
+    nearestSkyrmion = Skyrmion(getParameter('centreX'), getParameter('centreY'), getParameter('w'), getParameter('R'), getParameter('m'), getParameter('eta'))
+
+    # Calculate angles using closest skyrmion
+    Phi = nearestSkyrmion.Phi(x, y)
+    Theta = nearestSkyrmion.Theta(x, y)
+
+    # Magnetization vector components
+    mArray = np.empty(x.shape + (3,))
+    mArray[..., 0] = np.cos(Phi) * np.sin(Theta)
+    mArray[..., 1] = np.sin(Phi) * np.sin(Theta)
+    mArray[..., 2] = np.cos(Theta)
+
+    return mArray
+
+
+def transform_to_origin(x, y, L):
+
+    """
+    For a given skyrmion slice of the doughnut, we would like to transform to the origin, which makes it simpler to create the skyrmion texture.
+
+    We first translate the coordinates to the origin, then rotate them into the x-z plane.
+
+    As z is invariant under this transformation, we don't need to take it as a parameter.
+
+    Args:
+        x: Global x-position
+        y: Global y-position
+        z: Global z-position
+        L: Skyrmion tube ("doughnut") radius
+
+    Returns:
+        x, y in the transformed system
+
+    """
+
+    # The angle around the "doughnut" when viewed from above, i.e. to the global x-axis
+    psi = np.arctan2(y, x)
+
+    # We translate the skyrmion from the ring to the origin (xPrime, yPrime), then rotate it so that the texture lies in the x-z plane (xDoublePrime)
+    xPrime = x - L * np.cos(psi)
+    yPrime = y - L * np.sin(psi)
+    xDoublePrime = xPrime * np.cos(psi) + yPrime * np.sin(psi)
+
+    return xDoublePrime, yPrime
+
+
+def get_helicity(x, y, eta, hopf_index):
+    
+    """
+    Get the helicity of the spins at a given point in space.
+    
+    Args:
+        x, y: Position in global coordinates
+        eta: Helicity at phi = 0
+        hopf_index: Self-explanatory
+        
+    Returns:
+        The helicity
+        
+    """
+    
+    psi = np.arctan2(y, x)
+    
+    return eta + hopf_index * psi
+
+
+def hopfionTube(x, y, z, L, R, w, m=1, eta=np.pi/2, hopf_index=1):
+
+    """
+    Magnetization of a skyrmion tube bent round into a ring (a "doughnut"), whose helicity winds hopf_index times around the ring.
+
+    Args:
+        x, y, z: Arrays of positions in global coordinates (of any, but the same, shape)
+        L: Skyrmion tube major radius (of "doughnut hole")
+        R: Skyrmion tube minor radius
+        w: Skyrmion domain wall width
+        m: Vorticity
+        eta: Helicity at psi = 0
+        hopf_index: Self-explanatory
+
+    Returns:
+        The magnetization, of shape x.shape + (3,), and the helicity (not wrapped into any particular range), of shape x.shape
+
+    """
+
+    # Transform the coordinate system of the skyrmion on the ring to the origin
+    xTransformed, yTransformed = transform_to_origin(x, y, L)
+
+    # Radius from the centre of the skyrmion texture now at the origin
+    rho = np.sqrt(xTransformed**2 + z**2)
+
+    # Polar angle in the skyrmion texture
+    phi = np.arctan2(z, xTransformed)
+
+    # The angle around the "doughnut" when viewed from above, i.e. to the global x-axis
+    psi = np.arctan2(y, x)
+
+    # The helicity of the spins in the skyrmion (will just be eta around the ring if hopf_index = 0)
+    helicity = get_helicity(x, y, eta, hopf_index)
+
+    # Spin angle in x-z plane
+    Phi = m * phi + helicity
+
+    # Spin angle to y-axis
+    Theta = 2 * np.arctan2(np.sinh(R/w), np.sinh(rho/w))
+
+    # The magnetization components in the transformed system
+    mxRotated = np.cos(Phi) * np.sin(Theta)
+    myRotated = np.cos(Theta)
+
+    mArray = np.empty(np.shape(rho) + (3,))
+    mArray[..., 2] = np.sin(Phi) * np.sin(Theta)  # (mz is unaffected by the transformation)
+
+    # Transform back from the origin to its original position on the "doughnut"
+    mArray[..., 0] = mxRotated * np.cos(psi) - myRotated * np.sin(psi)
+    mArray[..., 1] = mxRotated * np.sin(psi) + myRotated * np.cos(psi)
+
+    return mArray, helicity
+
+
+def getTubeMask(X, Y, Z, L, R, cutQuadrant=True):
+
+    """
+    Find which points of a grid lie within a skyrmion tube bent round into a ring, i.e. those within 2R of the tube's centre.
+
+    Args:
+        X, Y, Z: 1D arrays of the grid coordinates along each axis
+        L: Skyrmion tube major radius (of "doughnut hole")
+        R: Skyrmion tube minor radius
+        cutQuadrant: Whether to cut out the quadrant x > 1, y > 1 for visibility of the skyrmion texture
+
+    Returns:
+        Boolean array of shape (len(X), len(Y), len(Z))
+
+    """
+
+    # Sparse grids, so that only the mask itself has the size of the whole grid
+    x, y, z = np.meshgrid(X, Y, Z, indexing='ij', sparse=True)
+
+    return isInTube(x, y, z, L, R, cutQuadrant)
+
+
+def isInTube(x, y, z, L, R, cutQuadrant=True):
+
+    """
+    Find which of the given points lie within a skyrmion tube bent round into a ring (see getTubeMask()).
+
+    Args:
+        x, y, z: Arrays of positions in global coordinates (which broadcast against each other)
+        L: Skyrmion tube major radius (of "doughnut hole")
+        R: Skyrmion tube minor radius
+        cutQuadrant: Whether to cut out the quadrant x > 1, y > 1 for visibility of the skyrmion texture
+
+    Returns:
+        Boolean array of the broadcast shape of x, y and z
+
+    """
+
+    xTransformed, _ = transform_to_origin(x, y, L)
+    mask = xTransformed**2 + z**2 < (2*R)**2
+
+    if cutQuadrant:
+        mask &= ~((x > 1) & (y > 1))
+
+    return mask
@@ -0,0 +1,82 @@
+######################################
+# Helpers shared between the scripts #
+######################################
+
+import sys
+import ast
+import bpy
+import numpy as np
+
+# Values of script parameters which override their defaults (set e.g. by SweepWorker.py before running a script)
+overrides = {}
+
+
+def clear(keep=('Camera', 'Light', 'Area')):
+
+    """ Remove all objects and materials left over from previous runs.
+
+    Args:
+        keep: Names of objects which should not be deleted (e.g. the camera and light)
+    """
+
+    for obj in bpy.data.objects:
+        if obj.name not in keep:
+            bpy.data.objects.remove(obj)
+
+    for mat in bpy.data.materials:
+        bpy.data.materials.remove(mat)
+
+
+def getCameraMatrix(scene=None):
+
+    """ Get the matrix mapping global to clip coordinates of the scene's camera (for sampling.frustumMask()), and the camera's position.
+
+    Args:
+        scene: The scene, whose active camera and render resolution are used (the current scene by default)
+
+    Returns:
+        4x4 array (the projection matrix times the view matrix), and the position of the camera
+    """
+
+    if scene is None:
+        scene = bpy.context.scene
+
+    camera = scene.camera
+    projection = camera.calc_matrix_camera(bpy.context.evaluated_depsgraph_get(), x=scene.render.resolution_x, y=scene.render.resolution_y,
+                                           scale_x=scene.render.pixel_aspect_x, scale_y=scene.render.pixel_aspect_y)
+
+    return np.array(projection @ camera.matrix_world.inverted()), np.array(camera.matrix_world.translation)
+
+
+def parameter(name, default):
+
+    """ Get the value of a parameter of a script, so that it can be changed without editing the script.
+
+    The value is taken from the overrides dictionary if it is there, or else from a name=value argument after "--" on
+    the command line (e.g. blender -b scene.blend --python SkyrmionTube.py -- hopf_index=2), or else is the default.
+    Values given on the command line are read as Python literals (falling back to strings, e.g. for paths).
+
+    Args:
+        name: Name of the parameter
+        default: Value used if the parameter is not overridden
+
+    Returns:
+        The value of the parameter
+    """
+
+    if name in overrides:
+        return overrides[name]
+
+    if '--' in sys.argv:
+
+        for argument in sys.argv[sys.argv.index('--') + 1:]:
+
+            key, equals, value = argument.partition('=')
+
+            if equals and key == name:
+                try:
+                    return ast.literal_eval(value)
+                except (ValueError, SyntaxError):
+                    return value
+
+    return default
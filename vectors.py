@@ -0,0 +1,161 @@
+###############################################################
+# Orientations and colours of whole arrays of vectors at once #
+###############################################################
+
+# The scripts used to work out theta, phi and cmap(norm(mz)) one point at a time. The functions here take an (N, 3)
+# array of magnetization vectors and return the corresponding arrays in a single pass. They only need NumPy (not bpy),
+# so can also be used outside of Blender.
+
+import numpy as np
+
+
+def normalise(m):
+
+    """ Normalise an (N, 3) array of vectors. Vectors of zero length are left as zero (rather than becoming NaN).
+
+    Args:
+        m: (N, 3) array of vectors
+
+    Returns:
+        (N, 3) array of unit (or zero) vectors
+    """
+
+    m = np.asarray(m, dtype=np.float64)
+    length = np.linalg.norm(m, axis=-1, keepdims=True)
+
+    return np.divide(m, length, out=np.zeros_like(m), where=length > 0)
+
+
+def getAngles(m):
+
+    """ Get the spherical polar angles of an (N, 3) array of vectors.
+
+    Vectors of zero length are given theta = phi = 0, i.e. they are treated as pointing along +z.
+
+    Args:
+        m: (N, 3) array of vectors
+
+    Returns:
+        theta (angle to the z-axis) and phi (angle in the xy-plane to the x-axis), each of shape (N,)
+    """
+
+    m = normalise(m)
+    length = np.linalg.norm(m, axis=-1)
+
+    theta = np.arccos(np.clip(np.where(length > 0, m[..., 2], 1), -1, 1))
+    phi = np.arctan2(m[..., 1], m[..., 0])
+
+    return theta, phi
+
+
+def getAxisAngles(m):
+
+    """ Get the rotations which take a glyph pointing along +z to point along each vector, in Blender's axis-angle form.
+
+    The rotation axis is z x m, i.e. (cos(phi + pi/2), sin(phi + pi/2), 0), which is taken to be the y-axis when m is parallel to z (where phi = 0).
+
+    Args:
+        m: (N, 3) array of vectors
+
+    Returns:
+        (N, 4) array of [angle, axisX, axisY, axisZ], as used by rotation_axis_angle
+    """
+
+    theta, phi = getAngles(m)
+
+    axisAngles = np.zeros(theta.shape + (4,))
+    axisAngles[..., 0] = theta
+    axisAngles[..., 1] = np.cos(phi + np.pi/2)
+    axisAngles[..., 2] = np.sin(phi + np.pi/2)
+
+    return axisAngles
+
+
+def getQuaternions(m):
+
+    """ Get the rotations which take a glyph pointing along +z to point along each vector, as quaternions.
+
+    Args:
+        m: (N, 3) array of vectors
+
+    Returns:
+        (N, 4) array of [w, x, y, z], as used by rotation_quaternion
+    """
+
+    axisAngles = getAxisAngles(m)
+    halfAngle = axisAngles[..., 0] / 2
+
+    quaternions = np.empty_like(axisAngles)
+    quaternions[..., 0] = np.cos(halfAngle)
+    quaternions[..., 1:] = np.sin(halfAngle)[..., np.newaxis] * axisAngles[..., 1:]
+
+    return quaternions
+
+
+def getEulers(m):
+
+    """ Get the rotations which take a glyph pointing along +z to point along each vector, as XYZ Euler angles.
+
+    This is the same as rotating by theta about the y-axis, then by phi about the z-axis, as the scripts used to do with bpy.ops.transform.rotate.
+
+    Args:
+        m: (N, 3) array of vectors
+
+    Returns:
+        (N, 3) array of Euler angles, as used by rotation_euler
+    """
+
+    theta, phi = getAngles(m)
+
+    eulers = np.zeros(theta.shape + (3,))
+    eulers[..., 1] = theta
+    eulers[..., 2] = phi
+
+    return eulers
+
+
+def sampleColourMap(cmap):
+
+    """ Tabulate a matplotlib colour map, so that it can be looked up with applyColourMap() (the scripts instead use the
+    tables stored by colourmaps.py, so that they do not need matplotlib).
+
+    Args:
+        cmap: The colour map, e.g. matplotlib.cm.get_cmap('RdBu_r')
+
+    Returns:
+        (cmap.N, 4) array of RGBA values
+    """
+
+    return np.asarray(cmap(np.arange(cmap.N)), dtype=np.float64)
+
+
+def applyColourMap(values, lut, vmin=-1, vmax=1, periodic=False):
+
+    """ Get the colours of an array of values from a colour lookup table, giving the same result as cmap(norm(values)).
+
+    Args:
+        values: Array of values to be coloured
+        lut: (n, 4) lookup table of RGBA values, e.g. from colourmaps.getColourMap() or sampleColourMap()
+        vmin: Value mapped to the first colour in the table
+        vmax: Value mapped to the last colour in the table
+        periodic: Whether values outside [vmin, vmax) wrap around (e.g. for angles such as the helicity, with a cyclic
+            colour map such as 'hsv'), rather than taking the first or last colour
+
+    Returns:
+        Array of RGBA values, of shape values.shape + (4,)
+    """
+
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    n = len(lut)
+
+    fraction = (values - vmin) / (vmax - vmin)
+
+    if periodic:
+        fraction = np.mod(fraction, 1)
+
+    # As for matplotlib, the interval [0, 1] is divided into n equal bins, with 1 itself belonging to the last bin
+    idx = np.floor(fraction * n)
+    idx = np.clip(idx, 0, n - 1).astype(np.intp)
+
+    return lut[idx]
+
@@ -0,0 +1,373 @@
+###############################################
+# Out-of-core import of 3D magnetization data #
+###############################################
+
+# A 512^3 simulation takes 3 GB per frame as float64, too much to hold (let alone a whole time series of it) next to
+# Blender. OVF files store the data with z varying slowest, so each range of z-layers is a contiguous block of the file,
+# and these functions read the (memory-mapped) files one such block, or "chunk", at a time, with the chunks optionally
+# split across processes. Only what is drawn is ever held in full: a few z-slices, a projection along z, or, for
+# glyphs throughout the volume, the points chosen by the same hierarchical sampling as sampling.sampleGrid(). All
+# indices and shapes are those of the grid after taking every step-th point. These only need NumPy (not bpy).
+
+import os
+import json
+import numpy as np
+from ovf import readHeader, loadOVF
+from sampling import gradientMagnitude, frustumMask, _getLevels, _getAxisLevels, _getChosen
+
+# How each chunk is reduced along z by loadProjection()
+REDUCTIONS = {'mean': np.add, 'min': np.minimum, 'max': np.maximum}
+
+
+def getGridShape(path, step=1):
+
+    """ The shape of the array which would be loaded from an OVF file, without loading it.
+
+    Args:
+        path: Path to the file
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+
+    Returns:
+        Tuple (nx, ny, nz, valuedim)
+    """
+
+    nx, ny, nz, dim = readHeader(path)['shape']
+
+    return tuple(-(-n // s) for n, s in zip((nx, ny, nz), _getStep(step))) + (dim,)
+
+
+def getChunks(nz, chunkSize=16):
+
+    """ Split nz z-layers into ranges (k0, k1) of at most chunkSize layers. """
+
+    return [(k0, min(k0 + chunkSize, nz)) for k0 in range(0, nz, chunkSize)]
+
+
+def loadSlab(path, k0, k1, step=1, halo=0):
+
+    """ Load the z-layers k0 to k1 - 1 of an OVF file, along with up to halo layers either side of them.
+
+    Args:
+        path: Path to the file
+        k0, k1: Range of z-layers loaded
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+        halo: Number of extra layers loaded before k0 and after k1 (fewer at the top and bottom of the sample)
+
+    Returns:
+        Array of shape (nx, ny, layers, valuedim), and the number of extra layers before k0
+    """
+
+    step = _getStep(step)
+    nz = getGridShape(path, step)[2]
+
+    start = max(k0 - halo, 0)
+    stop = min(k1 + halo, nz)
+
+    slab = loadOVF(path, step, region=(slice(None), slice(None), slice(start * step[2], stop * step[2])))
+
+    return slab, k0 - start
+
+
+def loadSlices(path, zIndices, step=1):
+
+    """ Load only the given z-layers of an OVF file.
+
+    Args:
+        path: Path to the file
+        zIndices: Indices of the layers
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+
+    Returns:
+        Array of shape (nx, ny, len(zIndices), valuedim)
+    """
+
+    return np.concatenate([loadSlab(path, k, k + 1, step)[0] for k in zIndices], axis=2)
+
+
+def loadProjection(path, step=1, reduction='mean', chunkSize=16, workers=1):
+
+    """ Reduce the data of an OVF file along z (e.g. to its average through the thickness of a film), one chunk at a time.
+
+    Args:
+        path: Path to the file
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+        reduction: 'mean', 'min' or 'max' of each component
+        chunkSize: Number of z-layers read at a time
+        workers: Number of processes across which the chunks are split (1 to process them in this process)
+
+    Returns:
+        Array of shape (nx, ny, valuedim)
+    """
+
+    nz = getGridShape(path, step)[2]
+    partial = _map(_reduceChunk, [(path, k0, k1, step, reduction) for k0, k1 in getChunks(nz, chunkSize)], workers)
+
+    projection = REDUCTIONS[reduction].reduce(partial)
+
+    return projection / nz if reduction == 'mean' else projection
+
+
+def sampleVolume(paths, budget, step=1, cellSize=1, floor=0.05, origin=(0, 0, 0), spacing=1, cameraMatrix=None, cameraPosition=None, margin=0.05, chunkSize=16, workers=1):
+
+    """ Choose at most budget points throughout the volume of a series of OVF files, more densely where the magnetization changes quickly.
+
+    This gives the same points as sampling.sampleGrid(), with weights from sampling.getWeights() of the gradient largest
+    over all frames (relative to the largest gradient anywhere), but without holding the whole volume in memory: each
+    chunk only passes on its best budget candidates, which always include all of the points which would be chosen.
+
+    Args:
+        paths: Paths to the files, which must all have the same grid
+        budget: Largest number of points chosen, or None to choose all of the points
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+        cellSize: Spacing of the grid points used for the gradient (a number, or one per axis)
+        floor: Smallest weight due to the gradient, relative to the largest
+        origin: Position of the point [0, 0, 0] (only needed with the camera)
+        spacing: Distance between the drawn points (a number, or one per axis; only needed with the camera)
+        cameraMatrix: 4x4 array mapping global to clip coordinates (see utils.getCameraMatrix()) to only choose points in view, or None
+        cameraPosition: Position of the camera, to choose points more densely closer to it, or None
+        margin: Passed on to sampling.frustumMask()
+        chunkSize: Number of z-layers read at a time
+        workers: Number of processes across which the chunks are split (1 to process them in this process)
+
+    Returns:
+        Sorted array of the flat indices of the chosen points in the grid of shape (nx, ny, nz)
+    """
+
+    paths = list(paths)
+    shape = getGridShape(paths[0], step)[:3]
+
+    jobs = [(paths, k0, k1, shape, step, cellSize, budget, origin, spacing, cameraMatrix, cameraPosition, margin) for k0, k1 in getChunks(shape[2], chunkSize)]
+    results = _map(_sampleChunk, jobs, workers)
+
+    indices, baseScore, logGradient = [np.concatenate([result[i] for result in results]) for i in range(3)]
+    allowed = sum(result[3] for result in results)
+    maxGradient = max(result[4] for result in results)
+
+    if budget is None or allowed <= budget:
+        return np.sort(indices)
+
+    # In flat order, so that ties are broken as in sampling.sampleGrid()
+    order = np.argsort(indices)
+    indices, baseScore, logGradient = indices[order], baseScore[order], logGradient[order]
+
+    # As in sampling.sampleGrid(), but now that the largest gradient (which sets the floor) is known
+    with np.errstate(divide='ignore'):
+        score = baseScore + np.maximum(logGradient - np.log2(max(maxGradient, np.finfo(float).tiny)), np.log2(floor))
+
+    return indices[_getChosen(score, budget)]
+
+
+def gatherPoints(paths, indices, step=1, chunkSize=16, workers=1):
+
+    """ Load the values at the given points from each of a series of OVF files, one chunk at a time.
+
+    Args:
+        paths: Paths to the files, which must all have the same grid
+        indices: Flat indices of the points in the grid of shape (nx, ny, nz) (e.g. from sampleVolume())
+        step: Take every step-th point along each axis (either an integer, or a tuple for the x-, y- and z-axes)
+        chunkSize: Number of z-layers read at a time
+        workers: Number of processes across which the chunks are split (1 to process them in this process)
+
+    Returns:
+        Array of shape (frames, len(indices), valuedim)
+    """
+
+    paths = list(paths)
+    indices = np.asarray(indices)
+    nx, ny, nz, dim = getGridShape(paths[0], step)
+    k = indices % nz
+
+    # Only the chunks which contain any of the points are read
+    jobs = []
+
+    for frame, path in enumerate(paths):
+        for k0, k1 in getChunks(nz, chunkSize):
+            inChunk = np.flatnonzero((k >= k0) & (k < k1))
+            if len(inChunk) > 0:
+                jobs.append((path, k0, k1, step, indices[inChunk], (nx, ny, nz), frame, inChunk))
+
+    values = np.empty((len(paths), len(indices), dim))
+
+    for frame, inChunk, chunkValues in _map(_gatherChunk, jobs, workers):
+        values[frame, inChunk] = chunkValues
+
+    return values
+
+
+def sampleSeries(paths, budget, step=1, cellSize=1, floor=0.05, origin=(0, 0, 0), spacing=1, cameraMatrix=None, cameraPosition=None, margin=0.05, chunkSize=16, workers=1, cachePath=None):
+
+    """ Choose points with sampleVolume() and load the values at them with gatherPoints(), optionally caching the result.
+
+    If cachePath is given, the chosen points and their values are written to a .npz file there (with the list of files
+    and sampling options alongside in cachePath + '.json', as in ovf.loadSeries()), and are loaded directly from the cache
+    on later calls with the same files and options, without reading any of the OVF files.
+
+    Args:
+        paths: Paths to the files, which must all have the same grid
+        budget, step, cellSize, floor, origin, spacing, cameraMatrix, cameraPosition, margin: Passed on to sampleVolume()
+        chunkSize: Number of z-layers read at a time
+        workers: Number of processes across which the chunks are split (1 to process them in this process)
+        cachePath: Path of the .npz file in which the points and their values are cached
+
+    Returns:
+        indices: Sorted array of the flat indices of the chosen points (see sampleVolume())
+        values: Array of shape (frames, len(indices), valuedim) of the values at the chosen points
+    """
+
+    paths = list(paths)
+
+    if cachePath is not None:
+
+        # The cache is only valid for the same files (unmodified since the cache was written) and options
+        options = [step, cellSize, floor, origin, spacing, cameraMatrix, cameraPosition, margin]
+        key = {
+            'files': [[os.path.abspath(path), os.path.getsize(path), os.path.getmtime(path)] for path in paths],
+            'budget': None if budget is None else int(budget),
+            'options': [None if option is None else np.ravel(option).tolist() for option in options],
+        }
+
+        try:
+            with open(cachePath + '.json') as f:
+                if json.load(f) == key:
+                    with np.load(cachePath) as cache:
+                        return cache['indices'], cache['values']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        # Any previous cache is invalid from here on, in case writing the new one is interrupted
+        if os.path.exists(cachePath + '.json'):
+            os.remove(cachePath + '.json')
+
+    indices = sampleVolume(paths, budget, step, cellSize, floor, origin, spacing, cameraMatrix, cameraPosition, margin, chunkSize, workers)
+    values = gatherPoints(paths, indices, step, chunkSize, workers)
+
+    if cachePath is not None:
+
+        # Written through a file object, so that np.savez does not add .npz to the path
+        with open(cachePath, 'wb') as f:
+            np.savez(f, indices=indices, values=values)
+
+        with open(cachePath + '.json', 'w') as f:
+            json.dump(key, f)
+
+    return indices, values
+
+
+def getPositions(shape, indices, origin=(0, 0, 0), spacing=1):
+
+    """ Positions of the points of a grid with the given flat indices.
+
+    Args:
+        shape: Shape (nx, ny, nz) of the grid
+        indices: Flat indices of the points
+        origin: Position of the point [0, 0, 0]
+        spacing: Distance between neighbouring points (a number, or one per axis)
+
+    Returns:
+        Array of shape (len(indices), 3)
+    """
+
+    return np.asarray(origin) + np.asarray(spacing) * np.stack(np.unravel_index(indices, shape), axis=-1)
+
+
+def _getStep(step):
+
+    """ The step along each of the x-, y- and z-axes. """
+
+    return (step, step, step) if np.ndim(step) == 0 else tuple(step)
+
+
+def _map(function, jobs, workers):
+
+    """ Call the function with the arguments of each job, in this process or split across processes. """
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(function, *zip(*jobs)))
+
+    return [function(*job) for job in jobs]
+
+
+def _reduceChunk(path, k0, k1, step, reduction):
+
+    """ Reduce the z-layers k0 to k1 - 1 of an OVF file along z. """
+
+    slab, _ = loadSlab(path, k0, k1, step)
+
+    return REDUCTIONS[reduction].reduce(slab, axis=2)
+
+
+def _sampleChunk(paths, k0, k1, shape, step, cellSize, budget, origin, spacing, cameraMatrix, cameraPosition, margin):
+
+    """ Find the candidates for sampleVolume() among the z-layers k0 to k1 - 1.
+
+    Returns:
+        Flat indices of the candidates, the parts of their scores which do not depend on the gradient (their levels and
+        distances to the camera) and the base-2 logarithms of their gradients, the number of points which may be chosen,
+        and the largest gradient in the chunk
+    """
+
+    nx, ny, nz = shape
+    gradient = None
+
+    for path in paths:
+
+        # One layer either side of the chunk is also read, so that the gradient at its edges is the same as for the whole volume
+        slab, offset = loadSlab(path, k0, k1, step, halo=1)
+        frameGradient = gradientMagnitude(slab, cellSize)[:, :, offset:offset + k1 - k0]
+        gradient = frameGradient if gradient is None else np.maximum(gradient, frameGradient)
+
+    baseScore = np.minimum(_getLevels((nx, ny))[:, :, np.newaxis], _getAxisLevels(nz)[k0:k1]).astype(np.float64)
+    allowed = np.ones(baseScore.shape, dtype=bool)
+
+    if cameraMatrix is not None or cameraPosition is not None:
+
+        i, j, k = np.meshgrid(np.arange(nx), np.arange(ny), np.arange(k0, k1), indexing='ij')
+        positions = np.asarray(origin) + np.asarray(spacing) * np.stack([i, j, k], axis=-1)
+
+        if cameraMatrix is not None:
+            allowed = frustumMask(positions, cameraMatrix, margin)
+
+        # The weight is inversely proportional to the distance (the constant factor of sampling.getWeights() does not change which points are chosen)
+        if cameraPosition is not None:
+            baseScore -= np.log2(np.maximum(np.linalg.norm(positions - np.asarray(cameraPosition), axis=-1), np.finfo(float).tiny))
+
+    local = np.flatnonzero(allowed)
+    baseScore = baseScore.ravel()[local]
+
+    with np.errstate(divide='ignore'):
+        logGradient = np.log2(gradient.ravel()[local])
+
+    # The chosen points are among the best by score without the floor (those above it) or by score with the gradient at the floor (those on it)
+    if budget is not None and len(local) > budget:
+        keep = np.union1d(_getBest(baseScore + logGradient, budget), _getBest(baseScore, budget))
+        local, baseScore, logGradient = local[keep], baseScore[keep], logGradient[keep]
+
+    i, j, k = np.unravel_index(local, (nx, ny, k1 - k0))
+    indices = np.ravel_multi_index((i, j, k + k0), shape)
+
+    return indices, baseScore, logGradient, np.count_nonzero(allowed), np.max(gradient)
+
+
+def _getBest(score, budget):
+
+    """ Indices of the budget highest of a 1D array of scores, where of equal scores the earliest are taken (as in sampling._getChosen()). """
+
+    if budget <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    threshold = np.partition(score, -budget)[-budget]
+    above = np.flatnonzero(score > threshold)
+
+    return np.union1d(above, np.flatnonzero(score == threshold)[:budget - len(above)])
+
+
+def _gatherChunk(path, k0, k1, step, indices, shape, frame, inChunk):
+
+    """ Load the values at the given points (all within the z-layers k0 to k1 - 1) of an OVF file. """
+
+    slab, _ = loadSlab(path, k0, k1, step)
+    i, j, k = np.unravel_index(indices, shape)
+
+    return frame, inChunk, slab[i, j, k - k0]